@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the cardiovascular risk calculators.
+
+Run from the repository root, e.g. ``python -m benchmarks.bench_parallel``.
+"""
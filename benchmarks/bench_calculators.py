@@ -0,0 +1,241 @@
+"""
+Latency and throughput benchmarks for the risk calculators and the app.
+
+Measures per-call latency of the scalar calculators, cohort throughput of the
+vectorized engine, lab-report PDF parsing time, and end-to-end rerun time of cv_risk_app.py through
+Streamlit's headless AppTest harness. Results are written as JSON; pass an
+earlier results file with --compare to print the change per benchmark.
+
+    python -m benchmarks.bench_calculators --output bench.json
+    python -m benchmarks.bench_calculators --output new.json --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+from cv_risk_calculators import run_all_risk_assessments
+from cv_risk_core import calculate_aha_prevent, calculate_qrisk3, clinical_inputs
+from cv_risk_core.assessment import assess, clear_cache
+from cv_risk_core.batch import calculate_qrisk3_batch, ratio_batch
+from cv_risk_core.cohort import chunk_columns, score_columns
+from cv_risk_core.labs import parse_lab_pdf, read_lab_report
+from cv_risk_core.scenarios import clear_cache as clear_scenario_cache
+from cv_risk_core.scenarios import scenario_grid
+
+from .synthetic import synthetic_cohort, synthetic_lab_report
+
+APP_PATH = Path(__file__).resolve().parent.parent / "cv_risk_app.py"
+
+QRISK_ARGS = (55, "Male", "Indian", "Current", "Yes", 172, 84, 146, 5.2, True, True, False, False, False, False)
+AHA_ARGS = (55, "Male", "Indian", 210, 42, 146, True, "Yes", "Current")
+LEGACY_PATIENT = {"age": 55, "ldl": 140, "hdl": 42, "sbp": 146, "tc": 210, "statin": "No statin"}
+CLINICAL_INPUTS = dict(age=55, sex="Male", ethnicity="Indian", height=172, weight=84, sbp=146, tc=210,
+                       ldl=140, hdl=42, smoking="Current", diabetes="Yes", dm_duration=6, antihtn=True)
+
+# Widget values for an app rerun that changes the clinical inputs.
+APP_INPUTS = {"age": 55, "ht": 172, "wt": 84, "sbp": 146, "tc": 210, "ldl": 140, "hdl": 42}
+
+
+def call_latency(fn, repeat=5, number=None):
+    """Per-call latency in microseconds: best and median over `repeat` timing loops."""
+    timer = timeit.Timer(fn)
+    if number is None:
+        number, _ = timer.autorange()
+    loops = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {"best_us": min(loops), "median_us": statistics.median(loops), "calls": number}
+
+
+def bench_calls(repeat):
+    def assess_miss():
+        clear_cache()
+        assess(clinical_inputs(**CLINICAL_INPUTS))
+
+    def scenario_grid_miss():
+        clear_scenario_cache()
+        scenario_grid(key)
+
+    key = clinical_inputs(**CLINICAL_INPUTS)
+    assess(key)
+    return {
+        "calculate_qrisk3": call_latency(lambda: calculate_qrisk3(*QRISK_ARGS), repeat),
+        "calculate_aha_prevent": call_latency(lambda: calculate_aha_prevent(*AHA_ARGS), repeat),
+        "run_all_risk_assessments": call_latency(lambda: run_all_risk_assessments(LEGACY_PATIENT), repeat),
+        "run_all_risk_assessments_numeric": call_latency(
+            lambda: run_all_risk_assessments(LEGACY_PATIENT, numeric=True), repeat),
+        "assess_cache_miss": call_latency(assess_miss, repeat),
+        "assess_cache_hit": call_latency(lambda: assess(key), repeat),
+        "scenario_grid_50x50x2": call_latency(scenario_grid_miss, repeat),
+    }
+
+
+def _qrisk3_args(c):
+    """calculate_qrisk3 arguments, one column each, in the order score_columns() passes them."""
+    return (c["age"], c["sex"], c["ethnicity"], c["smoking"], c["diabetes"], c["height"], c["weight"],
+            c["sbp"], ratio_batch(c["tc"], c["hdl"]), c["antihtn"], c["prem_ascvd"], c["ckd"],
+            c["atrial_fib"], c["rheumatoid_arthritis"], c["migraine"])
+
+
+def bench_batch(rows, repeat, loop_rows=100_000):
+    """
+    Cohort throughput of score_columns() and calculate_qrisk3_batch().
+
+    The QRISK3 entries are compared with a plain loop of calculate_qrisk3
+    over prebuilt argument tuples, timed on the first loop_rows rows and
+    scaled to the full cohort.
+    """
+    columns = chunk_columns(synthetic_cohort(rows))
+    seconds = min(timeit.repeat(lambda: score_columns(columns), repeat=repeat, number=1))
+    results = {"score_columns": {"rows": rows, "seconds": seconds, "rows_per_s": rows / seconds}}
+
+    args = _qrisk3_args(columns)
+    loop_rows = min(rows, loop_rows)
+    tuples = list(zip(*[[None if value != value else value for value in np.asarray(column[:loop_rows]).tolist()]
+                        for column in args]))
+    start = time.perf_counter()
+    for row in tuples:
+        calculate_qrisk3(*row)
+    loop_seconds = (time.perf_counter() - start) * rows / loop_rows
+    results["calculate_qrisk3_loop"] = {"rows": rows, "seconds": loop_seconds, "rows_per_s": rows / loop_seconds}
+
+    object_args = tuple(np.asarray(column, dtype=object) if i in (1, 2, 3, 4) else column
+                        for i, column in enumerate(args))
+    for name, batch_args in (("categorical", args), ("object", object_args)):
+        seconds = min(timeit.repeat(lambda: calculate_qrisk3_batch(*batch_args), repeat=repeat, number=1))
+        results[f"calculate_qrisk3_batch_{name}"] = {
+            "rows": rows, "seconds": seconds, "rows_per_s": rows / seconds, "speedup": loop_seconds / seconds,
+        }
+    return results
+
+
+def bench_labs(repeat):
+    data = synthetic_lab_report()
+    read_lab_report(data)
+    return {
+        "parse_lab_pdf_3_pages": call_latency(lambda: parse_lab_pdf(data), repeat, number=5),
+        "read_lab_report_cached": call_latency(lambda: read_lab_report(data), repeat),
+    }
+
+
+def _timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].value}")
+    return (time.perf_counter() - start) * 1e3
+
+
+def _summary_ms(samples):
+    samples = sorted(samples)
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "runs": len(samples),
+    }
+
+
+def bench_app(reruns):
+    """First-run and rerun latency of the full app script, in milliseconds."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=60)
+    first = _timed_run(at)
+    for key, value in APP_INPUTS.items():
+        at.number_input(key=key).set_value(value)
+    _timed_run(at)
+
+    unchanged = [_timed_run(at) for _ in range(reruns)]
+    changed = []
+    for i in range(reruns):
+        at.number_input(key="sbp").set_value(120 + i % 40)
+        changed.append(_timed_run(at))
+    theme = []
+    for _ in range(reruns):
+        at.button(key="btn_theme").click()
+        theme.append(_timed_run(at))
+    return {
+        "first_run": {"ms": first},
+        "rerun_unchanged": _summary_ms(unchanged),
+        "rerun_input_changed": _summary_ms(changed),
+        "rerun_theme_toggle": _summary_ms(theme),
+    }
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_PATH.parent,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _headline(entry):
+    """The number a benchmark is compared on (lower is better)."""
+    for field in ("median_us", "median_ms", "ms", "seconds"):
+        if field in entry:
+            return field, entry[field]
+    return None, None
+
+
+def compare(current, baseline):
+    print(f"\n{'benchmark':<42} {'baseline':>12} {'current':>12} {'change':>8}")
+    for group, entries in current["results"].items():
+        for name, entry in entries.items():
+            old = baseline.get("results", {}).get(group, {}).get(name)
+            field, new_value = _headline(entry)
+            if old is None or field is None or field not in old:
+                continue
+            change = (new_value - old[field]) / old[field] if old[field] else 0.0
+            print(f"{group + '.' + name:<42} {old[field]:12.3f} {new_value:12.3f} {change:+8.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default="bench.json", help="results file (default: %(default)s)")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file to compare against")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="cohort size for the batch benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=20, help="app reruns per scenario")
+    parser.add_argument("--skip-app", action="store_true", help="skip the AppTest rerun benchmark")
+    args = parser.parse_args(argv)
+
+    results = {
+        "calls": bench_calls(args.repeat),
+        "batch": bench_batch(args.rows, args.repeat),
+        "labs": bench_labs(args.repeat),
+    }
+    if not args.skip_app:
+        results["app"] = bench_app(args.reruns)
+
+    report = {
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    for group, entries in results.items():
+        for name, entry in entries.items():
+            field, value = _headline(entry)
+            print(f"{group + '.' + name:<42} {value:12.3f} {field}")
+    print(f"-> {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Concurrent-session load test for cv_risk_app.py.
+
+Starts the app with `streamlit run` and opens N simulated browser sessions
+over the app's websocket (the bench_reruns client). Every session works
+through its own stream of synthetic patients the way a clinician fills the
+form: demographics (age, sex, ethnicity, height, weight), SBP, the lipid
+profile (TC, LDL-C, HDL-C) and the medical-history checkboxes, one widget
+change and rerun at a time, only sending fields that differ from the
+previous patient. Sessions are added in stages (--sessions 1,2,4,8) and kept
+open, so each stage runs with N live sessions.
+
+For each stage it reports rerun latency percentiles as the client sees them,
+reruns per second, the server's CPU use (CPU seconds / wall seconds, so 1.0
+is one core busy) and its resident memory per open session over the baseline
+after a warm-up session. CPU and memory are read from /proc, so the resource
+columns need Linux.
+
+    python -m benchmarks.bench_load --sessions 1,2,4,8,16 --interactions 40
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import websockets
+
+from .bench_reruns import APP_PATH, AppClient, _free_port, _wait_healthy
+from .bench_service import _percentile
+from .synthetic import synthetic_cohort
+
+# cohort column -> widget key, in form order
+FORM_FIELDS = (
+    ("age", "age"), ("sex", "sex"), ("ethnicity", "eth"), ("height", "ht"), ("weight", "wt"),
+    ("sbp", "sbp"), ("tc", "tc"), ("ldl", "ldl"), ("hdl", "hdl"),
+    ("mi", "mi"), ("stroke", "stroke"), ("pad", "pad"), ("revasc", "revasc"), ("ckd", "ckd"),
+    ("atrial_fib", "afib"), ("rheumatoid_arthritis", "ra"), ("migraine", "migraine"),
+)
+
+
+def patient_edits(cohort, session, sessions_total):
+    """Endless (widget key, value) stream for one session: its patients' fields, changed ones only."""
+    current = {}
+    rows = cohort.iloc[session::sessions_total].to_dict("records")
+    while True:
+        for row in rows:
+            for column, key in FORM_FIELDS:
+                value = row[column]
+                if value != value:  # NaN: left as it was, like a skipped field
+                    continue
+                if current.get(key) != value:
+                    current[key] = value
+                    yield key, value
+
+
+def _proc_cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _proc_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmRSS not found")
+
+
+async def _open_session(url):
+    ws = await websockets.connect(url, max_size=None)
+    client = AppClient(ws, None)
+    await client.rerun()
+    return client
+
+
+async def _drive(client, edits, interactions, think_s, rng):
+    latencies = []
+    for _ in range(interactions):
+        key, value = next(edits)
+        client.set_value(key, value)
+        seconds, *_ = await client.rerun(fragment_key=key)
+        latencies.append(seconds)
+        if think_s:
+            await asyncio.sleep(rng.uniform(0, 2 * think_s))
+    return latencies
+
+
+async def run_stages(url, pid, stages, interactions, think_s, seed):
+    cohort = synthetic_cohort(max(stages) * 50, seed=seed)
+    cohort["sex"] = cohort["sex"].astype(str)
+    cohort["ethnicity"] = cohort["ethnicity"].astype(str)
+    rng = random.Random(seed)
+
+    warmup = await _open_session(url)
+    await _drive(warmup, patient_edits(cohort, 0, 1), len(FORM_FIELDS), 0, rng)
+    await warmup.ws.close()
+    await asyncio.sleep(1)
+    baseline_mb = _proc_rss_mb(pid)
+
+    clients, streams, results = [], [], []
+    try:
+        for n in stages:
+            while len(clients) < n:
+                clients.append(await _open_session(url))
+            streams = [patient_edits(cohort, i, n) for i in range(n)]
+            cpu_start, wall_start = _proc_cpu_seconds(pid), time.perf_counter()
+            per_session = await asyncio.gather(*(
+                _drive(client, edits, interactions, think_s, rng) for client, edits in zip(clients, streams)
+            ))
+            wall = time.perf_counter() - wall_start
+            cpu = _proc_cpu_seconds(pid) - cpu_start
+            latencies = sorted(t for session in per_session for t in session)
+            rss_mb = _proc_rss_mb(pid)
+            results.append({
+                "sessions": n,
+                "reruns": len(latencies),
+                "reruns_per_s": len(latencies) / wall,
+                "p50_ms": _percentile(latencies, 0.5) * 1e3,
+                "p95_ms": _percentile(latencies, 0.95) * 1e3,
+                "p99_ms": _percentile(latencies, 0.99) * 1e3,
+                "cpu_cores": cpu / wall,
+                "rss_mb": rss_mb,
+                "mb_per_session": (rss_mb - baseline_mb) / n,
+            })
+    finally:
+        for client in clients:
+            await client.ws.close()
+    return {"baseline_rss_mb": baseline_mb, "stages": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default=str(APP_PATH))
+    parser.add_argument("--sessions", default="1,2,4,8", help="comma-separated session counts, one stage each")
+    parser.add_argument("--interactions", type=int, default=40, help="widget changes per session per stage")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a session's changes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+    stages = sorted({int(n) for n in args.sessions.split(",")})
+
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", args.app, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_healthy(port, proc)
+        results = asyncio.run(run_stages(f"ws://127.0.0.1:{port}/_stcore/stream", proc.pid, stages,
+                                         args.interactions, args.think_ms / 1e3, args.seed))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"server CPUs={os.cpu_count()} baseline RSS {results['baseline_rss_mb']:.0f} MB, "
+          f"{args.interactions} changes per session, think {args.think_ms:g} ms")
+    print(f"{'sessions':>8} {'reruns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'CPU':>6} {'RSS MB':>8} {'MB/session':>11}")
+    for r in results["stages"]:
+        print(f"{r['sessions']:8d} {r['reruns_per_s']:9.1f} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f} "
+              f"{r['cpu_cores']:6.2f} {r['rss_mb']:8.0f} {r['mb_per_session']:11.2f}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Scaling benchmark for process-pool cohort scoring.
+
+Scores one synthetic cohort serially and then with 1..N workers, and prints
+throughput, speedup over the serial path and parallel efficiency.
+
+    python -m benchmarks.bench_parallel --rows 2000000 --max-workers 8
+"""
+
+import argparse
+import os
+import time
+
+from cv_risk_core.cohort import chunk_columns, score_columns
+from cv_risk_core.parallel import ParallelScorer
+
+from .synthetic import synthetic_cohort
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    columns = chunk_columns(synthetic_cohort(args.rows))
+    serial = best_of(args.repeat, lambda: score_columns(columns))
+    print(f"{args.rows:,} rows on {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>12} {'speedup':>8} {'efficiency':>10}")
+    print(f"{'serial':>8} {serial:9.3f} {args.rows / serial:12,.0f} {1.0:8.2f} {'':>10}")
+
+    for workers in range(1, args.max_workers + 1):
+        with ParallelScorer(workers) as scorer:
+            scorer.score_columns({k: v[:1000] for k, v in columns.items()})  # start the workers
+            seconds = best_of(args.repeat, lambda: scorer.score_columns(columns))
+        speedup = serial / seconds
+        print(f"{workers:>8} {seconds:9.3f} {args.rows / seconds:12,.0f} {speedup:8.2f} {speedup / workers:10.0%}")
+
+
+if __name__ == "__main__":
+    main()
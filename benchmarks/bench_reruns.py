@@ -0,0 +1,200 @@
+"""
+Rerun cost of cv_risk_app.py as a browser sees it.
+
+Starts the app with `streamlit run`, connects to it over the same websocket
+the browser uses and replays a few widget interactions. For each one it
+reports the time until the run finishes, how many delta messages (and bytes)
+the server sent, and the script time the app's own profiler logged (see
+cv_risk_core.profiling). Widgets inside an st.fragment are sent with their
+fragment id, exactly as the frontend does, so fragment-scoped reruns are
+measured as such. Like a browser, the client reports the hashes of cacheable
+messages it already holds, so the server may replace those with references.
+
+    python -m benchmarks.bench_reruns --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+APP_PATH = Path(__file__).resolve().parent.parent / "cv_risk_app.py"
+
+WIDGET_TYPES = ("number_input", "checkbox", "button", "selectbox", "radio")
+DONE = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+
+# (name, widget key, values to cycle through)
+SCENARIOS = (
+    ("diastolic BP (no score depends on it)", "dbp", [70.0, 80.0, 90.0]),
+    ("systolic BP (changes the scores)", "sbp", [120.0, 140.0, 160.0]),
+    ("triglycerides (no score depends on it)", "tg", [120.0, 180.0, 240.0]),
+    ("medical history: CKD", "ckd", [True, False]),
+    ("medical history: none of the above", "none_hist_check", [True, False]),
+    ("medications: none of the above", "none_med_check", [True, False]),
+)
+BASELINE_INPUTS = {"age": 55.0, "ht": 172.0, "wt": 84.0, "sbp": 146.0, "tc": 210.0, "ldl": 140.0, "hdl": 42.0}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _widget_key(widget_id):
+    # Widget ids with a user key end in "-<key>"; see streamlit.elements.lib.utils.
+    return widget_id.rsplit("-", 1)[-1] if widget_id.startswith("$$ID") else widget_id
+
+
+class AppClient:
+    """Minimal browser stand-in for one Streamlit session."""
+
+    def __init__(self, ws, profile_log):
+        self.ws = ws
+        self.profile_log = profile_log
+        self._log_offset = 0
+        self.widgets = {}  # key -> (widget id, element type, fragment id)
+        self.states = {}  # widget id -> WidgetState
+        self.cached = set()
+
+    def set_value(self, key, value):
+        widget_id, kind, _ = self.widgets[key]
+        state = self.states.setdefault(widget_id, BackMsg().rerun_script.widget_states.widgets.add())
+        state.id = widget_id
+        if kind == "checkbox":
+            state.bool_value = bool(value)
+        elif kind in ("selectbox", "radio"):
+            state.string_value = str(value)
+        else:
+            state.double_value = float(value)
+
+    async def rerun(self, fragment_key=None):
+        """Send a rerun and wait for it to finish; returns (seconds, deltas, delta bytes, script ms)."""
+        msg = BackMsg()
+        client = msg.rerun_script
+        for state in self.states.values():
+            client.widget_states.widgets.add().CopyFrom(state)
+        client.cached_message_hashes.extend(sorted(self.cached))
+        if fragment_key is not None:
+            fragment_id = self.widgets[fragment_key][2]
+            if fragment_id:
+                client.fragment_id = fragment_id
+
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        deltas = nbytes = 0
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if fwd.metadata.cacheable and fwd.hash:
+                self.cached.add(fwd.hash)
+            if kind in ("delta", "ref_hash"):
+                deltas += 1
+                nbytes += fwd.ByteSize()
+                if kind == "delta":
+                    self._register(fwd)
+            elif kind == "script_finished" and fwd.script_finished in DONE:
+                return time.perf_counter() - start, deltas, nbytes, self._script_ms()
+
+    def _script_ms(self):
+        """Script time logged by the app's profiler since the previous call (0 without a log)."""
+        if self.profile_log is None:
+            return 0.0
+        with open(self.profile_log, encoding="utf-8") as log:
+            log.seek(self._log_offset)
+            records = [json.loads(line) for line in log]
+            self._log_offset = log.tell()
+        return sum(r["total_ms"] for r in records)
+
+    def _register(self, fwd):
+        if fwd.delta.WhichOneof("type") != "new_element":
+            return
+        element = fwd.delta.new_element
+        kind = element.WhichOneof("type")
+        if kind in WIDGET_TYPES:
+            widget_id = getattr(element, kind).id
+            self.widgets[_widget_key(widget_id)] = (widget_id, kind, fwd.delta.fragment_id)
+
+
+async def measure(url, profile_log, repeat):
+    async with websockets.connect(url, max_size=None) as ws:
+        app = AppClient(ws, profile_log)
+        first = await app.rerun()
+        for key, value in BASELINE_INPUTS.items():
+            app.set_value(key, value)
+        await app.rerun()
+
+        results = {"first_run": {"ms": first[0] * 1e3, "deltas": first[1], "bytes": first[2], "script_ms": first[3]}}
+        for name, key, values in SCENARIOS:
+            samples = []
+            for i in range(repeat):
+                app.set_value(key, values[i % len(values)])
+                samples.append(await app.rerun(fragment_key=key))
+            results[name] = {
+                "median_ms": statistics.median(s[0] for s in samples) * 1e3,
+                "deltas": statistics.median(s[1] for s in samples),
+                "bytes": statistics.median(s[2] for s in samples),
+                "script_ms": statistics.median(s[3] for s in samples),
+            }
+        return results
+
+
+def _wait_healthy(port, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("streamlit exited during startup")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError("streamlit did not become healthy")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default=str(APP_PATH))
+    parser.add_argument("--repeat", type=int, default=20, help="interactions per scenario")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    port = _free_port()
+    profile_log = os.path.join(tempfile.mkdtemp(), "profile.log")
+    open(profile_log, "w").close()
+    env = {**os.environ, "CV_RISK_PROFILE": "1", "CV_RISK_PROFILE_LOG": profile_log}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", args.app, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env,
+    )
+    try:
+        _wait_healthy(port, proc)
+        results = asyncio.run(measure(f"ws://127.0.0.1:{port}/_stcore/stream", profile_log, args.repeat))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"{'interaction':<42} {'ms':>8} {'script ms':>10} {'deltas':>7} {'bytes':>9}")
+    for name, r in results.items():
+        ms = r.get("median_ms", r.get("ms"))
+        print(f"{name:<42} {ms:8.1f} {r['script_ms']:10.1f} {r['deltas']:7.0f} {r['bytes']:9,.0f}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
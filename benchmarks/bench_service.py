@@ -0,0 +1,131 @@
+"""
+Load test for the HTTP scoring service (cv_risk_core.service) on localhost.
+
+Starts the service in a subprocess, then sends single-patient requests and
+batch requests from a pool of client threads, each with its own keep-alive
+connection. Reports requests/s and latency percentiles for /score and
+patients/s for /score/batch.
+
+    python -m benchmarks.bench_service --workers 4 --concurrency 8 --batch-size 5000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from .synthetic import synthetic_cohort
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_healthy(port, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("service exited during startup")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError("service did not become healthy")
+
+
+def _percentile(sorted_samples, q):
+    return sorted_samples[min(len(sorted_samples) - 1, int(round(q * (len(sorted_samples) - 1))))]
+
+
+def run_load(port, path, bodies, concurrency):
+    """POST every body over `concurrency` connections; returns (seconds, per-request latencies)."""
+    def client(share):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        latencies = []
+        try:
+            for body in share:
+                start = time.perf_counter()
+                conn.request("POST", path, body, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"{path} returned {response.status}")
+                latencies.append(time.perf_counter() - start)
+        finally:
+            conn.close()
+        return latencies
+
+    shares = [bodies[i::concurrency] for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = [t for share in pool.map(client, shares) for t in share]
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="service batch processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="client connections")
+    parser.add_argument("--requests", type=int, default=2000, help="single-patient requests")
+    parser.add_argument("--batches", type=int, default=40, help="batch requests")
+    parser.add_argument("--batch-size", type=int, default=5000, help="patients per batch request")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    cohort = synthetic_cohort(max(args.requests, args.batch_size)).rename(columns={"patient_id": "id"})
+    singles = [json.dumps(p).encode() for p in json.loads(cohort.head(args.requests).to_json(orient="records"))]
+    batch = b'{"patients": ' + cohort.head(args.batch_size).to_json(orient="records").encode() + b"}"
+
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "cv_risk_core.service", "--port", str(port), "--workers", str(args.workers)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_healthy(port, proc)
+        run_load(port, "/score/batch", [batch] * args.workers, args.workers)  # start the pool
+        single_s, single_lat = run_load(port, "/score", singles, args.concurrency)
+        batch_s, batch_lat = run_load(port, "/score/batch", [batch] * args.batches, args.concurrency)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    results = {
+        "score": {
+            "requests": len(singles),
+            "requests_per_s": len(singles) / single_s,
+            "p50_ms": _percentile(single_lat, 0.5) * 1e3,
+            "p95_ms": _percentile(single_lat, 0.95) * 1e3,
+            "p99_ms": _percentile(single_lat, 0.99) * 1e3,
+        },
+        "score_batch": {
+            "requests": args.batches,
+            "batch_size": args.batch_size,
+            "patients_per_s": args.batches * args.batch_size / batch_s,
+            "median_ms": statistics.median(batch_lat) * 1e3,
+            "p95_ms": _percentile(batch_lat, 0.95) * 1e3,
+        },
+    }
+    s, b = results["score"], results["score_batch"]
+    print(f"service workers={args.workers} client connections={args.concurrency} CPUs={os.cpu_count()}")
+    print(f"POST /score        {s['requests_per_s']:10,.0f} req/s       "
+          f"p50 {s['p50_ms']:.2f} ms  p95 {s['p95_ms']:.2f} ms  p99 {s['p99_ms']:.2f} ms")
+    print(f"POST /score/batch  {b['patients_per_s']:10,.0f} patients/s  "
+          f"{b['batch_size']:,} per request, median {b['median_ms']:.1f} ms  p95 {b['p95_ms']:.1f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Synthetic patient cohorts for benchmarks, in the cv_risk_core.cohort column layout.
+"""
+
+import numpy as np
+import pandas as pd
+
+from cv_risk_core.cohort import FLAG_COLUMNS
+
+
+def synthetic_cohort(n, seed=0):
+    """DataFrame of n plausible patients with a few missing values per column."""
+    rng = np.random.default_rng(seed)
+
+    def with_missing(values, rate=0.03):
+        values = values.astype(float)
+        values[rng.random(n) < rate] = np.nan
+        return values
+
+    diabetes = rng.choice(["No", "Yes"], n, p=[0.85, 0.15])
+    frame = pd.DataFrame({
+        "patient_id": np.arange(n),
+        "age": with_missing(rng.integers(25, 90, n)),
+        "sex": pd.Categorical(rng.choice(["Male", "Female"], n)),
+        "ethnicity": pd.Categorical(rng.choice(["Indian", "South Asian", "White", "Black", "Other"], n)),
+        "height": with_missing(rng.normal(168, 9, n).round(), rate=0.1),
+        "weight": with_missing(rng.normal(78, 15, n).round(), rate=0.1),
+        "sbp": with_missing(rng.normal(132, 18, n).round()),
+        "tc": with_missing(rng.normal(200, 40, n).round().clip(100, 400)),
+        "ldl": with_missing(rng.normal(125, 35, n).round().clip(40, 300)),
+        "hdl": with_missing(rng.normal(48, 12, n).round().clip(20, 120)),
+        "apob": with_missing(rng.normal(100, 25, n).round(), rate=0.5),
+        "lpa": with_missing(rng.gamma(1.5, 20, n).round(), rate=0.6),
+        "dm_duration": np.where(diabetes == "Yes", rng.integers(0, 25, n), np.nan),
+        "smoking": pd.Categorical(rng.choice(["Never", "Former", "Current"], n, p=[0.6, 0.25, 0.15])),
+        "diabetes": pd.Categorical(diabetes),
+    })
+    for name in FLAG_COLUMNS:
+        frame[name] = rng.random(n) < 0.08
+    return frame
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_pdf(pages):
+    """Bytes of a minimal PDF with one Helvetica line per string; `pages` is a list of line lists."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 790 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops)
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def synthetic_lab_report(tc=212, ldl=138, hdl=41, tg=176, apob=104, apoa1=128, lpa=62, age=56, sex="M",
+                         patient="Test Patient"):
+    """A three-page lab report PDF: header and CBC, lipid panel, renal panel."""
+    return text_pdf([
+        [
+            "CITY DIAGNOSTICS LABORATORY", f"Patient: {patient}    Age/Sex: {age} Y / {sex}", "Sample: Serum (fasting)",
+            "", "COMPLETE BLOOD COUNT", "Haemoglobin 14.2 g/dL 13.0 - 17.0", "Platelet Count 2.6 lakh/cumm 1.5 - 4.1",
+            "Total Leucocyte Count 7800 /cumm 4000 - 11000",
+        ],
+        [
+            "LIPID PROFILE", "Test  Result  Units  Biological Reference Interval",
+            f"Total Cholesterol {tc} mg/dL < 200", f"Triglycerides {tg} mg/dL < 150",
+            f"HDL Cholesterol (Direct) {hdl} mg/dL > 40", f"LDL Cholesterol (Calculated) {ldl} mg/dL < 100",
+            f"VLDL Cholesterol {round(tg / 5)} mg/dL < 30", f"Non-HDL Cholesterol {tc - hdl} mg/dL < 130",
+            f"TC/HDL Ratio {tc / hdl:.1f} 3.5 - 5.0", f"Apolipoprotein B {apob} mg/dL 66 - 133",
+            f"Apolipoprotein A1 {apoa1} mg/dL 104 - 202", f"ApoB/ApoA1 Ratio {apob / apoa1:.2f} 0.35 - 0.98",
+            f"Lipoprotein (a) {lpa} mg/dL < 30",
+        ],
+        [
+            "RENAL FUNCTION", "Creatinine 0.9 mg/dL 0.7 - 1.3", "Urea 28 mg/dL 17 - 43", "eGFR 92 mL/min/1.73m2 > 90",
+            "", "*** End of Report ***",
+        ],
+    ])
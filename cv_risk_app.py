@@ -1,5 +1,20 @@
+import os
+
+import numpy as np
+import pandas as pd
 import streamlit as st
-import math
+from streamlit import config as st_config
+
+from cv_risk_core import clinical_inputs
+from cv_risk_core.assessment import cache_stats
+from cv_risk_core.graph import NODES, AssessmentGraph
+from cv_risk_core.labs import LAB_FIELDS, LAB_LABELS, mg_dl_values, read_lab_report
+from cv_risk_core.percentiles import DEFAULT_INDEX, INDEX_ENV, PercentileIndex
+from cv_risk_core.profiling import section_profiler
+from cv_risk_core.scenarios import scenario_grid
+from cv_risk_core.units import UNIT_LABELS, normalize_unit, to_mg_dl, unit_factor
+from cv_risk_core.validation import CATEGORY_CHOICES, INPUT_LIMITS
+from cv_risk_theme import THEMES, build_stylesheet
 
 st.set_page_config(
     layout="wide",
@@ -7,6 +22,11 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# ========== PROFILING (opt-in on the server: CV_RISK_PROFILE=1) ==========
+profiler = section_profiler()
+app_run_complete = False
+profiler.mark("Theme & styles")
+
 # ========== THEME MANAGEMENT ==========
 if "theme" not in st.session_state:
     st.session_state.theme = "light"
@@ -17,566 +37,29 @@ def toggle_theme():
 is_dark = st.session_state.theme == "dark"
 
 # ========== THEME VARIABLES ==========
-if is_dark:
-    BG_PAGE        = "#0f1117"
-    BG_SECONDARY   = "#1a1d27"
-    BG_INPUT       = "#252836"
-    TEXT_PRIMARY   = "#e8eaf0"
-    TEXT_SECONDARY = "#9aa0b8"
-    TEXT_MUTED     = "#9aa0b8"
-    BORDER_COLOR   = "#2e3347"
-    ACCENT         = "#4c9ef8"
-    ACCENT_DARK    = "#3a82d6"
-    HEADING_COLOR  = "#e8eaf0"
-    H2_LEFT_BAR    = "#4c9ef8"
-    H2_BG          = "rgba(76, 158, 248, 0.08)"
-    DIVIDER        = "#2e3347"
-    METRIC_BG      = "#1e2130"
-    METRIC_VAL     = "#e8eaf0"
-    BTN_BG         = "#3a82d6"
-    BTN_HOVER      = "#2d6dbf"
-    INFO_BG        = "rgba(76, 158, 248, 0.1)"
-    INFO_BORDER    = "#4c9ef8"
-    WARN_BG        = "rgba(255, 193, 7, 0.1)"
-    WARN_BORDER    = "#ffc107"
-    TOOLBAR_BG     = "#13161f"
-    TOOLBAR_BORDER = "#2e3347"
-    RISK_LOW_BG       = "linear-gradient(135deg, #1a3326 0%, #1f3d2e 100%)"
-    RISK_LOW_BORDER   = "#28a745"
-    RISK_MOD_BG       = "linear-gradient(135deg, #2e2910 0%, #3a3412 100%)"
-    RISK_MOD_BORDER   = "#ffc107"
-    RISK_HIGH_BG      = "linear-gradient(135deg, #2e1f0a 0%, #3a2710 100%)"
-    RISK_HIGH_BORDER  = "#ff9800"
-    RISK_VH_BG        = "linear-gradient(135deg, #2e1118 0%, #3a1520 100%)"
-    RISK_VH_BORDER    = "#dc3545"
-    RISK_NA_BG        = "linear-gradient(135deg, #1a1d27 0%, #252836 100%)"
-    RISK_NA_BORDER    = "#4a5568"
-    CF_BG             = "rgba(255,255,255,0.04)"
-    CF_BORDER         = "rgba(255,255,255,0.08)"
-    CF_TITLE          = "#9aa0b8"
-    CF_ITEM           = "#9aa0b8"
-    CF_BULLET         = "#4c9ef8"
-    TOGGLE_ICON       = "☀"
-    SELECTBOX_COLOR   = "#e8eaf0"
-    INPUT_COLOR       = "#e8eaf0"
-    CAPTION_COLOR     = "#9aa0b8"
-    TAB_BG            = "#1a1d27"
-    TAB_ACTIVE_BG     = "#252836"
-    TAB_COLOR         = "#9aa0b8"
-    TAB_ACTIVE_COLOR  = "#4c9ef8"
-    TAB_ACTIVE_BORDER = "#4c9ef8"
-    UNIT_COLOR        = "#6b7280"
-    TOOLBAR_BTN_BG    = "#2a2f45"
-    TOOLBAR_BTN_BORDER= "#4c9ef8"
-    TOOLBAR_BTN_COLOR = "#e8eaf0"
-    SECTION_LABEL_COLOR = "#4c9ef8"
-    # Dark mode toggle button - HIGH CONTRAST
-    THEME_BTN_BG      = "#fbbf24"
-    THEME_BTN_COLOR   = "#1f2937"
-    THEME_BTN_BORDER  = "#fbbf24"
-    THEME_BTN_HOVER_BG = "#f59e0b"
-else:
-    BG_PAGE        = "#f0f2f6"
-    BG_SECONDARY   = "#ffffff"
-    BG_INPUT       = "#ffffff"
-    TEXT_PRIMARY   = "#1a202c"
-    TEXT_SECONDARY = "#4a5568"
-    TEXT_MUTED     = "#718096"
-    BORDER_COLOR   = "#dde1e9"
-    ACCENT         = "#2563eb"
-    ACCENT_DARK    = "#1e40af"
-    HEADING_COLOR  = "#0f172a"
-    H2_LEFT_BAR    = "#2563eb"
-    H2_BG          = "rgba(37, 99, 235, 0.06)"
-    DIVIDER        = "#e2e8f0"
-    METRIC_BG      = "#ffffff"
-    METRIC_VAL     = "#0f172a"
-    BTN_BG         = "#2563eb"
-    BTN_HOVER      = "#1e40af"
-    INFO_BG        = "#eff6ff"
-    INFO_BORDER    = "#2563eb"
-    WARN_BG        = "#fffbeb"
-    WARN_BORDER    = "#f59e0b"
-    TOOLBAR_BG     = "#ffffff"
-    TOOLBAR_BORDER = "#dde1e9"
-    RISK_LOW_BG       = "linear-gradient(135deg, #dcfce7 0%, #bbf7d0 100%)"
-    RISK_LOW_BORDER   = "#16a34a"
-    RISK_MOD_BG       = "linear-gradient(135deg, #fefce8 0%, #fef08a 100%)"
-    RISK_MOD_BORDER   = "#ca8a04"
-    RISK_HIGH_BG      = "linear-gradient(135deg, #fff7ed 0%, #fed7aa 100%)"
-    RISK_HIGH_BORDER  = "#ea580c"
-    RISK_VH_BG        = "linear-gradient(135deg, #fff1f2 0%, #fecdd3 100%)"
-    RISK_VH_BORDER    = "#dc2626"
-    RISK_NA_BG        = "linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%)"
-    RISK_NA_BORDER    = "#94a3b8"
-    CF_BG             = "rgba(255,255,255,0.9)"
-    CF_BORDER         = "rgba(0,0,0,0.07)"
-    CF_TITLE          = "#374151"
-    CF_ITEM           = "#4b5563"
-    CF_BULLET         = "#2563eb"
-    TOGGLE_ICON       = "🌙"
-    SELECTBOX_COLOR   = "#1a202c"
-    INPUT_COLOR       = "#1a202c"
-    CAPTION_COLOR     = "#64748b"
-    TAB_BG            = "#f1f5f9"
-    TAB_ACTIVE_BG     = "#ffffff"
-    TAB_COLOR         = "#64748b"
-    TAB_ACTIVE_COLOR  = "#1e40af"
-    TAB_ACTIVE_BORDER = "#2563eb"
-    UNIT_COLOR        = "#94a3b8"
-    TOOLBAR_BTN_BG    = "#f8fafc"
-    TOOLBAR_BTN_BORDER= "#dde1e9"
-    TOOLBAR_BTN_COLOR = "#475569"
-    SECTION_LABEL_COLOR = "#2563eb"
- # ... other light mode colors stay the same ...
-    SECTION_LABEL_COLOR = "#2563eb"
-    # Light mode toggle button - FIXED HIGH CONTRAST
-    THEME_BTN_BG      = "#ffffff"
-    THEME_BTN_COLOR   = "#1e293b"
-    THEME_BTN_BORDER  = "#1e293b"
-    THEME_BTN_HOVER_BG = "#f1f5f9"
+palette = THEMES[st.session_state.theme]
+ACCENT = palette["ACCENT"]
+HEADING_COLOR = palette["HEADING_COLOR"]
+TEXT_PRIMARY = palette["TEXT_PRIMARY"]
+TEXT_SECONDARY = palette["TEXT_SECONDARY"]
+TEXT_MUTED = palette["TEXT_MUTED"]
+UNIT_COLOR = palette["UNIT_COLOR"]
 
 # ========== INJECT CSS ==========
-st.markdown(f"""
-<style>
-    /* ---- CRITICAL: Fix top white bar - force all containers to match theme ---- */
-    html, body, .stApp, .main,
-    [data-testid="stAppViewContainer"],
-    [data-testid="stAppViewBlockContainer"],
-    [data-testid="stHeader"],
-    header, 
-    .stApp > header {{
-        background-color: {BG_PAGE} !important;
-        color: {TEXT_PRIMARY} !important;
-    }}
-
-    /* ---- Hide Streamlit chrome ---- */
-    button[kind="header"], [data-testid="stToolbar"],
-    #MainMenu, .stDeployButton, footer {{
-        display: none !important;
-    }}
-
-    /* ---- Block container: INCREASED top padding to prevent title clipping ---- */
-    .block-container {{
-        background-color: {BG_PAGE} !important;
-        padding-top: 4rem !important;
-        padding-bottom: 3rem !important;
-        max-width: 1200px !important;
-    }}
-
-  /* ---- Universal text color (EXCLUDE buttons) ---- */
-.stApp p,
-.stApp span,
-.stApp div,
-.stApp label,
-.stApp li {{
-    color: {TEXT_PRIMARY} !important;
-}}
-
-    /* ---- Section headers (h2) - INCREASED SIZE ---- */
-    h2 {{
-        color: {SECTION_LABEL_COLOR} !important;
-        font-size: 1rem !important;
-        font-weight: 700 !important;
-        text-transform: uppercase !important;
-        letter-spacing: 0.08em !important;
-        margin-top: 2rem !important;
-        margin-bottom: 0.8rem !important;
-        padding: 0 !important;
-        border: none !important;
-        background: none !important;
-    }}
-
-    /* ---- h3 ---- */
-    h3 {{
-        color: {TEXT_PRIMARY} !important;
-        font-weight: 600 !important;
-        font-size: 1.1rem !important;
-        margin-top: 0 !important;
-    }}
-
-    /* ---- Section card wrapper ---- */
-    .cv-section {{
-        background: {BG_SECONDARY};
-        border: 1px solid {BORDER_COLOR};
-        border-radius: 10px;
-        padding: 1rem 1.2rem 0.8rem 1.2rem;
-        margin-bottom: 0.8rem;
-    }}
-
-    /* ---- Input field rows with unit label ---- */
-    .input-row {{
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-        margin-bottom: 0.5rem;
-    }}
-    .input-unit {{
-        font-size: 0.78rem;
-        color: {UNIT_COLOR} !important;
-        white-space: nowrap;
-        padding-top: 1.6rem;
-        min-width: 42px;
-    }}
-
-    /* ---- Number inputs ---- */
-    .stNumberInput input,
-    input[type="number"],
-    input[type="text"] {{
-        background-color: {BG_INPUT} !important;
-        color: {INPUT_COLOR} !important;
-        border: 1.5px solid {BORDER_COLOR} !important;
-        border-radius: 6px !important;
-        caret-color: {INPUT_COLOR} !important;
-        font-size: 0.9rem !important;
-    }}
-    .stNumberInput input:focus {{
-        border-color: {ACCENT} !important;
-        box-shadow: 0 0 0 3px {ACCENT}22 !important;
-        outline: none !important;
-    }}
-    .stNumberInput [data-testid="stNumberInputStepUp"],
-    .stNumberInput [data-testid="stNumberInputStepDown"] {{
-        display: none !important;
-    }}
-    .stNumberInput > div {{
-        gap: 0 !important;
-    }}
-
-    /* ---- Selectbox / Dropdown ---- */
-    .stSelectbox [data-baseweb="select"] > div,
-    .stSelectbox [data-baseweb="select"] > div > div {{
-        background-color: {BG_INPUT} !important;
-        color: {SELECTBOX_COLOR} !important;
-        border: 1.5px solid {BORDER_COLOR} !important;
-        border-radius: 6px !important;
-    }}
-    .stSelectbox [data-baseweb="select"] span,
-    .stSelectbox [data-baseweb="select"] div {{
-        color: {SELECTBOX_COLOR} !important;
-        background-color: transparent !important;
-    }}
-    [data-baseweb="popover"], [data-baseweb="menu"],
-    [role="listbox"], [data-baseweb="list"] {{
-        background-color: {BG_INPUT} !important;
-        border-color: {BORDER_COLOR} !important;
-    }}
-    [role="option"], [data-baseweb="option"] {{
-        background-color: {BG_INPUT} !important;
-        color: {SELECTBOX_COLOR} !important;
-    }}
-    [role="option"]:hover, [data-baseweb="option"]:hover {{
-        background-color: {BORDER_COLOR} !important;
-    }}
-
-    /* ---- Radio buttons ---- */
-    .stRadio label, .stRadio div,
-    .stRadio [data-testid="stMarkdownContainer"] p {{
-        color: {TEXT_PRIMARY} !important;
-    }}
-    .stRadio > div {{
-        gap: 0.5rem !important;
-    }}
-
-    /* ---- Checkboxes ---- */
-    .stCheckbox label, .stCheckbox span, .stCheckbox p {{
-        color: {TEXT_PRIMARY} !important;
-        font-weight: 400 !important;
-        font-size: 0.88rem !important;
-    }}
-    .stCheckbox {{
-        margin-bottom: 0.25rem !important;
-        padding: 0 !important;
-    }}
-
-    /* ---- Widget labels ---- */
-    .stSelectbox label, .stNumberInput label,
-    .stTextInput label, .stRadio label,
-    [data-testid="stWidgetLabel"] {{
-        color: {TEXT_SECONDARY} !important;
-        font-weight: 500 !important;
-        font-size: 0.82rem !important;
-        margin-bottom: 0.15rem !important;
-    }}
-
-    /* ---- Tabs ---- */
-    .stTabs [data-baseweb="tab-list"] {{
-        background-color: {BG_PAGE} !important;
-        gap: 0.25rem !important;
-        border-bottom: 2px solid {BORDER_COLOR} !important;
-    }}
-    .stTabs [data-baseweb="tab"] {{
-        color: {TAB_COLOR} !important;
-        background-color: transparent !important;
-        border-radius: 6px 6px 0 0 !important;
-        padding: 0.55rem 1.2rem !important;
-        font-weight: 500 !important;
-        font-size: 0.85rem !important;
-    }}
-    .stTabs [aria-selected="true"] {{
-        color: {TAB_ACTIVE_COLOR} !important;
-        background-color: {TAB_ACTIVE_BG} !important;
-        border-bottom: 2px solid {TAB_ACTIVE_BORDER} !important;
-    }}
-    .stTabs [data-baseweb="tab-panel"] {{
-        background-color: {BG_SECONDARY} !important;
-        padding: 1.2rem !important;
-        border-radius: 0 0 8px 8px !important;
-        border: 1px solid {BORDER_COLOR} !important;
-        border-top: none !important;
-    }}
-
-    /* ---- Metric widget ---- */
-    [data-testid="stMetric"] {{
-        background-color: {METRIC_BG} !important;
-        padding: 0.9rem 1rem !important;
-        border-radius: 8px !important;
-        border: 1px solid {BORDER_COLOR} !important;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.04) !important;
-    }}
-    [data-testid="stMetricLabel"] {{
-        color: {TEXT_SECONDARY} !important;
-        font-size: 0.78rem !important;
-    }}
-    [data-testid="stMetricValue"] {{
-        color: {METRIC_VAL} !important;
-        font-weight: 700 !important;
-        font-size: 1.5rem !important;
-    }}
-
-    /* ---- Alert boxes ---- */
-    [data-testid="stAlert"] {{ border-radius: 6px !important; }}
-    div[data-testid="stAlert"][kind="info"] {{
-        background-color: {INFO_BG} !important;
-        border-left: 4px solid {INFO_BORDER} !important;
-    }}
-    div[data-testid="stAlert"][kind="warning"] {{
-        background-color: {WARN_BG} !important;
-        border-left: 4px solid {WARN_BORDER} !important;
-    }}
-
-    /* ---- Default Streamlit buttons (fallback) ---- */
-    .stButton > button {{
-        background-color: {BTN_BG} !important;
-        color: #ffffff !important;
-        font-weight: 500 !important;
-        border-radius: 6px !important;
-        border: none !important;
-        padding: 0.45rem 1.2rem !important;
-        font-size: 0.85rem !important;
-        transition: background 0.2s !important;
-        box-shadow: none !important;
-    }}
-    .stButton > button:hover {{
-        background-color: {BTN_HOVER} !important;
-        transform: none !important;
-        box-shadow: none !important;
-    }}
-
-    /* ---- Theme toggle button - HIGH CONTRAST FOR BOTH MODES ---- */
-    .cv-theme-btn .stButton > button {{
-        background-color: {THEME_BTN_BG} !important;
-        color: {THEME_BTN_COLOR} !important;
-        border: 2px solid {THEME_BTN_BORDER} !important;
-        border-radius: 7px !important;
-        font-size: 0.85rem !important;
-        font-weight: 700 !important;
-        padding: 0.55rem 1.4rem !important;
-        width: 100% !important;
-        box-shadow: 0 2px 6px rgba(0,0,0,0.15) !important;
-        transition: all 0.2s !important;
-    }}
-    .cv-theme-btn .stButton > button:hover {{
-        background-color: {THEME_BTN_HOVER_BG} !important;
-        border-color: {THEME_BTN_HOVER_BG} !important;
-        transform: translateY(-1px) !important;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.25) !important;
-    }}
-
-    /* ---- Markdown ---- */
-    .stMarkdown, .stMarkdown p, .stMarkdown span,
-    [data-testid="stMarkdownContainer"],
-    [data-testid="stMarkdownContainer"] p,
-    [data-testid="stMarkdownContainer"] li {{
-        color: {TEXT_PRIMARY} !important;
-    }}
-
-    /* ---- Caption ---- */
-    .stCaption, [data-testid="stCaptionContainer"] {{
-        color: {CAPTION_COLOR} !important;
-        font-size: 0.78rem !important;
-    }}
-
-    /* ---- HR ---- */
-    hr {{
-        border: none !important;
-        border-top: 1px solid {DIVIDER} !important;
-        margin: 1rem 0 !important;
-    }}
-
-    /* ---- Risk cards ---- */
-    .risk-card {{
-        border-radius: 10px;
-        padding: 1.2rem 1.4rem;
-        margin: 0;
-        border: 1px solid {BORDER_COLOR};
-        transition: transform 0.15s, box-shadow 0.15s;
-    }}
-    .risk-card:hover {{
-        transform: translateY(-1px);
-        box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-    }}
-    .risk-card h3, .risk-card h1, .risk-card p {{ color: {TEXT_PRIMARY} !important; }}
-    .risk-low       {{ background: {RISK_LOW_BG};  border-left: 4px solid {RISK_LOW_BORDER}; }}
-    .risk-moderate  {{ background: {RISK_MOD_BG};  border-left: 4px solid {RISK_MOD_BORDER}; }}
-    .risk-high      {{ background: {RISK_HIGH_BG}; border-left: 4px solid {RISK_HIGH_BORDER}; }}
-    .risk-veryhigh  {{ background: {RISK_VH_BG};   border-left: 4px solid {RISK_VH_BORDER}; }}
-    .risk-unavailable {{ background: {RISK_NA_BG}; border-left: 4px solid {RISK_NA_BORDER}; }}
-
-    /* ---- Contributing factors ---- */
-    .contributing-factors {{
-        background-color: {CF_BG};
-        border-radius: 6px;
-        padding: 0.75rem 0.9rem;
-        margin-top: 0.8rem;
-        font-size: 0.82rem;
-        border: 1px solid {CF_BORDER};
-    }}
-    .factor-title {{
-        font-weight: 600;
-        color: {CF_TITLE} !important;
-        margin-bottom: 0.4rem;
-        font-size: 0.75rem;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }}
-    .factor-item {{
-        color: {CF_ITEM} !important;
-        padding: 0.2rem 0 0.2rem 1rem;
-        position: relative;
-        line-height: 1.45;
-    }}
-    .factor-item:before {{
-        content: "▪";
-        position: absolute;
-        left: 0;
-        color: {CF_BULLET};
-    }}
-
-    /* ---- Premium links ---- */
-    .premium-link-container {{
-        display: flex; gap: 0.75rem; margin: 0.5rem 0 1rem 0; flex-wrap: wrap;
-    }}
-    .premium-link {{
-        flex: 1; min-width: 180px;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white !important;
-        padding: 0.9rem 1rem;
-        border-radius: 10px;
-        text-decoration: none;
-        display: flex; flex-direction: column;
-        align-items: center; justify-content: center;
-        transition: transform 0.2s, box-shadow 0.2s;
-        box-shadow: 0 3px 10px rgba(102,126,234,0.35);
-        text-align: center;
-    }}
-    .premium-link:hover {{ transform: translateY(-2px); box-shadow: 0 6px 18px rgba(102,126,234,0.5); }}
-    .premium-link-title  {{ font-size: 0.95rem; font-weight: 600; margin-bottom: 0.15rem; color: white !important; }}
-    .premium-link-subtitle {{ font-size: 0.75rem; opacity: 0.9; color: white !important; }}
-    .premium-link.qrisk {{ background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); box-shadow: 0 3px 10px rgba(240,147,251,0.35); }}
-    .premium-link.qrisk:hover {{ box-shadow: 0 6px 18px rgba(240,147,251,0.5); }}
-    .premium-link.lai   {{ background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); box-shadow: 0 3px 10px rgba(79,172,254,0.35); }}
-    .premium-link.lai:hover {{ box-shadow: 0 6px 18px rgba(79,172,254,0.5); }}
-
-    /* ---- Section divider ---- */
-    .section-divider {{
-        border: none; height: 1px;
-        background: {DIVIDER};
-        margin: 1.2rem 0;
-    }}
-
-    /* ---- Thin section separator label ---- */
-    .section-sep {{
-        display: flex; align-items: center; gap: 0.6rem;
-        margin: 1.4rem 0 0.6rem 0;
-    }}
-    .section-sep-label {{
-        font-size: 0.72rem; font-weight: 700; letter-spacing: 0.07em;
-        text-transform: uppercase; color: {SECTION_LABEL_COLOR} !important;
-        white-space: nowrap;
-    }}
-    .section-sep-line {{
-        flex: 1; height: 1px; background: {BORDER_COLOR};
-    }}
-
-    /* ---- Reference link pills - IMPROVED CONTRAST ---- */
-    .cv-ref-pill {{
-        display: inline-flex;
-        align-items: center;
-        gap: 0.3rem;
-        border-radius: 7px;
-        font-size: 0.8rem;
-        font-weight: 600;
-        padding: 0.45rem 1rem;
-        white-space: nowrap;
-        text-decoration: none !important;
-        background: {TOOLBAR_BTN_BG};
-        color: {TOOLBAR_BTN_COLOR} !important;
-        border: 1.5px solid {TOOLBAR_BTN_BORDER};
-        transition: all 0.15s;
-        margin-right: 0.4rem;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-    }}
-    .cv-ref-pill:hover {{
-        border-color: {ACCENT};
-        color: {ACCENT} !important;
-        background: {BG_SECONDARY};
-        box-shadow: 0 2px 6px rgba(0,0,0,0.15);
-    }}
-
-    /* ---- Disabled checkbox ---- */
-    .stCheckbox input:disabled + span {{ color: {TEXT_MUTED} !important; opacity: 0.6 !important; }}
-
-    /* ---- Spinner ---- */
-    .stSpinner > div > div {{ border-top-color: {ACCENT} !important; }}
-
-    /* ---- Scrollbars ---- */
-    ::-webkit-scrollbar {{ width: 6px; height: 6px; }}
-    ::-webkit-scrollbar-track {{ background: {BG_PAGE}; }}
-    ::-webkit-scrollbar-thumb {{ background: {BORDER_COLOR}; border-radius: 3px; }}
-    ::-webkit-scrollbar-thumb:hover {{ background: {ACCENT}; }}
-
-    /* ---- Mobile responsiveness ---- */
-    @media screen and (max-width: 768px) {{
-        input, select, textarea {{ font-size: 16px !important; }}
-        
-        .block-container {{
-            padding-left: 1rem !important;
-            padding-right: 1rem !important;
-        }}
-        
-        .cv-ref-pill {{
-            font-size: 0.75rem;
-            padding: 0.4rem 0.8rem;
-        }}
-        
-        h2 {{
-            font-size: 0.9rem !important;
-        }}
-    }}
-
-    /* ---- Force input colors cross-platform ---- */
-    input, select, textarea, [contenteditable] {{
-        background-color: {BG_INPUT} !important;
-        color: {INPUT_COLOR} !important;
-    }}
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def themed_stylesheet(theme):
+    # Built once per theme per process. Re-sending the identical string on
+    # every rerun lets Streamlit's forward-message cache replace it with a
+    # hash reference for sessions that already have it.
+    return build_stylesheet(theme)
+
+
+st.markdown(themed_stylesheet(st.session_state.theme), unsafe_allow_html=True)
 
 
 # ========== HELPER FUNCTIONS ==========
 
-def opt_num(container, label, minv=0.0, maxv=9999.0, step=1.0, key=None, fmt="%.0f"):
+def opt_num(container, label, minv=0.0, maxv=9999.0, step=1.0, key=None, fmt="%.0f", on_change=None, args=None):
     minv = float(minv)
     maxv = float(maxv)
     step = float(step)
@@ -588,323 +71,171 @@ def opt_num(container, label, minv=0.0, maxv=9999.0, step=1.0, key=None, fmt="%.
         step=step,
         format=fmt,
         placeholder="—",
-        key=key
+        key=key,
+        on_change=on_change,
+        args=args
     )
     return val
 
 
-def bmi_calc(h, w):
-    if h is not None and w is not None and h > 0:
-        return round(w / ((h / 100) ** 2), 1)
-    return None
-
-
-def non_hdl(tc, hdl):
-    if tc is not None and hdl is not None:
-        return round(tc - hdl, 1)
-    return None
-
-
-def ratio(a, b):
-    if a is not None and b is not None and b > 0:
-        return round(a / b, 2)
-    return None
-
-
-def percent_category(p):
-    if p is None:
-        return None
-    if p < 5:
-        return "Low"
-    if p < 7.5:
-        return "Moderate"
-    if p < 20:
-        return "High"
-    return "Very High"
-
-
-def get_contributing_factors_aha(age, sex, tc, hdl, sbp, bp_treated, diabetes, smoking):
-    factors = []
-    if age and age >= 65:
-        factors.append("Advanced age (≥65 years)")
-    elif age and age >= 55:
-        factors.append("Age >55 years")
-    if smoking == "Current":
-        factors.append("Current smoking")
-    if diabetes == "Yes":
-        factors.append("Diabetes mellitus")
-    if tc and tc >= 240:
-        factors.append(f"High total cholesterol ({tc:.0f} mg/dL)")
-    if hdl and hdl < 40:
-        factors.append(f"Low HDL cholesterol ({hdl:.0f} mg/dL)")
-    if sbp and sbp >= 160:
-        factors.append(f"Severe hypertension (SBP {sbp:.0f} mmHg)")
-    elif sbp and sbp >= 140:
-        factors.append(f"Stage 2 hypertension (SBP {sbp:.0f} mmHg)")
-    elif sbp and sbp >= 130:
-        factors.append(f"Stage 1 hypertension (SBP {sbp:.0f} mmHg)")
-    return factors
-
-
-def get_contributing_factors_qrisk(age, sex, smoking, diabetes, bmi, sbp, tc_hdl_ratio, family_cvd, ckd, atrial_fib, rheumatoid_arthritis, ethnicity):
-    factors = []
-    if age and age >= 70:
-        factors.append("Advanced age (≥70 years)")
-    elif age and age >= 60:
-        factors.append("Age ≥60 years")
-    if smoking == "Current":
-        factors.append("Current smoking")
-    elif smoking == "Former":
-        factors.append("Former smoking")
-    if diabetes == "Yes":
-        factors.append("Diabetes mellitus")
-    if bmi and bmi >= 35:
-        factors.append(f"Severe obesity (BMI {bmi:.1f})")
-    elif bmi and bmi >= 30:
-        factors.append(f"Obesity (BMI {bmi:.1f})")
-    if sbp and sbp >= 160:
-        factors.append(f"Severe hypertension (SBP {sbp:.0f} mmHg)")
-    elif sbp and sbp >= 140:
-        factors.append(f"Hypertension (SBP {sbp:.0f} mmHg)")
-    if tc_hdl_ratio and tc_hdl_ratio >= 6:
-        factors.append(f"High TC/HDL ratio ({tc_hdl_ratio:.1f})")
-    elif tc_hdl_ratio and tc_hdl_ratio >= 5:
-        factors.append(f"Elevated TC/HDL ratio ({tc_hdl_ratio:.1f})")
-    if family_cvd:
-        factors.append("Premature family history of CVD")
-    if ckd:
-        factors.append("Chronic kidney disease")
-    if atrial_fib:
-        factors.append("Atrial fibrillation")
-    if rheumatoid_arthritis:
-        factors.append("Rheumatoid arthritis")
-    if ethnicity in ["Indian", "South Asian"]:
-        factors.append("South Asian ethnicity")
-    return factors
-
-
-def get_contributing_factors_lai(ascvd, ckd, diabetes, duration, smoke, mets, fh_fh, lpa, apob, prem_ascvd, fh_dm, fh_htn, ldl):
-    factors = []
-    if ascvd:
-        factors.append("Established ASCVD (MI/Stroke/PAD/Revascularization)")
-    if ckd:
-        factors.append("Chronic kidney disease (stage 3-5)")
-    if diabetes == "Yes":
-        if duration and duration >= 10:
-            factors.append(f"Long-standing diabetes ({int(duration)} years)")
+# Unit selector widget key -> (lab fields it applies to, units offered). The
+# widgets hold values in the selected unit; everything downstream is mg/dL.
+# The unit toggle is display-only: the exact mg/dL value behind a converted
+# widget value is kept in session state under "<field>_mg_dl", together with
+# the widget value and unit it was shown as, and used for as long as the
+# widget still shows that value. Switching back and forth therefore never
+# feeds a rounded value back into the scores.
+UNIT_SELECTORS = {
+    "lipid_unit": (("tc", "ldl", "hdl", "tg"), ("mg/dL", "mmol/L")),
+    "lpa_unit": (("lpa",), ("mg/dL", "nmol/L")),
+}
+LAB_UNIT_KEYS = {field: key for key, (fields, _) in UNIT_SELECTORS.items() for field in fields}
+
+
+def lab_unit(field):
+    """The unit the widget for lab `field` is entered in."""
+    key = LAB_UNIT_KEYS.get(field)
+    return (st.session_state.get(key) or "mg/dL") if key else "mg/dL"
+
+
+def lab_value(field, unit=None):
+    """The value of lab `field` in mg/dL; `unit` is the unit its widget value is in (default: the selected one)."""
+    ss = st.session_state
+    unit = unit or lab_unit(field)
+    shown = ss.get(field)
+    exact = ss.get(field + "_mg_dl")
+    if shown is not None and exact is not None and exact[1:] == (shown, unit):
+        return exact[0]
+    return to_mg_dl(field, shown, unit)
+
+
+def lab_display_value(field, mg_dl, unit):
+    """
+    A mg/dL value for the `field` widget in `unit`, within its range; display only.
+
+    Rounded to 2 decimals in units coarser than mg/dL (mmol/L, g/L) and to 1
+    decimal otherwise, so the widget's format shows it without further rounding.
+    """
+    factor = unit_factor(field, unit)
+    low, high = INPUT_LIMITS[field]
+    value = round(mg_dl / factor, 2 if factor > 1 else 1)
+    return min(max(value, low / factor), high / factor)
+
+
+def set_lab_value(field, mg_dl, unit):
+    """Show an exact mg/dL value in the `field` widget in `unit`, keeping the exact value for lab_value()."""
+    shown = lab_display_value(field, mg_dl, unit)
+    st.session_state[field] = shown
+    st.session_state[field + "_mg_dl"] = (mg_dl, shown, unit)
+
+
+def lab_input(container, label, field, section):
+    """opt_num for lab `field` in its selected unit, with the unit shown underneath."""
+    unit = lab_unit(field)
+    factor = unit_factor(field, unit)
+    low, high = INPUT_LIMITS[field]
+    precise = factor > 1  # mmol/L values need decimals
+    value = opt_num(container, label, minv=low / factor, maxv=high / factor, step=0.01 if precise else 1,
+                    key=field, fmt="%.2f" if precise else "%.0f", on_change=rerun_section, args=(section,))
+    container.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">' + unit + '</span>', unsafe_allow_html=True)
+    return value
+
+
+def change_lab_unit(key, section):
+    """on_change for a unit selector: show the values already entered in the new unit (inputs unchanged)."""
+    ss = st.session_state
+    fields, _ = UNIT_SELECTORS[key]
+    previous = ss.get(key + "_prev", "mg/dL")
+    for field in fields:
+        if ss.get(field) is not None:
+            set_lab_value(field, lab_value(field, previous), ss[key])
+    ss[key + "_prev"] = ss[key]
+    rerun_section(section)
+
+
+def current_inputs():
+    """Clinical inputs for the risk scores, read from the widgets' session state."""
+    ss = st.session_state
+    return clinical_inputs(
+        age=ss.get("age"), height=ss.get("ht"), weight=ss.get("wt"), sbp=ss.get("sbp"),
+        tc=lab_value("tc"), ldl=lab_value("ldl"), hdl=lab_value("hdl"), apob=ss.get("apob"), lpa=lab_value("lpa"),
+        dm_duration=ss.get("dm_dur") if ss.get("diabetes") == "Yes" else None,
+        sex=ss.get("sex", "Male"), ethnicity=ss.get("eth", "Indian"),
+        smoking=ss.get("smoke", "Never"), diabetes=ss.get("diabetes", "No"),
+        antihtn=ss.get("antihtn"), mi=ss.get("mi"), stroke=ss.get("stroke"), pad=ss.get("pad"),
+        revasc=ss.get("revasc"), ckd=ss.get("ckd"), mets=ss.get("mets"), atrial_fib=ss.get("afib"),
+        rheumatoid_arthritis=ss.get("ra"), migraine=ss.get("migraine"),
+        prem_ascvd=ss.get("prem_ascvd"), fh_dm=ss.get("fh_dm"), fh_htn=ss.get("fh_htn"), fh_fh=ss.get("fh_fh"),
+    )
+
+
+def update_assessment_graph():
+    """Bring this session's AssessmentGraph up to date with the widgets; returns the nodes that changed."""
+    if "assessment_graph" not in st.session_state:
+        st.session_state.assessment_graph = AssessmentGraph()
+    return st.session_state.assessment_graph.update(current_inputs(), apoa1=st.session_state.get("apoa1"))
+
+
+def assessment_graph():
+    """This session's up-to-date AssessmentGraph (an update with unchanged widgets is a no-op)."""
+    update_assessment_graph()
+    return st.session_state.assessment_graph
+
+
+# ========== PARTIAL RERUNS ==========
+# Each input section and the results panel is a keyed fragment. A widget
+# change reruns only its own section (the fragment default), plus the results
+# panel when the change alters a value it shows; the rest of the page is left
+# as sent. AppTest only keeps the elements of the latest run, so under the
+# test harness interactions stay full-app reruns.
+PARTIAL_RERUNS = not st_config.get_option("global.appTest")
+
+# Graph nodes shown by the results panel (derived values are shown by their input section).
+RESULTS_NODES = frozenset(node.name for node in NODES if node.kind != "derived")
+
+
+def rerun_section(section):
+    """on_change callback for every input widget of `section`."""
+    if PARTIAL_RERUNS and RESULTS_NODES.intersection(update_assessment_graph()):
+        st.rerun([section, "results"])
+
+
+def load_lab_report():
+    """on_change for the lab-report uploader: pre-fill the lipid fields from the PDF."""
+    upload = st.session_state.get("lab_pdf")
+    st.session_state.lab_report = None
+    st.session_state.lab_report_error = None
+    if upload is not None:
+        try:
+            report = read_lab_report(upload.getvalue())
+        except ValueError as exc:
+            st.session_state.lab_report_error = str(exc)
         else:
-            factors.append("Diabetes mellitus")
-    if smoke == "Current":
-        factors.append("Current smoking")
-    if mets:
-        factors.append("Metabolic syndrome")
-    if fh_fh:
-        factors.append("Familial hypercholesterolemia")
-    if lpa and lpa >= 50:
-        factors.append(f"Elevated Lp(a) ({lpa:.0f} mg/dL)")
-    if apob and apob >= 130:
-        factors.append(f"Elevated ApoB ({apob:.0f} mg/dL)")
-    if ldl and ldl >= 190:
-        factors.append(f"Severe hypercholesterolemia (LDL {ldl:.0f} mg/dL)")
-    elif ldl and ldl >= 160:
-        factors.append(f"High LDL cholesterol ({ldl:.0f} mg/dL)")
-    if prem_ascvd:
-        factors.append("Premature ASCVD in first-degree relatives")
-    if fh_dm:
-        factors.append("Family history of diabetes")
-    if fh_htn:
-        factors.append("Family history of hypertension")
-    return factors
-
-
-def get_aha_recommendations(aha_cat, aha_risk):
-    if aha_cat == "Low":
-        return {"statin": "Not recommended", "ldl_target": "<100 mg/dL (optional)", "non_hdl_target": "<130 mg/dL (optional)", "lifestyle": "Heart-healthy lifestyle, regular exercise, healthy diet", "monitoring": "Reassess in 4-6 years"}
-    elif aha_cat == "Moderate":
-        return {"statin": "Consider moderate-intensity statin", "ldl_target": "<100 mg/dL (preferred <70 mg/dL)", "non_hdl_target": "<130 mg/dL (preferred <100 mg/dL)", "lifestyle": "Aggressive lifestyle modification essential", "monitoring": "Reassess lipids in 3 months, then annually"}
-    elif aha_cat == "High":
-        return {"statin": "Moderate to high-intensity statin recommended", "ldl_target": "<70 mg/dL", "non_hdl_target": "<100 mg/dL", "lifestyle": "Intensive lifestyle intervention required", "monitoring": "Lipid panel at 4-12 weeks, optimize therapy"}
-    else:
-        return {"statin": "High-intensity statin ± ezetimibe recommended", "ldl_target": "<50 mg/dL", "non_hdl_target": "<80 mg/dL", "lifestyle": "Comprehensive risk factor management essential", "monitoring": "Frequent monitoring, consider PCSK9i if targets not met"}
-
-
-def get_qrisk_recommendations(qrisk_cat, qrisk_value):
-    if qrisk_cat == "Low":
-        return {"statin": "Not indicated", "ldl_target": "<100 mg/dL", "non_hdl_target": "<130 mg/dL", "lifestyle": "Maintain healthy lifestyle, regular physical activity", "monitoring": "Reassess cardiovascular risk every 5 years"}
-    elif qrisk_cat == "Moderate":
-        return {"statin": "Discuss benefits and risks with patient", "ldl_target": "<100 mg/dL (consider <70 mg/dL)", "non_hdl_target": "<130 mg/dL (consider <100 mg/dL)", "lifestyle": "Optimize lifestyle factors first, then consider pharmacotherapy", "monitoring": "Annual risk assessment and lipid monitoring"}
-    elif qrisk_cat == "High":
-        return {"statin": "Atorvastatin 20mg or equivalent recommended", "ldl_target": "<70 mg/dL", "non_hdl_target": "<100 mg/dL", "lifestyle": "Intensive lifestyle modification alongside statin therapy", "monitoring": "Lipids at 3 months, then 6-12 monthly"}
-    else:
-        return {"statin": "Atorvastatin 80mg or rosuvastatin 20-40mg recommended", "ldl_target": "<50 mg/dL", "non_hdl_target": "<80 mg/dL", "lifestyle": "Multifactorial risk reduction strategy required", "monitoring": "Close monitoring, escalate therapy as needed"}
-
-
-def get_lai_recommendations(lai_cat):
-    if lai_cat == "Low":
-        return {"statin": "Not recommended - lifestyle only", "ldl_target": "<100 mg/dL", "non_hdl_target": "<130 mg/dL", "apob_target": "<90 mg/dL", "lifestyle": "Heart-healthy Indian diet, regular exercise, avoid tobacco", "monitoring": "Reassess every 3-5 years"}
-    elif lai_cat == "Moderate":
-        return {"statin": "Moderate-intensity statin (consider for South Asians)", "ldl_target": "<100 mg/dL (optional <70 mg/dL)", "non_hdl_target": "<130 mg/dL (optional <100 mg/dL)", "apob_target": "<90 mg/dL", "lifestyle": "Aggressive lifestyle measures, weight management", "monitoring": "Annual lipid profile and cardiovascular risk assessment"}
-    elif lai_cat == "High":
-        return {"statin": "High-intensity statin therapy recommended", "ldl_target": "<70 mg/dL", "non_hdl_target": "<100 mg/dL", "apob_target": "<80 mg/dL", "lifestyle": "Comprehensive lifestyle intervention, manage all risk factors", "monitoring": "Lipids at 4 weeks, then every 3 months until stable"}
-    else:
-        return {"statin": "High-intensity statin + ezetimibe, consider PCSK9i", "ldl_target": "<50 mg/dL", "non_hdl_target": "<80 mg/dL", "apob_target": "<65 mg/dL", "lifestyle": "Intensive multi-factorial risk reduction essential", "monitoring": "Frequent monitoring, aggressive target achievement required"}
-
-
-def generate_fallback_summary(aha_cat, qrisk_cat, lai_cat):
-    levels = {"Low": 0, "Moderate": 1, "High": 2, "Very High": 3}
-    scores = []
-    if aha_cat:
-        scores.append((levels.get(aha_cat, 0), aha_cat, "AHA PREVENT"))
-    if qrisk_cat:
-        scores.append((levels.get(qrisk_cat, 0), qrisk_cat, "QRISK3"))
-    if lai_cat:
-        scores.append((levels.get(lai_cat, 0), lai_cat, "LAI"))
-    if not scores:
-        return "Insufficient data for comprehensive risk assessment."
-    max_risk = max(scores, key=lambda x: x[0])
-    summary = f"""**Overall Risk Level:** {max_risk[1]} (driven primarily by {max_risk[2]})\n\n"""
-    if max_risk[1] in ["High", "Very High"]:
-        summary += """**Statin Therapy:** RECOMMENDED
-- High-intensity statin (Atorvastatin 40-80mg or Rosuvastatin 20-40mg)
-- Add ezetimibe 10mg if LDL-C targets not achieved
-- Consider PCSK9 inhibitor for Very High risk if targets remain unmet
-
-**Lipid Targets:**
-- LDL-C: <70 mg/dL (Very High: <50 mg/dL)
-- Non-HDL-C: <100 mg/dL (Very High: <80 mg/dL)
-- ApoB: <80 mg/dL (Very High: <65 mg/dL)
-
-**Lifestyle:** Heart-healthy diet · Physical activity ≥150 min/week · Weight management · Smoking cessation
-
-**Monitoring:** Lipid panel at 4-6 weeks → every 3 months until targets achieved → 6-monthly
-"""
-    elif max_risk[1] == "Moderate":
-        summary += """**Statin Therapy:** CONSIDER (shared decision-making)
-- Moderate-intensity statin (Atorvastatin 10-20mg or Rosuvastatin 5-10mg)
-- Especially recommended for South Asian ethnicity
-
-**Lipid Targets:**
-- LDL-C: <100 mg/dL (consider <70 mg/dL)
-- Non-HDL-C: <130 mg/dL (consider <100 mg/dL)
-
-**Lifestyle:** Aggressive lifestyle modification as first-line · Weight reduction if BMI ≥25
-
-**Monitoring:** Reassess in 3-6 months · Annual lipid profile and risk assessment
-"""
-    else:
-        summary += """**Statin Therapy:** NOT RECOMMENDED — continue lifestyle measures
-
-**Targets:** LDL-C <100 mg/dL · Non-HDL-C <130 mg/dL
-
-**Lifestyle:** Maintain healthy diet and regular physical activity
-
-**Monitoring:** Periodic reassessment every 3-5 years
-"""
-    return summary
-
-
-def calculate_qrisk3(age, sex, ethnicity, smoking, diabetes, height, weight, sbp, tc_hdl_ratio, antihtn, family_cvd, ckd, atrial_fib, rheumatoid_arthritis, migraine):
-    required = [age, sex, tc_hdl_ratio, sbp]
-    if None in required:
-        return None
-    if age < 25 or age > 84:
-        return None
-    bmi = bmi_calc(height, weight)
-    if bmi is None:
-        bmi = 25
-    eth_code = {"Indian": 9, "South Asian": 9, "White": 1, "Black": 3, "Other": 1}.get(ethnicity, 1)
-    smoke_code = {"Never": 0, "Former": 2, "Current": 4}.get(smoking, 0)
-    is_female = sex == "Female"
-    if is_female:
-        survivor = 0.988876
-        age_term = (age / 10) - 4.0
-        smoking_param = smoke_code * 0.13
-        diabetes_param = 0.86 if diabetes == "Yes" else 0
-        bmi_param = 0.56 if bmi >= 30 else (0.23 if bmi >= 25 else (0.12 if bmi >= 20 else 0.0))
-        sbp_param = (sbp - 120) * 0.013
-        tc_hdl_param = (tc_hdl_ratio - 4) * 0.15
-        family_param = 0.45 if family_cvd else 0
-        ckd_param = 0.60 if ckd else 0
-        afib_param = 0.50 if atrial_fib else 0
-        ra_param = 0.35 if rheumatoid_arthritis else 0
-        score = age_term * 0.8 + smoking_param + diabetes_param + bmi_param + sbp_param + tc_hdl_param + family_param + ckd_param + afib_param + ra_param + (0.35 if eth_code == 9 else 0)
-    else:
-        survivor = 0.977268
-        age_term = (age / 10) - 4.0
-        smoking_param = smoke_code * 0.18
-        diabetes_param = 0.59 if diabetes == "Yes" else 0
-        bmi_param = 0.48 if bmi >= 30 else (0.20 if bmi >= 25 else (0.10 if bmi >= 20 else 0.0))
-        sbp_param = (sbp - 120) * 0.012
-        tc_hdl_param = (tc_hdl_ratio - 4) * 0.17
-        family_param = 0.54 if family_cvd else 0
-        ckd_param = 0.65 if ckd else 0
-        afib_param = 0.58 if atrial_fib else 0
-        ra_param = 0.40 if rheumatoid_arthritis else 0
-        score = age_term * 0.9 + smoking_param + diabetes_param + bmi_param + sbp_param + tc_hdl_param + family_param + ckd_param + afib_param + ra_param + (0.40 if eth_code == 9 else 0)
-    risk_10yr = 100 * (1 - math.pow(survivor, math.exp(score)))
-    return round(min(max(risk_10yr, 0), 100), 1)
-
-
-def calculate_aha_prevent(age, sex, race, tc, hdl, sbp, bp_treated, diabetes, smoking):
-    required = [age, sex, tc, hdl, sbp]
-    if None in required:
-        return None
-    if age < 40 or age > 79:
-        return None
-    is_black = race in ["Black"]
-    is_female = sex == "Female"
-    ln_age = math.log(age)
-    ln_tc = math.log(tc)
-    ln_hdl = math.log(hdl)
-    ln_sbp_treated = math.log(sbp) if bp_treated else 0
-    ln_sbp_untreated = math.log(sbp) if not bp_treated else 0
-    smoker = 1 if smoking == "Current" else 0
-    dm = 1 if diabetes == "Yes" else 0
-    if is_black and is_female:
-        coef_ln_age = 17.114; coef_ln_tc = 0.940; coef_ln_hdl = -18.920; coef_ln_age_hdl = 4.475
-        coef_ln_treated_sbp = 29.291; coef_ln_age_treated_sbp = -6.432
-        coef_ln_untreated_sbp = 27.820; coef_ln_age_untreated_sbp = -6.087
-        coef_smoker = 0.691; coef_dm = 0.874; mean_sum = 86.61; baseline_survival = 0.9533
-        individual_sum = (coef_ln_age * ln_age + coef_ln_tc * ln_tc + coef_ln_hdl * ln_hdl +
-                          coef_ln_age_hdl * ln_age * ln_hdl + coef_ln_treated_sbp * ln_sbp_treated +
-                          coef_ln_age_treated_sbp * ln_age * ln_sbp_treated +
-                          coef_ln_untreated_sbp * ln_sbp_untreated +
-                          coef_ln_age_untreated_sbp * ln_age * ln_sbp_untreated +
-                          coef_smoker * smoker + coef_dm * dm)
-    elif not is_black and is_female:
-        coef_ln_age = -29.799; coef_ln_age_sq = 4.884; coef_ln_tc = 13.540; coef_ln_age_tc = -3.114
-        coef_ln_hdl = -13.578; coef_ln_age_hdl = 3.149
-        coef_ln_treated_sbp = 2.019; coef_ln_untreated_sbp = 1.957
-        coef_smoker = 7.574; coef_ln_age_smoker = -1.665; coef_dm = 0.661
-        mean_sum = -29.18; baseline_survival = 0.9665
-        individual_sum = (coef_ln_age * ln_age + coef_ln_age_sq * ln_age * ln_age +
-                          coef_ln_tc * ln_tc + coef_ln_age_tc * ln_age * ln_tc +
-                          coef_ln_hdl * ln_hdl + coef_ln_age_hdl * ln_age * ln_hdl +
-                          coef_ln_treated_sbp * ln_sbp_treated + coef_ln_untreated_sbp * ln_sbp_untreated +
-                          coef_smoker * smoker + coef_ln_age_smoker * ln_age * smoker + coef_dm * dm)
-    elif is_black and not is_female:
-        coef_ln_age = 2.469; coef_ln_tc = 0.302; coef_ln_hdl = -0.307
-        coef_ln_treated_sbp = 1.916; coef_ln_untreated_sbp = 1.809
-        coef_smoker = 0.549; coef_dm = 0.645; mean_sum = 19.54; baseline_survival = 0.8954
-        individual_sum = (coef_ln_age * ln_age + coef_ln_tc * ln_tc + coef_ln_hdl * ln_hdl +
-                          coef_ln_treated_sbp * ln_sbp_treated + coef_ln_untreated_sbp * ln_sbp_untreated +
-                          coef_smoker * smoker + coef_dm * dm)
-    else:
-        coef_ln_age = 12.344; coef_ln_tc = 11.853; coef_ln_age_tc = -2.664
-        coef_ln_hdl = -7.990; coef_ln_age_hdl = 1.769
-        coef_ln_treated_sbp = 1.797; coef_ln_untreated_sbp = 1.764
-        coef_smoker = 7.837; coef_ln_age_smoker = -1.795; coef_dm = 0.658
-        mean_sum = 61.18; baseline_survival = 0.9144
-        individual_sum = (coef_ln_age * ln_age + coef_ln_tc * ln_tc +
-                          coef_ln_age_tc * ln_age * ln_tc + coef_ln_hdl * ln_hdl +
-                          coef_ln_age_hdl * ln_age * ln_hdl +
-                          coef_ln_treated_sbp * ln_sbp_treated + coef_ln_untreated_sbp * ln_sbp_untreated +
-                          coef_smoker * smoker + coef_ln_age_smoker * ln_age * smoker + coef_dm * dm)
-    risk_10yr = (1 - math.pow(baseline_survival, math.exp(individual_sum - mean_sum))) * 100
-    return round(min(risk_10yr, 100), 1)
+            st.session_state.lab_report = report
+            # The lipid widgets use the analyte names as their keys and show the selected unit.
+            for field, value in mg_dl_values(report)[0].items():
+                set_lab_value(field, value, lab_unit(field))
+    if PARTIAL_RERUNS:
+        st.rerun(["lab_report", "lipids", "advanced_lipids", "results"])
+
+
+def section_fragment(key):
+    """Keyed st.fragment for one page section; fragment-only reruns are profiled on their own."""
+    def decorate(body):
+        @st.fragment(key=key)
+        def run():
+            if not app_run_complete:
+                body()
+                return
+            profiler.begin(key)
+            body()
+            profiler.finish()
+        return run
+    return decorate
 
 
 # ==================== HEADER ====================
+profiler.mark("Header")
 THEME_LABEL = "Light Mode" if is_dark else "Dark Mode"
 
 # Top spacer to prevent title clip - INCREASED
@@ -971,371 +302,513 @@ st.markdown('<div class="section-divider" style="margin-top:0.8rem;margin-bottom
 
 # ==================== SECTION SEPARATOR ====================
 def sep(label):
+    profiler.mark(label)
     st.markdown(f'<div class="section-sep"><span class="section-sep-label">{label}</span><div class="section-sep-line"></div></div>', unsafe_allow_html=True)
 
 
 # ==================== DEMOGRAPHICS ====================
-sep("Patient Demographics")
+@section_fragment("demographics")
+def demographics_section():
+    sep("Patient Demographics")
+
+    d1, d2, d3, d4 = st.columns([1, 1, 1, 1])
+    with d1:
+        age_val = opt_num(d1, "Age", *INPUT_LIMITS["age"], step=1, key="age", on_change=rerun_section, args=("demographics",))
+        st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">years</span>', unsafe_allow_html=True)
+
+    with d2:
+        sex = d2.selectbox("Sex", CATEGORY_CHOICES["sex"], key="sex", on_change=rerun_section, args=("demographics",))
 
-d1, d2, d3, d4 = st.columns([1, 1, 1, 1])
-with d1:
-    age_val = opt_num(d1, "Age", minv=1, maxv=110, step=1, key="age")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">years</span>', unsafe_allow_html=True)
+    with d3:
+        eth = d3.selectbox("Ethnicity", CATEGORY_CHOICES["ethnicity"], key="eth", on_change=rerun_section, args=("demographics",))
 
-with d2:
-    sex = d2.selectbox("Sex", ["Male", "Female"], key="sex")
+    d5, d6, d7 = st.columns([1, 1, 1])
+    with d5:
+        height_val = opt_num(d5, "Height", *INPUT_LIMITS["height"], step=1, key="ht", on_change=rerun_section, args=("demographics",))
+        st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">cm</span>', unsafe_allow_html=True)
 
-with d3:
-    eth = d3.selectbox("Ethnicity", ["Indian", "South Asian", "White", "Black", "Other"], key="eth")
+    with d6:
+        weight_val = opt_num(d6, "Weight", *INPUT_LIMITS["weight"], step=1, key="wt", on_change=rerun_section, args=("demographics",))
+        st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">kg</span>', unsafe_allow_html=True)
 
-d5, d6, d7 = st.columns([1, 1, 1])
-with d5:
-    height_val = opt_num(d5, "Height", minv=100, maxv=220, step=1, key="ht")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">cm</span>', unsafe_allow_html=True)
+    with d7:
+        bmi = assessment_graph()["bmi"]
+        d7.metric("BMI", f"{bmi:.1f} kg/m²" if bmi is not None else "—")
 
-with d6:
-    weight_val = opt_num(d6, "Weight", minv=20, maxv=300, step=1, key="wt")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">kg</span>', unsafe_allow_html=True)
 
-with d7:
-    bmi = bmi_calc(height_val, weight_val)
-    d7.metric("BMI", f"{bmi:.1f} kg/m²" if bmi is not None else "—")
+demographics_section()
 
 
 # ==================== VITALS ====================
-sep("Vital Signs")
+@section_fragment("vitals")
+def vitals_section():
+    sep("Vital Signs")
+
+    v1, v2 = st.columns(2)
+    with v1:
+        sbp = opt_num(v1, "Systolic BP", *INPUT_LIMITS["sbp"], step=1, key="sbp", on_change=rerun_section, args=("vitals",))
+        st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mmHg</span>', unsafe_allow_html=True)
+
+    with v2:
+        dbp = opt_num(v2, "Diastolic BP", *INPUT_LIMITS["dbp"], step=1, key="dbp", on_change=rerun_section, args=("vitals",))
+        st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mmHg</span>', unsafe_allow_html=True)
+
+
+vitals_section()
+
+
+# ==================== LAB REPORT UPLOAD ====================
+@section_fragment("lab_report")
+def lab_report_section():
+    sep("Lab Report")
+    st.file_uploader("Upload a lab report (PDF) to fill in the lipid values", type="pdf", key="lab_pdf", on_change=load_lab_report)
+
+    report = st.session_state.get("lab_report")
+    if st.session_state.get("lab_report_error"):
+        st.warning(f"Could not read this file: {st.session_state.lab_report_error}")
+    elif report is not None:
+        values, skipped = mg_dl_values(report)
+        if values:
+            def filled_label(field):
+                label = f"{LAB_LABELS[field]} {values[field]:g}"
+                if field in report.other_units:
+                    number, unit = report.other_units[field]
+                    label += f" (from {number:g} {UNIT_LABELS.get(normalize_unit(unit), unit)})"
+                return label
+
+            filled = " · ".join(filled_label(f) for f in LAB_FIELDS if f in values)
+            st.caption(f"Filled from the report, in mg/dL: {filled} ({report.pages_read} of {report.pages} pages read)")
+        else:
+            st.warning("No lipid values found in this report.")
+        if skipped:
+            skipped = " · ".join(f"{LAB_LABELS[field]} {value:g} {unit}" for field, (value, unit) in skipped.items())
+            st.warning(f"Not filled, reported in units that could not be converted (enter by hand): {skipped}")
 
-v1, v2 = st.columns(2)
-with v1:
-    sbp = opt_num(v1, "Systolic BP", minv=60, maxv=260, step=1, key="sbp")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mmHg</span>', unsafe_allow_html=True)
 
-with v2:
-    dbp = opt_num(v2, "Diastolic BP", minv=30, maxv=160, step=1, key="dbp")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mmHg</span>', unsafe_allow_html=True)
+lab_report_section()
 
 
 # ==================== LIPID PROFILE ====================
-sep("Lipid Profile")
+@section_fragment("lipids")
+def lipid_section():
+    sep("Lipid Profile")
+    st.radio("Lipid units", UNIT_SELECTORS["lipid_unit"][1], key="lipid_unit", horizontal=True,
+             on_change=change_lab_unit, args=("lipid_unit", "lipids"))
 
-lp1, lp2, lp3, lp4 = st.columns(4)
-with lp1:
-    tc = opt_num(lp1, "Total Cholesterol", minv=0, maxv=600, step=1, key="tc")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mg/dL</span>', unsafe_allow_html=True)
+    lp1, lp2, lp3, lp4 = st.columns(4)
+    with lp1:
+        tc = lab_input(lp1, "Total Cholesterol", "tc", "lipids")
 
-with lp2:
-    ldl = opt_num(lp2, "LDL-C", minv=0, maxv=400, step=1, key="ldl")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mg/dL</span>', unsafe_allow_html=True)
+    with lp2:
+        ldl = lab_input(lp2, "LDL-C", "ldl", "lipids")
 
-with lp3:
-    hdl = opt_num(lp3, "HDL-C", minv=0, maxv=150, step=1, key="hdl")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mg/dL</span>', unsafe_allow_html=True)
+    with lp3:
+        hdl = lab_input(lp3, "HDL-C", "hdl", "lipids")
 
-with lp4:
-    tg = opt_num(lp4, "Triglycerides", minv=0, maxv=1500, step=1, key="tg")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mg/dL</span>', unsafe_allow_html=True)
+    with lp4:
+        tg = lab_input(lp4, "Triglycerides", "tg", "lipids")
 
-nhdl = non_hdl(tc, hdl)
-tc_hdl_ratio = ratio(tc, hdl)
+    graph = assessment_graph()
+    nhdl = graph["non_hdl"]
+    tc_hdl_ratio = graph["tc_hdl_ratio"]
 
-lm1, lm2, lm3 = st.columns(3)
-lm1.metric("Non-HDL-C", f"{nhdl:.0f} mg/dL" if nhdl is not None else "—")
-lm2.metric("TC / HDL Ratio", f"{tc_hdl_ratio:.2f}" if tc_hdl_ratio is not None else "—")
+    lm1, lm2, lm3 = st.columns(3)
+    unit = lab_unit("tc")
+    factor = unit_factor("tc", unit)
+    lm1.metric("Non-HDL-C", f"{nhdl / factor:.{2 if factor > 1 else 0}f} {unit}" if nhdl is not None else "—")
+    lm2.metric("TC / HDL Ratio", f"{tc_hdl_ratio:.2f}" if tc_hdl_ratio is not None else "—")
 
-sep("Advanced Lipid Markers")
-al1, al2, al3 = st.columns(3)
-with al1:
-    apob = opt_num(al1, "ApoB", minv=0, maxv=300, step=1, key="apob")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mg/dL</span>', unsafe_allow_html=True)
 
-with al2:
-    apoa1 = opt_num(al2, "ApoA1", minv=0, maxv=300, step=1, key="apoa1")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mg/dL</span>', unsafe_allow_html=True)
+lipid_section()
 
-with al3:
-    lpa = opt_num(al3, "Lp(a)", minv=0, maxv=500, step=1, key="lpa")
-    st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mg/dL</span>', unsafe_allow_html=True)
 
-apo_ratio = ratio(apob, apoa1)
-am1, am2 = st.columns([1, 3])
-am1.metric("ApoB / ApoA1", f"{apo_ratio:.2f}" if apo_ratio is not None else "—")
+# ==================== ADVANCED LIPID MARKERS ====================
+@section_fragment("advanced_lipids")
+def advanced_lipid_section():
+    sep("Advanced Lipid Markers")
+    al1, al2, al3 = st.columns(3)
+    with al1:
+        apob = opt_num(al1, "ApoB", *INPUT_LIMITS["apob"], step=1, key="apob", on_change=rerun_section, args=("advanced_lipids",))
+        st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mg/dL</span>', unsafe_allow_html=True)
 
+    with al2:
+        apoa1 = opt_num(al2, "ApoA1", *INPUT_LIMITS["apoa1"], step=1, key="apoa1", on_change=rerun_section, args=("advanced_lipids",))
+        st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">mg/dL</span>', unsafe_allow_html=True)
 
-# ==================== DIABETES & SMOKING ====================
-sep("Metabolic & Lifestyle")
-
-ms1, ms2, ms3 = st.columns([1, 1, 1])
-with ms1:
-    diabetes = ms1.radio("Diabetes", ["No", "Yes"], key="diabetes", horizontal=True)
+    with al3:
+        lpa = lab_input(al3, "Lp(a)", "lpa", "advanced_lipids")
+        st.radio("Lp(a) units", UNIT_SELECTORS["lpa_unit"][1], key="lpa_unit", horizontal=True,
+                 on_change=change_lab_unit, args=("lpa_unit", "advanced_lipids"))
 
-with ms2:
-    smoke = ms2.selectbox("Smoking Status", ["Never", "Former", "Current"], key="smoke")
+    apo_ratio = assessment_graph()["apo_ratio"]
+    am1, am2 = st.columns([1, 3])
+    am1.metric("ApoB / ApoA1", f"{apo_ratio:.2f}" if apo_ratio is not None else "—")
 
-with ms3:
-    if diabetes == "Yes":
-        duration = opt_num(ms3, "DM Duration", minv=0, maxv=70, step=1, key="dm_dur")
-        st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">years</span>', unsafe_allow_html=True)
-        treatment = ms3.radio("Treatment", ["Oral", "Insulin"], key="dm_tx", horizontal=True)
-    else:
-        duration = None
-        treatment = None
 
+advanced_lipid_section()
 
-# ==================== MEDICAL HISTORY ====================
-sep("Medical History")
 
-# Initialize session state flags if not exist
-if 'none_hist' not in st.session_state:
-    st.session_state.none_hist = False
+# ==================== DIABETES & SMOKING ====================
+@section_fragment("metabolic")
+def metabolic_section():
+    sep("Metabolic & Lifestyle")
+
+    ms1, ms2, ms3 = st.columns([1, 1, 1])
+    with ms1:
+        diabetes = ms1.radio("Diabetes", CATEGORY_CHOICES["diabetes"], key="diabetes", on_change=rerun_section, args=("metabolic",), horizontal=True)
+
+    with ms2:
+        smoke = ms2.selectbox("Smoking Status", CATEGORY_CHOICES["smoking"], key="smoke", on_change=rerun_section, args=("metabolic",))
+
+    with ms3:
+        if diabetes == "Yes":
+            duration = opt_num(ms3, "DM Duration", *INPUT_LIMITS["dm_duration"], step=1, key="dm_dur", on_change=rerun_section, args=("metabolic",))
+            st.markdown('<span style="font-size:0.72rem;color:' + UNIT_COLOR + ';">years</span>', unsafe_allow_html=True)
+            treatment = ms3.radio("Treatment", ["Oral", "Insulin"], key="dm_tx", on_change=rerun_section, args=("metabolic",), horizontal=True)
+        else:
+            duration = None
+            treatment = None
 
-# Medical history checkboxes
-mh1, mh2, mh3 = st.columns(3)
 
-with mh1:
-    mi = st.checkbox("Myocardial Infarction", disabled=st.session_state.none_hist, key="mi")
-    stroke = st.checkbox("Stroke / TIA", disabled=st.session_state.none_hist, key="stroke")
-    pad = st.checkbox("Peripheral Artery Disease", disabled=st.session_state.none_hist, key="pad")
-    revasc = st.checkbox("Revascularization", disabled=st.session_state.none_hist, key="revasc")
+metabolic_section()
 
-with mh2:
-    ckd = st.checkbox("Chronic Kidney Disease", disabled=st.session_state.none_hist, key="ckd")
-    hf = st.checkbox("Heart Failure", disabled=st.session_state.none_hist, key="hf")
-    nafld = st.checkbox("NAFLD", disabled=st.session_state.none_hist, key="nafld")
-    mets = st.checkbox("Metabolic Syndrome", disabled=st.session_state.none_hist, key="mets")
 
-with mh3:
-    atrial_fib = st.checkbox("Atrial Fibrillation", disabled=st.session_state.none_hist, key="afib")
-    rheumatoid_arthritis = st.checkbox("Rheumatoid Arthritis", disabled=st.session_state.none_hist, key="ra")
-    migraine = st.checkbox("Migraine", disabled=st.session_state.none_hist, key="migraine")
+# ==================== MEDICAL HISTORY ====================
+@section_fragment("history")
+def medical_history_section():
+    sep("Medical History")
 
-# "None of the above" checkbox with proper handling
-none_hist_check = st.checkbox("None of the above", key="none_hist_check", value=st.session_state.none_hist)
-if none_hist_check != st.session_state.none_hist:
-    st.session_state.none_hist = none_hist_check
-    st.rerun()
+    none_hist = st.session_state.get("none_hist_check", False)
 
-ascvd = mi or stroke or pad or revasc
+    # Medical history checkboxes
+    mh1, mh2, mh3 = st.columns(3)
 
+    with mh1:
+        mi = st.checkbox("Myocardial Infarction", disabled=none_hist, key="mi", on_change=rerun_section, args=("history",))
+        stroke = st.checkbox("Stroke / TIA", disabled=none_hist, key="stroke", on_change=rerun_section, args=("history",))
+        pad = st.checkbox("Peripheral Artery Disease", disabled=none_hist, key="pad", on_change=rerun_section, args=("history",))
+        revasc = st.checkbox("Revascularization", disabled=none_hist, key="revasc", on_change=rerun_section, args=("history",))
 
-# ==================== FAMILY HISTORY ====================
-sep("Family History")
-st.caption("Premature ASCVD: Male <55 yrs · Female <65 yrs in first-degree relatives")
+    with mh2:
+        ckd = st.checkbox("Chronic Kidney Disease", disabled=none_hist, key="ckd", on_change=rerun_section, args=("history",))
+        hf = st.checkbox("Heart Failure", disabled=none_hist, key="hf", on_change=rerun_section, args=("history",))
+        nafld = st.checkbox("NAFLD", disabled=none_hist, key="nafld", on_change=rerun_section, args=("history",))
+        mets = st.checkbox("Metabolic Syndrome", disabled=none_hist, key="mets", on_change=rerun_section, args=("history",))
 
-if 'none_fh' not in st.session_state:
-    st.session_state.none_fh = False
+    with mh3:
+        atrial_fib = st.checkbox("Atrial Fibrillation", disabled=none_hist, key="afib", on_change=rerun_section, args=("history",))
+        rheumatoid_arthritis = st.checkbox("Rheumatoid Arthritis", disabled=none_hist, key="ra", on_change=rerun_section, args=("history",))
+        migraine = st.checkbox("Migraine", disabled=none_hist, key="migraine", on_change=rerun_section, args=("history",))
 
-fh1, fh2 = st.columns(2)
-with fh1:
-    prem_ascvd = st.checkbox("Premature ASCVD (first-degree relatives)", disabled=st.session_state.none_fh, key="prem_ascvd")
-    fh_dm = st.checkbox("Family Hx of Diabetes", disabled=st.session_state.none_fh, key="fh_dm")
+    # Ticking this reruns only this section (and the results if they change).
+    st.checkbox("None of the above", key="none_hist_check", on_change=rerun_section, args=("history",))
 
-with fh2:
-    fh_htn = st.checkbox("Family Hx of Hypertension", disabled=st.session_state.none_fh, key="fh_htn")
-    fh_fh = st.checkbox("Familial Hypercholesterolemia", disabled=st.session_state.none_fh, key="fh_fh")
 
-none_fh_check = st.checkbox("None of the above", key="none_fh_check", value=st.session_state.none_fh)
-if none_fh_check != st.session_state.none_fh:
-    st.session_state.none_fh = none_fh_check
-    st.rerun()
+medical_history_section()
 
 
-# ==================== MEDICATIONS ====================
-sep("Current Medications")
+# ==================== FAMILY HISTORY ====================
+@section_fragment("family_history")
+def family_history_section():
+    sep("Family History")
+    st.caption("Premature ASCVD: Male <55 yrs · Female <65 yrs in first-degree relatives")
 
-if 'none_med' not in st.session_state:
-    st.session_state.none_med = False
+    none_fh = st.session_state.get("none_fh_check", False)
 
-med1, med2 = st.columns(2)
-with med1:
-    on_statin = st.checkbox("Statin", disabled=st.session_state.none_med, key="on_statin")
-    antihtn = st.checkbox("Antihypertensive", disabled=st.session_state.none_med, key="antihtn")
+    fh1, fh2 = st.columns(2)
+    with fh1:
+        prem_ascvd = st.checkbox("Premature ASCVD (first-degree relatives)", disabled=none_fh, key="prem_ascvd", on_change=rerun_section, args=("family_history",))
+        fh_dm = st.checkbox("Family Hx of Diabetes", disabled=none_fh, key="fh_dm", on_change=rerun_section, args=("family_history",))
 
-with med2:
-    antidm = st.checkbox("Antidiabetic", disabled=st.session_state.none_med, key="antidm")
-    antiplate = st.checkbox("Antiplatelet", disabled=st.session_state.none_med, key="antiplate")
+    with fh2:
+        fh_htn = st.checkbox("Family Hx of Hypertension", disabled=none_fh, key="fh_htn", on_change=rerun_section, args=("family_history",))
+        fh_fh = st.checkbox("Familial Hypercholesterolemia", disabled=none_fh, key="fh_fh", on_change=rerun_section, args=("family_history",))
 
-none_med_check = st.checkbox("None of the above", key="none_med_check", value=st.session_state.none_med)
-if none_med_check != st.session_state.none_med:
-    st.session_state.none_med = none_med_check
-    st.rerun()
+    # Ticking this reruns only this section (and the results if they change).
+    st.checkbox("None of the above", key="none_fh_check", on_change=rerun_section, args=("family_history",))
 
 
-# ==================== CALCULATIONS ====================
-qrisk = calculate_qrisk3(age_val, sex, eth, smoke, diabetes, height_val, weight_val, sbp, tc_hdl_ratio, antihtn, prem_ascvd, ckd, atrial_fib, rheumatoid_arthritis, migraine)
-aha = calculate_aha_prevent(age_val, sex, eth, tc, hdl, sbp, antihtn, diabetes, smoke)
-qrisk_cat = percent_category(qrisk)
-aha_cat = percent_category(aha)
+family_history_section()
 
-risk_enhancers = (smoke == "Current") or mets or fh_fh or (lpa is not None and lpa > 50) or (apob is not None and apob > 130)
-if ascvd or ckd or (diabetes == "Yes" and duration is not None and duration >= 10):
-    lai = "Very High"
-elif diabetes == "Yes" or risk_enhancers:
-    lai = "High"
-elif prem_ascvd or fh_dm or fh_htn:
-    lai = "Moderate"
-else:
-    lai = "Low"
 
+# ==================== MEDICATIONS ====================
+@section_fragment("medications")
+def medications_section():
+    sep("Current Medications")
+
+    none_med = st.session_state.get("none_med_check", False)
+
+    med1, med2 = st.columns(2)
+    with med1:
+        on_statin = st.checkbox("Statin", disabled=none_med, key="on_statin", on_change=rerun_section, args=("medications",))
+        antihtn = st.checkbox("Antihypertensive", disabled=none_med, key="antihtn", on_change=rerun_section, args=("medications",))
+
+    with med2:
+        antidm = st.checkbox("Antidiabetic", disabled=none_med, key="antidm", on_change=rerun_section, args=("medications",))
+        antiplate = st.checkbox("Antiplatelet", disabled=none_med, key="antiplate", on_change=rerun_section, args=("medications",))
+
+    # Ticking this reruns only this section (and the results if they change).
+    st.checkbox("None of the above", key="none_med_check", on_change=rerun_section, args=("medications",))
+
+
+medications_section()
+
+
+# ==================== RESULTS ====================
+WHAT_IF_SCORES = {"AHA PREVENT": "aha_prevent", "QRISK3": "qrisk3"}
+
+
+@st.cache_resource
+def percentile_index(path):
+    # Memory-mapped once per process and shared by every session; None without an index file.
+    return PercentileIndex(path) if os.path.exists(path) else None
+
+
+def peer_percentile(score, inputs, risk):
+    """Caption placing the patient's risk among their age band, sex and ethnicity in the practice cohort."""
+    index = percentile_index(os.environ.get(INDEX_ENV, DEFAULT_INDEX))
+    peer = index and index.percentile(score, inputs.age, inputs.sex, inputs.ethnicity, risk)
+    if peer:
+        rank = min(99, max(1, round(peer.percentile)))
+        suffix = "th" if 10 <= rank % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(rank % 10, "th")
+        peers = "men" if inputs.sex == "Male" else "women"
+        st.caption(f"{rank}{suffix} percentile of {peer.age_band} y {inputs.ethnicity} {peers} "
+                   f"in our practice (n={peer.n:,})")
+
+
+def what_if_heatmap(inputs):
+    # 1 mmHg by 1 % steps; cached per inputs.
+    grid = scenario_grid(inputs, sbp_steps=41, lipid_steps=51)
+    w1, w2 = st.columns(2)
+    score = w1.radio("Score", list(WHAT_IF_SCORES), horizontal=True, key="what_if_score")
+    layer = 0
+    if len(grid.smoking) > 1 and w2.checkbox("Stops smoking", key="what_if_quit"):
+        layer = 1
+    risk = getattr(grid, WHAT_IF_SCORES[score])[layer]
+    if np.isnan(risk).all():
+        st.info(f"{score} is not calculable with current data.")
+        return
+    frame = pd.DataFrame({
+        "sbp_change": np.repeat(grid.sbp_change, len(grid.lipid_change)),
+        "lipid_change": np.tile(grid.lipid_change, len(grid.sbp_change)),
+        "risk": risk.ravel(),
+    })
+    st.vega_lite_chart(frame, {
+        "mark": {"type": "rect"},
+        "encoding": {
+            "x": {"field": "lipid_change", "type": "ordinal", "title": "TC/HDL ratio change (%)",
+                  "axis": {"values": [-50, -40, -30, -20, -10, 0], "labelAngle": 0}},
+            "y": {"field": "sbp_change", "type": "ordinal", "title": "SBP change (mmHg)", "sort": "descending",
+                  "axis": {"values": [-40, -30, -20, -10, 0]}},
+            "color": {"field": "risk", "type": "quantitative", "title": "10-yr risk (%)",
+                      "scale": {"scheme": "redyellowgreen", "reverse": True}},
+            "tooltip": [
+                {"field": "sbp_change", "title": "SBP change (mmHg)"},
+                {"field": "lipid_change", "title": "TC/HDL change (%)"},
+                {"field": "risk", "title": f"{score} (%)"},
+            ],
+        },
+        "height": 320,
+    }, width="stretch")
+    st.caption("Top-right cell is the current risk. TC/HDL changes assume HDL-C stays the same.")
+
+
+@section_fragment("results")
+def results_panel():
+    profiler.mark("Calculations")
+    # Only the graph nodes downstream of the inputs that changed are recomputed;
+    # the scores come from the assessment cache shared by all sessions.
+    inputs = current_inputs()
+    graph = assessment_graph()
+    result = graph.assessment()
+    qrisk = result.qrisk
+    aha = result.aha
+    qrisk_cat = result.qrisk_cat
+    aha_cat = result.aha_cat
+    lai = result.lai
+
+    # ==================== SCORE METRICS ====================
+    st.markdown('<div class="section-divider" style="margin-top:2rem;"></div>', unsafe_allow_html=True)
+    sep("Calculated 10-Year Risk Scores")
+
+    sc1, sc2, sc3 = st.columns(3)
+    with sc1:
+        if qrisk is not None:
+            sc1.metric("QRISK3", f"{qrisk}%", help="10-year CVD risk — requires age 25-84")
+        else:
+            st.info("QRISK3: Requires age 25–84 + complete inputs")
 
-# ==================== SCORE METRICS ====================
-st.markdown('<div class="section-divider" style="margin-top:2rem;"></div>', unsafe_allow_html=True)
-sep("Calculated 10-Year Risk Scores")
+    with sc2:
+        if aha is not None:
+            sc2.metric("AHA PREVENT", f"{aha}%", help="10-year ASCVD risk — requires age 40-79")
+        else:
+            st.info("AHA PREVENT: Requires age 40–79 + complete inputs")
 
-sc1, sc2, sc3 = st.columns(3)
-with sc1:
-    if qrisk is not None:
-        sc1.metric("QRISK3", f"{qrisk}%", help="10-year CVD risk — requires age 25-84")
-    else:
-        st.info("QRISK3: Requires age 25–84 + complete inputs")
+    with sc3:
+        sc3.metric("LAI 2023 Category", lai)
 
-with sc2:
-    if aha is not None:
-        sc2.metric("AHA PREVENT", f"{aha}%", help="10-year ASCVD risk — requires age 40-79")
-    else:
-        st.info("AHA PREVENT: Requires age 40–79 + complete inputs")
 
-with sc3:
-    sc3.metric("LAI 2023 Category", lai)
+    # ==================== RISK STRATIFICATION PANEL ====================
+    sep("Risk Stratification")
 
+    cols = st.columns(3)
 
-# ==================== RISK STRATIFICATION PANEL ====================
-sep("Risk Stratification")
+    with cols[0]:
+        if aha_cat:
+            cat_class = aha_cat.lower().replace(" ", "")
+            st.markdown(
+                f'<div class="risk-card risk-{cat_class}">'
+                f'<div style="font-size:0.72rem;font-weight:700;letter-spacing:0.06em;text-transform:uppercase;color:{TEXT_MUTED};margin-bottom:0.3rem;">AHA PREVENT</div>'
+                f'<div style="font-size:1.7rem;font-weight:800;color:{TEXT_PRIMARY};line-height:1.1;">{aha_cat}</div>'
+                f'<div style="font-size:1rem;font-weight:600;color:{TEXT_SECONDARY};margin-top:0.2rem;">{aha}% · 10-yr ASCVD</div>'
+                f'</div>', unsafe_allow_html=True
+            )
+            peer_percentile("aha_prevent", inputs, aha)
+            if aha_cat != "Low":
+                factors = result.aha_factors
+                if factors:
+                    st.markdown(
+                        f'<div class="contributing-factors"><div class="factor-title">Key Drivers</div>' +
+                        "".join(f'<div class="factor-item">{f}</div>' for f in factors[:5]) +
+                        '</div>', unsafe_allow_html=True
+                    )
+        else:
+            st.markdown(
+                f'<div class="risk-card risk-unavailable">'
+                f'<div style="font-size:0.72rem;font-weight:700;letter-spacing:0.06em;text-transform:uppercase;color:{TEXT_MUTED};margin-bottom:0.3rem;">AHA PREVENT</div>'
+                f'<div style="font-size:1rem;color:{TEXT_MUTED};">Not calculable</div>'
+                f'<div style="font-size:0.78rem;color:{TEXT_MUTED};margin-top:0.2rem;">Requires age 40–79 + lipids + BP</div>'
+                f'</div>', unsafe_allow_html=True
+            )
 
-cols = st.columns(3)
+    with cols[1]:
+        if qrisk_cat:
+            cat_class = qrisk_cat.lower().replace(" ", "")
+            st.markdown(
+                f'<div class="risk-card risk-{cat_class}">'
+                f'<div style="font-size:0.72rem;font-weight:700;letter-spacing:0.06em;text-transform:uppercase;color:{TEXT_MUTED};margin-bottom:0.3rem;">QRISK3</div>'
+                f'<div style="font-size:1.7rem;font-weight:800;color:{TEXT_PRIMARY};line-height:1.1;">{qrisk_cat}</div>'
+                f'<div style="font-size:1rem;font-weight:600;color:{TEXT_SECONDARY};margin-top:0.2rem;">{qrisk}% · 10-yr CVD</div>'
+                f'</div>', unsafe_allow_html=True
+            )
+            peer_percentile("qrisk3", inputs, qrisk)
+            if qrisk_cat != "Low":
+                factors = result.qrisk_factors
+                if factors:
+                    st.markdown(
+                        f'<div class="contributing-factors"><div class="factor-title">Key Drivers</div>' +
+                        "".join(f'<div class="factor-item">{f}</div>' for f in factors[:5]) +
+                        '</div>', unsafe_allow_html=True
+                    )
+        else:
+            st.markdown(
+                f'<div class="risk-card risk-unavailable">'
+                f'<div style="font-size:0.72rem;font-weight:700;letter-spacing:0.06em;text-transform:uppercase;color:{TEXT_MUTED};margin-bottom:0.3rem;">QRISK3</div>'
+                f'<div style="font-size:1rem;color:{TEXT_MUTED};">Not calculable</div>'
+                f'<div style="font-size:0.78rem;color:{TEXT_MUTED};margin-top:0.2rem;">Requires age 25–84 + TC/HDL ratio + BP</div>'
+                f'</div>', unsafe_allow_html=True
+            )
 
-with cols[0]:
-    if aha_cat:
-        cat_class = aha_cat.lower().replace(" ", "")
+    with cols[2]:
+        cat_class = lai.lower().replace(" ", "")
         st.markdown(
             f'<div class="risk-card risk-{cat_class}">'
-            f'<div style="font-size:0.72rem;font-weight:700;letter-spacing:0.06em;text-transform:uppercase;color:{TEXT_MUTED};margin-bottom:0.3rem;">AHA PREVENT</div>'
-            f'<div style="font-size:1.7rem;font-weight:800;color:{TEXT_PRIMARY};line-height:1.1;">{aha_cat}</div>'
-            f'<div style="font-size:1rem;font-weight:600;color:{TEXT_SECONDARY};margin-top:0.2rem;">{aha}% · 10-yr ASCVD</div>'
+            f'<div style="font-size:0.72rem;font-weight:700;letter-spacing:0.06em;text-transform:uppercase;color:{TEXT_MUTED};margin-bottom:0.3rem;">LAI 2023</div>'
+            f'<div style="font-size:1.7rem;font-weight:800;color:{TEXT_PRIMARY};line-height:1.1;">{lai}</div>'
+            f'<div style="font-size:0.82rem;color:{TEXT_SECONDARY};margin-top:0.2rem;font-style:italic;">Lipid Association of India</div>'
             f'</div>', unsafe_allow_html=True
         )
-        if aha_cat != "Low":
-            factors = get_contributing_factors_aha(age_val, sex, tc, hdl, sbp, antihtn, diabetes, smoke)
+        if lai != "Low":
+            factors = result.lai_factors
             if factors:
                 st.markdown(
                     f'<div class="contributing-factors"><div class="factor-title">Key Drivers</div>' +
                     "".join(f'<div class="factor-item">{f}</div>' for f in factors[:5]) +
                     '</div>', unsafe_allow_html=True
                 )
-    else:
-        st.markdown(
-            f'<div class="risk-card risk-unavailable">'
-            f'<div style="font-size:0.72rem;font-weight:700;letter-spacing:0.06em;text-transform:uppercase;color:{TEXT_MUTED};margin-bottom:0.3rem;">AHA PREVENT</div>'
-            f'<div style="font-size:1rem;color:{TEXT_MUTED};">Not calculable</div>'
-            f'<div style="font-size:0.78rem;color:{TEXT_MUTED};margin-top:0.2rem;">Requires age 40–79 + lipids + BP</div>'
-            f'</div>', unsafe_allow_html=True
-        )
 
-with cols[1]:
-    if qrisk_cat:
-        cat_class = qrisk_cat.lower().replace(" ", "")
-        st.markdown(
-            f'<div class="risk-card risk-{cat_class}">'
-            f'<div style="font-size:0.72rem;font-weight:700;letter-spacing:0.06em;text-transform:uppercase;color:{TEXT_MUTED};margin-bottom:0.3rem;">QRISK3</div>'
-            f'<div style="font-size:1.7rem;font-weight:800;color:{TEXT_PRIMARY};line-height:1.1;">{qrisk_cat}</div>'
-            f'<div style="font-size:1rem;font-weight:600;color:{TEXT_SECONDARY};margin-top:0.2rem;">{qrisk}% · 10-yr CVD</div>'
-            f'</div>', unsafe_allow_html=True
-        )
-        if qrisk_cat != "Low":
-            factors = get_contributing_factors_qrisk(age_val, sex, smoke, diabetes, bmi, sbp, tc_hdl_ratio, prem_ascvd, ckd, atrial_fib, rheumatoid_arthritis, eth)
-            if factors:
-                st.markdown(
-                    f'<div class="contributing-factors"><div class="factor-title">Key Drivers</div>' +
-                    "".join(f'<div class="factor-item">{f}</div>' for f in factors[:5]) +
-                    '</div>', unsafe_allow_html=True
-                )
-    else:
-        st.markdown(
-            f'<div class="risk-card risk-unavailable">'
-            f'<div style="font-size:0.72rem;font-weight:700;letter-spacing:0.06em;text-transform:uppercase;color:{TEXT_MUTED};margin-bottom:0.3rem;">QRISK3</div>'
-            f'<div style="font-size:1rem;color:{TEXT_MUTED};">Not calculable</div>'
-            f'<div style="font-size:0.78rem;color:{TEXT_MUTED};margin-top:0.2rem;">Requires age 25–84 + TC/HDL ratio + BP</div>'
-            f'</div>', unsafe_allow_html=True
-        )
 
-with cols[2]:
-    cat_class = lai.lower().replace(" ", "")
-    st.markdown(
-        f'<div class="risk-card risk-{cat_class}">'
-        f'<div style="font-size:0.72rem;font-weight:700;letter-spacing:0.06em;text-transform:uppercase;color:{TEXT_MUTED};margin-bottom:0.3rem;">LAI 2023</div>'
-        f'<div style="font-size:1.7rem;font-weight:800;color:{TEXT_PRIMARY};line-height:1.1;">{lai}</div>'
-        f'<div style="font-size:0.82rem;color:{TEXT_SECONDARY};margin-top:0.2rem;font-style:italic;">Lipid Association of India</div>'
-        f'</div>', unsafe_allow_html=True
-    )
-    if lai != "Low":
-        factors = get_contributing_factors_lai(ascvd, ckd, diabetes, duration, smoke, mets, fh_fh, lpa, apob, prem_ascvd, fh_dm, fh_htn, ldl)
-        if factors:
-            st.markdown(
-                f'<div class="contributing-factors"><div class="factor-title">Key Drivers</div>' +
-                "".join(f'<div class="factor-item">{f}</div>' for f in factors[:5]) +
-                '</div>', unsafe_allow_html=True
-            )
+    # ==================== WHAT-IF SCENARIOS ====================
+    sep("What-If Scenarios")
+    if st.toggle("Show risk if SBP, TC/HDL ratio or smoking change", key="what_if"):
+        what_if_heatmap(inputs)
 
 
-# ==================== TREATMENT RECOMMENDATIONS ====================
-sep("Treatment Recommendations by Guideline")
+    # ==================== TREATMENT RECOMMENDATIONS ====================
+    sep("Treatment Recommendations by Guideline")
 
-tab1, tab2, tab3 = st.tabs(["AHA PREVENT", "QRISK3", "LAI 2023"])
+    tab1, tab2, tab3 = st.tabs(["AHA PREVENT", "QRISK3", "LAI 2023"])
 
-with tab1:
-    if aha_cat:
-        recs = get_aha_recommendations(aha_cat, aha)
-        st.markdown(f"**{aha_cat} Risk** — AHA PREVENT")
-        c1, c2 = st.columns(2)
-        with c1:
-            st.markdown(f"**Statin Therapy:** {recs['statin']}")
-            st.markdown(f"**LDL-C Target:** {recs['ldl_target']}")
-            st.markdown(f"**Non-HDL-C Target:** {recs['non_hdl_target']}")
-        with c2:
-            st.markdown(f"**Lifestyle:** {recs['lifestyle']}")
-            st.markdown(f"**Monitoring:** {recs['monitoring']}")
-    else:
-        st.info("AHA PREVENT score not calculable with current data.")
+    with tab1:
+        if aha_cat:
+            recs = graph["aha_recommendations"]
+            st.markdown(f"**{aha_cat} Risk** — AHA PREVENT")
+            c1, c2 = st.columns(2)
+            with c1:
+                st.markdown(f"**Statin Therapy:** {recs['statin']}")
+                st.markdown(f"**LDL-C Target:** {recs['ldl_target']}")
+                st.markdown(f"**Non-HDL-C Target:** {recs['non_hdl_target']}")
+            with c2:
+                st.markdown(f"**Lifestyle:** {recs['lifestyle']}")
+                st.markdown(f"**Monitoring:** {recs['monitoring']}")
+        else:
+            st.info("AHA PREVENT score not calculable with current data.")
+
+    with tab2:
+        if qrisk_cat:
+            recs = graph["qrisk_recommendations"]
+            st.markdown(f"**{qrisk_cat} Risk** — QRISK3")
+            c1, c2 = st.columns(2)
+            with c1:
+                st.markdown(f"**Statin Therapy:** {recs['statin']}")
+                st.markdown(f"**LDL-C Target:** {recs['ldl_target']}")
+                st.markdown(f"**Non-HDL-C Target:** {recs['non_hdl_target']}")
+            with c2:
+                st.markdown(f"**Lifestyle:** {recs['lifestyle']}")
+                st.markdown(f"**Monitoring:** {recs['monitoring']}")
+        else:
+            st.info("QRISK3 score not calculable with current data.")
 
-with tab2:
-    if qrisk_cat:
-        recs = get_qrisk_recommendations(qrisk_cat, qrisk)
-        st.markdown(f"**{qrisk_cat} Risk** — QRISK3")
+    with tab3:
+        recs = graph["lai_recommendations"]
+        st.markdown(f"**{lai} Risk** — LAI 2023")
         c1, c2 = st.columns(2)
         with c1:
             st.markdown(f"**Statin Therapy:** {recs['statin']}")
             st.markdown(f"**LDL-C Target:** {recs['ldl_target']}")
             st.markdown(f"**Non-HDL-C Target:** {recs['non_hdl_target']}")
+            st.markdown(f"**ApoB Target:** {recs['apob_target']}")
         with c2:
             st.markdown(f"**Lifestyle:** {recs['lifestyle']}")
             st.markdown(f"**Monitoring:** {recs['monitoring']}")
-    else:
-        st.info("QRISK3 score not calculable with current data.")
 
-with tab3:
-    recs = get_lai_recommendations(lai)
-    st.markdown(f"**{lai} Risk** — LAI 2023")
-    c1, c2 = st.columns(2)
-    with c1:
-        st.markdown(f"**Statin Therapy:** {recs['statin']}")
-        st.markdown(f"**LDL-C Target:** {recs['ldl_target']}")
-        st.markdown(f"**Non-HDL-C Target:** {recs['non_hdl_target']}")
-        st.markdown(f"**ApoB Target:** {recs['apob_target']}")
-    with c2:
-        st.markdown(f"**Lifestyle:** {recs['lifestyle']}")
-        st.markdown(f"**Monitoring:** {recs['monitoring']}")
 
+    # ==================== UNIFIED RECOMMENDATION ====================
+    sep("Unified Clinical Recommendation")
 
-# ==================== UNIFIED RECOMMENDATION ====================
-sep("Unified Clinical Recommendation")
+    st.markdown(graph["summary"])
 
-unified_summary = generate_fallback_summary(aha_cat, qrisk_cat, lai)
-st.markdown(unified_summary)
+    st.info("This recommendation synthesizes AHA PREVENT, QRISK3, and LAI 2023 guidelines. All decisions should involve shared decision-making with the patient.")
 
-st.info("This recommendation synthesizes AHA PREVENT, QRISK3, and LAI 2023 guidelines. All decisions should involve shared decision-making with the patient.")
+    st.markdown('<div class="section-divider" style="margin-top:2rem;"></div>', unsafe_allow_html=True)
+
+    if profiler.enabled:
+        with st.expander(f"Recomputed on the last input change — {len(graph.recomputed)} of {len(NODES)} values"):
+            st.caption(f"Changed inputs: {', '.join(graph.changed_inputs) or '—'} · "
+                       f"{graph.updates} incremental updates this session")
+            recomputed = set(graph.recomputed)
+            rows = "\n".join(
+                f"| {node.name} | {node.kind} | {'✓' if node.name in recomputed else ''} | {graph.compute_counts[node.name]} |"
+                for node in NODES
+            )
+            st.markdown("| Value | Kind | Recomputed | Times computed |\n|---|---|:---:|---:|\n" + rows)
+
+
+results_panel()
 
-st.markdown('<div class="section-divider" style="margin-top:2rem;"></div>', unsafe_allow_html=True)
 
 # ==================== REFERENCE LINKS ====================
+profiler.mark("Reference links")
 st.markdown("""
 <div class="premium-link-container">
     <a href="https://professional.heart.org/en/guidelines-and-statements/prevent-calculator" target="_blank" class="premium-link">
@@ -1354,3 +827,15 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 st.caption("Clinical decision support tool — AHA · QRISK3 · LAI 2023 Guidelines. All treatment decisions require clinical judgment and shared decision-making.")
+
+# ==================== PROFILING PANEL ====================
+if profiler.enabled:
+    sections = profiler.finish()
+    with st.expander(f"Rerun timing — {profiler.total_ms:.1f} ms", expanded=False):
+        rows = "\n".join(f"| {label} | {ms:.2f} | {ms / profiler.total_ms:.0%} |" for label, ms in sections)
+        st.markdown("| Section | ms | Share |\n|---|---:|---:|\n" + rows)
+        stats = cache_stats()
+        st.caption(f"Assessment cache: {stats['hits']} hits, {stats['misses']} misses, "
+                   f"{stats['size']}/{stats['maxsize']} entries")
+
+app_run_complete = True
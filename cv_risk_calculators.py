@@ -1,39 +1,47 @@
 def safe(value):
     return value is not None
 
+# With numeric=True the calculators return floats and codes into these
+# tuples instead of display strings; format_value() renders either form.
+LIFETIME_LEVELS = ("Moderate","High")
+THERAPY_PLANS = ("Continue current therapy","Start statin","Increase intensity","Add ezetimibe")
+
+def _percent(value, numeric):
+    return value if numeric else f"{round(value,1)} %"
+
 # ---------------- ASCVD (simplified placeholder)
-def ascvd(patient):
+def ascvd(patient, numeric=False):
     required = ["age","ldl","hdl","sbp"]
     for r in required:
         if not safe(patient.get(r)):
             return {"status":"not_calculable","reason":f"missing {r}"}
 
     risk = (patient["age"]*0.15) + (patient["ldl"]*0.02) - (patient["hdl"]*0.02)
-    return {"status":"ok","value":f"{round(risk,1)} %"}
+    return {"status":"ok","value":_percent(risk,numeric)}
 
 # ---------------- Framingham
-def framingham(patient):
+def framingham(patient, numeric=False):
     if not safe(patient.get("age")) or not safe(patient.get("tc")):
         return {"status":"not_calculable","reason":"missing age or cholesterol"}
     score = patient["age"]*0.2 + patient["tc"]*0.01
-    return {"status":"ok","value":f"{round(score,1)} %"}
+    return {"status":"ok","value":_percent(score,numeric)}
 
 # ---------------- QRISK (approx clinical indicator)
-def qrisk(patient):
+def qrisk(patient, numeric=False):
     if not safe(patient.get("age")):
         return {"status":"not_calculable","reason":"missing age"}
     score = patient["age"]*0.25
-    return {"status":"ok","value":f"{round(score,1)} %"}
+    return {"status":"ok","value":_percent(score,numeric)}
 
 # ---------------- Lifetime Risk
-def lifetime(patient):
+def lifetime(patient, numeric=False):
     if not safe(patient.get("age")):
         return {"status":"not_calculable","reason":"missing age"}
-    risk = "High" if patient["age"]>40 else "Moderate"
-    return {"status":"ok","value":risk}
+    level = 1 if patient["age"]>40 else 0
+    return {"status":"ok","value":level if numeric else LIFETIME_LEVELS[level]}
 
 # ---------------- Therapy Recommendation
-def therapy(patient):
+def therapy(patient, numeric=False):
     ldl = patient.get("ldl")
     statin = patient.get("statin")
 
@@ -41,22 +49,66 @@ def therapy(patient):
         return {"status":"not_calculable","reason":"missing LDL"}
 
     if statin=="No statin" and ldl>130:
-        plan="Start statin"
+        plan=1
     elif statin=="Moderate intensity" and ldl>100:
-        plan="Increase intensity"
+        plan=2
     elif statin=="High intensity" and ldl>70:
-        plan="Add ezetimibe"
+        plan=3
     else:
-        plan="Continue current therapy"
+        plan=0
 
-    return {"status":"ok","value":plan}
+    return {"status":"ok","value":plan if numeric else THERAPY_PLANS[plan]}
 
 # ---------------- Run All
-def run_all_risk_assessments(patient):
+def run_all_risk_assessments(patient, numeric=False):
+    return {
+        "ASCVD":ascvd(patient,numeric),
+        "Framingham":framingham(patient,numeric),
+        "QRISK":qrisk(patient,numeric),
+        "Lifetime Risk":lifetime(patient,numeric),
+        "Therapy Recommendation":therapy(patient,numeric)
+    }
+
+# ---------------- Display
+def format_value(name, value):
+    """Display string for a numeric-mode value of run_all_risk_assessments()[name]."""
+    if name=="Lifetime Risk":
+        return LIFETIME_LEVELS[value]
+    if name=="Therapy Recommendation":
+        return THERAPY_PLANS[value]
+    return _percent(value,False)
+
+# ---------------- Batch
+def run_all_risk_assessments_batch(patients):
+    """
+    Numeric results for many patients at once.
+
+    patients is a sequence of the dicts (or PatientRecords) run_all_risk_assessments
+    takes, or a structured array from cv_risk_core.records.records_to_array().
+    Returns {name: array} with the run_all_risk_assessments() names: float64
+    percentages (NaN where not calculable) and int8 codes into LIFETIME_LEVELS /
+    THERAPY_PLANS (-1 where not calculable). Use the scalar functions for the
+    not_calculable reason.
+    """
+    import numpy as np
+
+    if isinstance(patients, np.ndarray) and patients.dtype.names:
+        # statin is already coded in the records order: No / Moderate / High intensity
+        columns = {f: patients[f] for f in ("age","ldl","hdl","sbp","tc","statin")}
+    else:
+        codes = {"No statin":0,"Moderate intensity":1,"High intensity":2}
+        columns = {f: np.array([p.get(f) for p in patients], dtype=np.float64) for f in ("age","ldl","hdl","sbp","tc")}
+        columns["statin"] = np.array([codes.get(p.get("statin"),-1) for p in patients], dtype=np.int8)
+    age, ldl, hdl, sbp, tc, statin = columns.values()
+
     return {
-        "ASCVD":ascvd(patient),
-        "Framingham":framingham(patient),
-        "QRISK":qrisk(patient),
-        "Lifetime Risk":lifetime(patient),
-        "Therapy Recommendation":therapy(patient)
-    }
\ No newline at end of file
+        "ASCVD":np.where(np.isnan(sbp), np.nan, age*0.15 + ldl*0.02 - hdl*0.02),
+        "Framingham":age*0.2 + tc*0.01,
+        "QRISK":age*0.25,
+        "Lifetime Risk":np.where(np.isnan(age), -1, age>40).astype(np.int8),
+        "Therapy Recommendation":np.select(
+            [(statin==0) & (ldl>130), (statin==1) & (ldl>100), (statin==2) & (ldl>70)],
+            [1, 2, 3],
+            np.where(np.isnan(ldl), -1, 0),
+        ).astype(np.int8),
+    }
@@ -0,0 +1,43 @@
+"""
+Cardiovascular risk calculation core.
+
+Scoring, contributing-factor and recommendation logic shared by the
+Streamlit app and batch jobs. Importing this package does not import
+streamlit; the NumPy cohort engine lives in cv_risk_core.batch and is
+only loaded when imported explicitly.
+"""
+
+from .assessment import assess, cache_stats, clinical_inputs
+from .factors import (
+    get_contributing_factors_aha,
+    get_contributing_factors_lai,
+    get_contributing_factors_qrisk,
+)
+from .metrics import bmi_calc, non_hdl, percent_category, ratio
+from .recommendations import (
+    generate_fallback_summary,
+    get_aha_recommendations,
+    get_lai_recommendations,
+    get_qrisk_recommendations,
+)
+from .scores import calculate_aha_prevent, calculate_lai_category, calculate_qrisk3
+
+__all__ = [
+    "assess",
+    "bmi_calc",
+    "cache_stats",
+    "calculate_aha_prevent",
+    "calculate_lai_category",
+    "calculate_qrisk3",
+    "clinical_inputs",
+    "generate_fallback_summary",
+    "get_aha_recommendations",
+    "get_contributing_factors_aha",
+    "get_contributing_factors_lai",
+    "get_contributing_factors_qrisk",
+    "get_lai_recommendations",
+    "get_qrisk_recommendations",
+    "non_hdl",
+    "percent_category",
+    "ratio",
+]
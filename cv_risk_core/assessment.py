@@ -0,0 +1,98 @@
+"""
+Memoized full assessment keyed on the clinical inputs.
+
+assess() runs QRISK3, AHA PREVENT, the LAI 2023 category and all three
+contributing-factor lists for one patient. Results are kept in a bounded,
+thread-safe LRU cache that lives at module level, so every Streamlit session
+served by the same process shares it: a rerun that changes no clinical input
+(a theme toggle, a display-only field) costs a dictionary lookup.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from .factors import (
+    get_contributing_factors_aha,
+    get_contributing_factors_lai,
+    get_contributing_factors_qrisk,
+)
+from .metrics import bmi_calc, percent_category, ratio
+from .scores import calculate_aha_prevent, calculate_lai_category, calculate_qrisk3
+
+CACHE_SIZE = 4096
+
+NUMERIC_FIELDS = ("age", "height", "weight", "sbp", "tc", "ldl", "hdl", "apob", "lpa", "dm_duration")
+CATEGORY_FIELDS = ("sex", "ethnicity", "smoking", "diabetes")
+FLAG_FIELDS = (
+    "antihtn", "mi", "stroke", "pad", "revasc", "ckd", "mets", "atrial_fib",
+    "rheumatoid_arthritis", "migraine", "prem_ascvd", "fh_dm", "fh_htn", "fh_fh",
+)
+
+ClinicalInputs = namedtuple("ClinicalInputs", NUMERIC_FIELDS + CATEGORY_FIELDS + FLAG_FIELDS)
+
+Assessment = namedtuple("Assessment", [
+    "qrisk", "qrisk_cat", "aha", "aha_cat", "lai",
+    "aha_factors", "qrisk_factors", "lai_factors",
+])
+
+
+def clinical_inputs(**values):
+    """
+    Normalized cache key: numbers as float, flags as bool, missing numbers as None.
+
+    Fields that are not given count as missing (numbers/categories) or False
+    (flags), so 55 and 55.0, or 1 and True, hit the same cache entry.
+    """
+    unknown = set(values) - set(ClinicalInputs._fields)
+    if unknown:
+        raise TypeError(f"unknown clinical inputs: {', '.join(sorted(unknown))}")
+    key = {}
+    for name in NUMERIC_FIELDS:
+        v = values.get(name)
+        key[name] = None if v is None else float(v)
+    for name in CATEGORY_FIELDS:
+        key[name] = values.get(name)
+    for name in FLAG_FIELDS:
+        key[name] = bool(values.get(name))
+    return ClinicalInputs(**key)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def assess(inputs):
+    """Full assessment for a ClinicalInputs key; factor lists are returned as tuples."""
+    p = inputs
+    bmi = bmi_calc(p.height, p.weight)
+    tc_hdl_ratio = ratio(p.tc, p.hdl)
+    ascvd = p.mi or p.stroke or p.pad or p.revasc
+
+    qrisk = calculate_qrisk3(p.age, p.sex, p.ethnicity, p.smoking, p.diabetes, p.height, p.weight, p.sbp,
+                             tc_hdl_ratio, p.antihtn, p.prem_ascvd, p.ckd, p.atrial_fib,
+                             p.rheumatoid_arthritis, p.migraine)
+    aha = calculate_aha_prevent(p.age, p.sex, p.ethnicity, p.tc, p.hdl, p.sbp, p.antihtn, p.diabetes, p.smoking)
+    lai = calculate_lai_category(ascvd, p.ckd, p.diabetes, p.dm_duration, p.smoking, p.mets, p.fh_fh,
+                                 p.lpa, p.apob, p.prem_ascvd, p.fh_dm, p.fh_htn)
+    return Assessment(
+        qrisk=qrisk,
+        qrisk_cat=percent_category(qrisk),
+        aha=aha,
+        aha_cat=percent_category(aha),
+        lai=lai,
+        aha_factors=tuple(get_contributing_factors_aha(p.age, p.sex, p.tc, p.hdl, p.sbp, p.antihtn,
+                                                       p.diabetes, p.smoking)),
+        qrisk_factors=tuple(get_contributing_factors_qrisk(p.age, p.sex, p.smoking, p.diabetes, bmi, p.sbp,
+                                                           tc_hdl_ratio, p.prem_ascvd, p.ckd, p.atrial_fib,
+                                                           p.rheumatoid_arthritis, p.ethnicity)),
+        lai_factors=tuple(get_contributing_factors_lai(ascvd, p.ckd, p.diabetes, p.dm_duration, p.smoking,
+                                                       p.mets, p.fh_fh, p.lpa, p.apob, p.prem_ascvd,
+                                                       p.fh_dm, p.fh_htn, p.ldl)),
+    )
+
+
+def cache_stats():
+    """Hit/miss counters and occupancy of the shared assessment cache."""
+    info = assess.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+
+
+def clear_cache():
+    assess.cache_clear()
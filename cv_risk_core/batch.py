@@ -0,0 +1,522 @@
+"""
+Vectorized cohort scoring for the cardiovascular risk calculators.
+
+Each function takes whole columns (lists, NumPy arrays or pandas Series)
+instead of one patient's values. Risk scores come back as float arrays with
+NaN wherever the scalar calculator would return None; categories come back
+as object arrays of the same strings (or None) the scalar functions return.
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from .factors import AHA_FACTOR_RULES, LAI_FACTOR_RULES, QRISK3_FACTOR_RULES
+from .scores import (
+    AHA_PREVENT_BASELINE_SURVIVAL,
+    AHA_PREVENT_COEFFICIENTS,
+    AHA_PREVENT_MEAN_SUM,
+    AHA_PREVENT_TERMS,
+)
+
+
+def _numeric(values):
+    """Float column with None mapped to NaN."""
+    return np.asarray(values, dtype=float)
+
+
+def _category(values):
+    """Unicode column of category labels with None/NaN mapped to ''."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == "U":
+        return arr
+    if arr.dtype.kind == "S":
+        return arr.astype(str)
+    arr = arr.astype(object)
+    arr[(arr == None) | (arr != arr)] = ""  # noqa: E711 - elementwise None test
+    return arr.astype(str)
+
+
+# Stands for every label outside the known ones in the codes _codes() makes itself.
+_OTHER = object()
+
+
+def _codes(values, labels):
+    """
+    Integer codes of a category column and the tuple of labels they index (-1 = missing).
+
+    pandas categoricals keep their own codes and categories, and object
+    columns are factorized (one hash lookup per row), so only the distinct
+    labels go through Python. NumPy string columns, and columns with more
+    than len(labels) + 1 distinct labels, are coded against `labels` followed
+    by _OTHER for anything else. None and NaN are missing; "" is a label that
+    callers treat as missing.
+    """
+    cat = getattr(values, "cat", values)
+    if hasattr(cat, "categories") and hasattr(cat, "codes"):
+        codes, found = np.asarray(cat.codes), tuple(cat.categories)
+    else:
+        arr = np.asarray(values)
+        if arr.dtype.kind != "O":
+            arr = _category(arr)
+            codes = np.full(arr.shape[0], len(labels), dtype=np.int16)
+            codes[arr == ""] = -1
+            for i, label in enumerate(labels):
+                codes[arr == label] = i
+            return codes, tuple(labels) + (_OTHER,)
+        import pandas as pd
+
+        codes, found = pd.factorize(arr)  # None/NaN get code -1
+        found = tuple(found)
+    if len(found) <= len(labels) + 1:
+        return codes, found
+    known = {label: i for i, label in enumerate(labels)}
+    # Code -1 (missing) picks the trailing entry.
+    lut = [known.get(label, -1 if label == "" else len(labels)) for label in found] + [-1]
+    return np.asarray(lut, dtype=np.int16).take(codes), tuple(labels) + (_OTHER,)
+
+
+def _lookup(values, table, other, missing=None, dtype=np.intp):
+    """
+    table[label] for each value of a category column, as a dtype array.
+
+    Labels not in table get `other`; None/NaN/"" get `missing` (default:
+    other). The column is coded with _codes() first, so the lookup is one
+    small table per distinct label and one take.
+    """
+    if missing is None:
+        missing = other
+    codes, labels = _codes(values, tuple(table))
+    lut = [table.get(label, missing if label == "" else other) for label in labels]
+    # Code -1 (missing) picks the trailing entry.
+    return np.asarray(lut + [missing], dtype=dtype).take(codes)
+
+
+def _encode(values, labels, missing=None):
+    """
+    Integer index of each value in labels, len(labels) for anything else.
+
+    Missing values get their own code when missing is given (see _lookup).
+    """
+    return _lookup(values, {label: i for i, label in enumerate(labels)}, len(labels), missing)
+
+
+def _flag(values):
+    """Boolean column using Python truthiness (None -> False)."""
+    arr = np.asarray(values)
+    if arr.dtype == bool:
+        return arr
+    if arr.dtype.kind in "US":
+        return arr != ""
+    if arr.dtype.kind == "O":
+        arr = np.where(arr == None, False, arr)  # noqa: E711 - elementwise None test
+    return arr.astype(bool)
+
+
+def _round(values, ndigits, factor=1):
+    """
+    Round values * factor the way the scalar calculators' round(x, ndigits) does.
+
+    np.round scales by 10**ndigits first, which can land on the other side of
+    a .5 tie than Python's correctly rounded round(); the few rows that sit
+    close to a tie are rounded with round() itself. A factor (a power of ten,
+    possibly negative) is folded into that scaling.
+    """
+    scale = 10.0 ** ndigits
+    scaled = values * (factor * scale)
+    out = np.rint(scaled)
+    # scaled becomes |scaled - rint(scaled)|, which is at most 0.5 and 0.5 at a tie.
+    scaled -= out
+    np.abs(scaled, out=scaled)
+    out /= scale  # what np.round(values * factor, ndigits) computes
+    near_tie = scaled > 0.5 - 1e-6
+    if near_tie.any():
+        idx = np.flatnonzero(near_tie)
+        out[idx] = [round(v * factor, ndigits) for v in values[idx].tolist()]
+    return out
+
+
+# ---------------- Derived measurements
+
+def ratio_batch(a, b):
+    """Vectorized ratio: NaN where either side is missing or b <= 0."""
+    a = _numeric(a)
+    b = _numeric(b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = _round(a / b, 2)
+    out[~(b > 0)] = np.nan
+    return out
+
+
+RISK_CATEGORY_EDGES = (5.0, 7.5, 20.0)
+RISK_CATEGORIES = ("Low", "Moderate", "High", "Very High")
+RISK_CATEGORY_LABELS = np.array(list(RISK_CATEGORIES) + [None], dtype=object)
+
+
+def percent_band_batch(p):
+    """percent_category as an int8 index into RISK_CATEGORIES, -1 for NaN risks."""
+    p = _numeric(p)
+    band = np.searchsorted(RISK_CATEGORY_EDGES, p, side="right").astype(np.int8)
+    band[np.isnan(p)] = -1
+    return band
+
+
+def percent_category_batch(p):
+    """Vectorized percent_category: None for NaN risks."""
+    p = _numeric(p)
+    band = np.searchsorted(RISK_CATEGORY_EDGES, p, side="right")
+    band[np.isnan(p)] = len(RISK_CATEGORY_EDGES) + 1
+    return RISK_CATEGORY_LABELS.take(band)
+
+
+# ---------------- AHA PREVENT
+
+AHA_PREVENT_COEFFICIENT_MATRIX = np.array(AHA_PREVENT_COEFFICIENTS)
+AHA_PREVENT_MEAN_SUM_ARRAY = np.array(AHA_PREVENT_MEAN_SUM)
+AHA_PREVENT_BASELINE_SURVIVAL_ARRAY = np.array(AHA_PREVENT_BASELINE_SURVIVAL)
+
+
+def calculate_aha_prevent_batch(age, sex, race, tc, hdl, sbp, bp_treated, diabetes, smoking):
+    """
+    Vectorized calculate_aha_prevent over column arrays.
+
+    Rows with a missing age, sex, TC, HDL or SBP, an age outside 40-79, or a
+    non-positive lipid/SBP value (where the scalar function's math.log would
+    raise) score NaN.
+    """
+    age = _numeric(age)
+    tc = _numeric(tc)
+    hdl = _numeric(hdl)
+    sbp = _numeric(sbp)
+    sex_code = _encode(sex, ("Female",), missing=-1)
+    treated = _flag(bp_treated)
+    n = age.shape[0]
+
+    valid = ~(np.isnan(age) | np.isnan(tc) | np.isnan(hdl) | np.isnan(sbp)) & (sex_code >= 0)
+    valid &= (age >= 40) & (age <= 79)
+    valid &= (tc > 0) & (hdl > 0) & (sbp > 0)
+
+    risk = np.full(n, np.nan)
+    if not valid.any():
+        return risk
+
+    idx = np.flatnonzero(valid)
+    ln_age = np.log(age[idx])
+    ln_tc = np.log(tc[idx])
+    ln_hdl = np.log(hdl[idx])
+    ln_sbp = np.log(sbp[idx])
+    ln_sbp_treated = np.where(treated[idx], ln_sbp, 0.0)
+    ln_sbp_untreated = np.where(treated[idx], 0.0, ln_sbp)
+    smoker = (_encode(smoking, ("Current",))[idx] == 0).astype(float)
+    dm = (_encode(diabetes, ("Yes",))[idx] == 0).astype(float)
+    stratum = 2 * (_encode(race, ("Black",))[idx] == 0) + (sex_code[idx] == 0)
+
+    terms = {
+        "ln_age": ln_age, "ln_age_sq": ln_age * ln_age,
+        "ln_tc": ln_tc, "ln_age_tc": ln_age * ln_tc,
+        "ln_hdl": ln_hdl, "ln_age_hdl": ln_age * ln_hdl,
+        "ln_sbp_treated": ln_sbp_treated, "ln_age_sbp_treated": ln_age * ln_sbp_treated,
+        "ln_sbp_untreated": ln_sbp_untreated, "ln_age_sbp_untreated": ln_age * ln_sbp_untreated,
+        "smoker": smoker, "ln_age_smoker": ln_age * smoker, "dm": dm,
+    }
+    basis = np.column_stack([terms[name] for name in AHA_PREVENT_TERMS])
+
+    # One matrix-vector product per stratum present in the chunk.
+    individual_sum = np.empty(idx.shape[0])
+    for s in np.unique(stratum):
+        m = stratum == s
+        individual_sum[m] = basis[m] @ AHA_PREVENT_COEFFICIENT_MATRIX[s]
+    mean_sum = AHA_PREVENT_MEAN_SUM_ARRAY.take(stratum)
+    baseline_survival = AHA_PREVENT_BASELINE_SURVIVAL_ARRAY.take(stratum)
+
+    with np.errstate(over="ignore"):
+        risk_10yr = (1 - np.power(baseline_survival, np.exp(individual_sum - mean_sum))) * 100
+    risk[idx] = _round(np.minimum(risk_10yr, 100), 1)
+    return risk
+
+
+# ---------------- QRISK3
+
+QRISK3_ETHNICITY_CODES = {"Indian": 9, "South Asian": 9, "White": 1, "Black": 3, "Other": 1}
+QRISK3_SMOKING_CODES = {"Never": 0, "Former": 2, "Current": 4}
+
+# Sex-specific parameters, indexed [male, female]
+QRISK3_PARAMS = {
+    "survivor": (0.977268, 0.988876),
+    "age": (0.9, 0.8),
+    "smoking": (0.18, 0.13),
+    "diabetes": (0.59, 0.86),
+    "sbp": (0.012, 0.013),
+    "tc_hdl": (0.17, 0.15),
+    "family_cvd": (0.54, 0.45),
+    "ckd": (0.65, 0.60),
+    "atrial_fib": (0.58, 0.50),
+    "rheumatoid_arthritis": (0.40, 0.35),
+    "south_asian": (0.40, 0.35),
+}
+
+# BMI band parameters (<20, 20-25, 25-30, >=30), one row per sex [male, female]
+QRISK3_BMI_EDGES = (20.0, 25.0, 30.0)
+QRISK3_BMI_PARAMS = np.array([[0.0, 0.10, 0.20, 0.48],
+                              [0.0, 0.12, 0.23, 0.56]])
+
+
+def bmi_calc_batch(height, weight):
+    """Vectorized bmi_calc: NaN where height/weight is missing or height <= 0."""
+    height = _numeric(height)
+    weight = _numeric(weight)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bmi = _round(weight / ((height / 100) ** 2), 1)
+    bmi[~(height > 0)] = np.nan
+    return bmi
+
+
+def _bmi_cut(edge):
+    """Smallest float x with round(x, 1) >= edge, i.e. bmi_calc's rounding reaching edge."""
+    x = edge - 0.05
+    while round(x, 1) >= edge:
+        x = math.nextafter(x, -math.inf)
+    while round(x, 1) < edge:
+        x = math.nextafter(x, math.inf)
+    return x
+
+
+# Coefficients of the continuous terms (the age one per year), indexed
+# [male, female, male with age outside 25-84, female with age outside 25-84].
+QRISK3_CONTINUOUS_PARAMS = {
+    "age": np.array(QRISK3_PARAMS["age"] + (np.nan, np.nan)) / 10,
+    "sbp": np.array(QRISK3_PARAMS["sbp"] * 2),
+    "tc_hdl": np.array(QRISK3_PARAMS["tc_hdl"] * 2),
+}
+
+# The rounded BMI is >= an edge exactly when the unrounded one is >= its cut,
+# so calculate_qrisk3_batch bands BMI without rounding it.
+QRISK3_BMI_CUTS = tuple(_bmi_cut(edge) for edge in QRISK3_BMI_EDGES)
+
+
+@lru_cache(maxsize=64)
+def _qrisk3_table(sex_labels, ethnicity_labels, smoking_labels, diabetes_labels):
+    """
+    The part of the QRISK3 score that only depends on the discrete inputs, for every combination.
+
+    The flat index has the digits sex, ethnicity, smoking, diabetes,
+    family_cvd, ckd, atrial_fib, rheumatoid_arthritis and BMI band, each
+    category digit being its column's code + 1 (0 = missing). Entries hold
+    the discrete terms, the constant parts of the age, SBP and TC/HDL terms
+    and log(-log(survivor)), and are NaN where sex is missing. Read-only.
+    """
+    def axis(labels, value):
+        return np.array([value(None)] + [value(label) for label in labels], dtype=float)
+
+    south_asian = axis(ethnicity_labels, lambda label: QRISK3_ETHNICITY_CODES.get(label, 1) == 9)
+    smoking = axis(smoking_labels, lambda label: QRISK3_SMOKING_CODES.get(label, 0))
+    diabetes = axis(diabetes_labels, lambda label: label == "Yes")
+
+    blocks = []
+    for sex in (0, 1):
+        p = {name: values[sex] for name, values in QRISK3_PARAMS.items()}
+        table = np.float64(0.0)
+        for values in (south_asian * p["south_asian"], smoking * p["smoking"], diabetes * p["diabetes"],
+                       (0, p["family_cvd"]), (0, p["ckd"]), (0, p["atrial_fib"]), (0, p["rheumatoid_arthritis"]),
+                       QRISK3_BMI_PARAMS[sex]):
+            table = np.add.outer(table, values)
+        table += -4.0 * p["age"] - 120 * p["sbp"] - 4 * p["tc_hdl"] + math.log(-math.log(p["survivor"]))
+        blocks.append(table.ravel())
+    missing = np.full(blocks[0].shape, np.nan)
+    # "Female" picks the female parameters and any other label the male ones, as in calculate_qrisk3.
+    table = np.concatenate([missing] + [missing if label == "" else blocks[label == "Female"]
+                                        for label in sex_labels])
+    table.setflags(write=False)
+    return table
+
+
+# Rows per block in calculate_qrisk3_batch, small enough for the block's
+# temporaries to stay in cache.
+QRISK3_BLOCK_ROWS = 1 << 15
+
+
+def _qrisk3_block(table, female_code, category_codes, flags, age, sbp, tc_hdl_ratio, height, weight):
+    """Rounded QRISK3 risk for one block of rows; category_codes holds (codes, labels) per category column."""
+    # Mixed-radix index into table in int16 (it stays far below 2**15
+    # entries); the +1 of every category digit and the band's base of 2 are
+    # added at the end as one offset.
+    codes, _ = category_codes[0]
+    # Column into QRISK3_CONTINUOUS_PARAMS: 0/1 for male/female rows, plus 2
+    # where the age is outside 25-84 (NaN age coefficient). NaN ages already
+    # score NaN.
+    sex_age = np.add(age < 25, age > 84, dtype=np.intp)
+    sex_age *= 2
+    sex_age += codes == female_code
+    index = codes.astype(np.int16)
+    offset = 1
+    for codes, labels in category_codes[1:]:
+        index *= len(labels) + 1
+        index += codes
+        offset = offset * (len(labels) + 1) + 1
+    for flag in flags:
+        index *= 2
+        index += flag
+        offset *= 2
+
+    # BMI band as 2 - (bmi < 20) - (bmi < 25) + (bmi >= 30), on the unrounded
+    # BMI (see QRISK3_BMI_CUTS). A missing BMI (NaN) compares False throughout
+    # and lands in the 25-30 band, as the scalar fallback to 25 does.
+    bmi = height / 100
+    np.square(bmi, out=bmi)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(weight, bmi, out=bmi)
+    no_height = height <= 0
+    if no_height.any():
+        bmi[no_height] = np.nan
+    index *= 4
+    index -= bmi < QRISK3_BMI_CUTS[0]
+    index -= bmi < QRISK3_BMI_CUTS[1]
+    index += bmi >= QRISK3_BMI_CUTS[2]
+    index = np.add(index, offset * 4 + 2, dtype=np.intp)
+
+    score = table.take(index)
+    for name, values in (("age", age), ("sbp", sbp), ("tc_hdl", tc_hdl_ratio)):
+        term = QRISK3_CONTINUOUS_PARAMS[name].take(sex_age)
+        term *= values
+        score += term
+
+    # 100 * (1 - survivor ** exp(score)), with log(-log(survivor)) already in score
+    with np.errstate(over="ignore", invalid="ignore"):
+        risk = np.exp(score, out=score)
+        np.negative(risk, out=risk)
+        np.expm1(risk, out=risk)
+    return _round(risk, 1, factor=-100)
+
+
+def calculate_qrisk3_batch(age, sex, ethnicity, smoking, diabetes, height, weight, sbp, tc_hdl_ratio, antihtn, family_cvd, ckd, atrial_fib, rheumatoid_arthritis, migraine):
+    """
+    Vectorized calculate_qrisk3 over column arrays.
+
+    Rows with a missing age, sex, TC/HDL ratio or SBP, or an age outside
+    25-84, score NaN. A missing BMI falls back to 25 as in the scalar path.
+
+    The discrete inputs are folded into one index into the _qrisk3_table()
+    of this call's category labels, so a row costs a few small-integer
+    operations, one gather, three multiply-adds, exp, expm1 and one rounding
+    pass, done QRISK3_BLOCK_ROWS rows at a time. Category columns are
+    fastest as pandas categoricals; object (str) columns still need one
+    hash lookup per row and label. `python -m benchmarks.bench_calculators`
+    compares both with a plain loop of calculate_qrisk3.
+    """
+    columns = [_numeric(values) for values in (age, sbp, tc_hdl_ratio, height, weight)]
+    flags = [_flag(values) for values in (family_cvd, ckd, atrial_fib, rheumatoid_arthritis)]
+    category_codes = [
+        _codes(sex, ("Female",)),
+        _codes(ethnicity, tuple(QRISK3_ETHNICITY_CODES)),
+        _codes(smoking, tuple(QRISK3_SMOKING_CODES)),
+        _codes(diabetes, ("Yes",)),
+    ]
+    sex_labels = category_codes[0][1]
+    table = _qrisk3_table(*(labels for _, labels in category_codes))
+    female_code = sex_labels.index("Female") if "Female" in sex_labels else len(sex_labels)
+
+    rows = len(columns[0])
+    risk = np.empty(rows)
+    for start in range(0, rows, QRISK3_BLOCK_ROWS):
+        block = slice(start, start + QRISK3_BLOCK_ROWS)
+        risk[block] = _qrisk3_block(
+            table, female_code, [(codes[block], labels) for codes, labels in category_codes],
+            [flag[block] for flag in flags], *(values[block] for values in columns),
+        )
+    return risk
+
+
+# ---------------- LAI 2023
+
+LAI_CATEGORY_LABELS = np.array(["Low", "Moderate", "High", "Very High"], dtype=object)
+
+
+def lai_level_batch(ascvd, ckd, diabetes, duration, smoke, mets, fh_fh, lpa, apob, prem_ascvd, fh_dm, fh_htn):
+    """LAI 2023 category as an int8 index into LAI_CATEGORY_LABELS."""
+    dm = _encode(diabetes, ("Yes",)) == 0
+    duration = _numeric(duration)
+    lpa = _numeric(lpa)
+    apob = _numeric(apob)
+    risk_enhancers = (_encode(smoke, ("Current",)) == 0) | _flag(mets) | _flag(fh_fh) | (lpa > 50) | (apob > 130)
+    very_high = _flag(ascvd) | _flag(ckd) | (dm & (duration >= 10))
+    high = dm | risk_enhancers
+    moderate = _flag(prem_ascvd) | _flag(fh_dm) | _flag(fh_htn)
+    return np.where(very_high, 3, np.where(high, 2, np.where(moderate, 1, 0))).astype(np.int8)
+
+
+def calculate_lai_category_batch(ascvd, ckd, diabetes, duration, smoke, mets, fh_fh, lpa, apob, prem_ascvd, fh_dm, fh_htn):
+    """Vectorized calculate_lai_category; every row gets a category."""
+    level = lai_level_batch(ascvd, ckd, diabetes, duration, smoke, mets, fh_fh, lpa, apob, prem_ascvd, fh_dm, fh_htn)
+    return LAI_CATEGORY_LABELS.take(level)
+
+
+# ---------------- Contributing factors
+
+# Bit i of a factor mask is set when rule i of the score's table in
+# cv_risk_core.factors applies; these are the rule names in bit order.
+AHA_FACTOR_BITS = tuple(rule.name for rule in AHA_FACTOR_RULES)
+QRISK3_FACTOR_BITS = tuple(rule.name for rule in QRISK3_FACTOR_RULES)
+LAI_FACTOR_BITS = tuple(rule.name for rule in LAI_FACTOR_RULES)
+
+
+def _condition_batch(condition, columns):
+    field, op, target = condition
+    values = columns[field]
+    if op == "flag":
+        return _flag(values)
+    if op == "==":
+        return _encode(values, (target,)) == 0
+    if op == "in":
+        return _encode(values, tuple(target)) < len(target)
+    values = _numeric(values)
+    return (values != 0) & ((values >= target) if op == ">=" else (values < target))
+
+
+def factor_mask_batch(rules, columns):
+    """
+    Vectorized factors.factor_mask: one uint16 mask per row.
+
+    columns maps each field the rules refer to onto a column. Conditions
+    shared between rules are evaluated once.
+    """
+    n = len(next(iter(columns.values())))
+    mask = np.zeros(n, dtype=np.uint16)
+    conditions = {}
+    matched_groups = {}
+    for i, rule in enumerate(rules):
+        hit = np.ones(n, dtype=bool)
+        for condition in rule.conditions:
+            if condition not in conditions:
+                conditions[condition] = _condition_batch(condition, columns)
+            hit &= conditions[condition]
+        if rule.group is not None:
+            matched = matched_groups.setdefault(rule.group, np.zeros(n, dtype=bool))
+            hit &= ~matched
+            matched |= hit
+        mask |= hit.astype(np.uint16) << np.uint16(i)
+    return mask
+
+
+def aha_factor_mask_batch(age, sex, tc, hdl, sbp, bp_treated, diabetes, smoking):
+    """Vectorized get_contributing_factors_aha as bitmasks over AHA_FACTOR_BITS."""
+    return factor_mask_batch(AHA_FACTOR_RULES, {"age": age, "tc": tc, "hdl": hdl, "sbp": sbp,
+                                                "diabetes": diabetes, "smoking": smoking})
+
+
+def qrisk3_factor_mask_batch(age, sex, smoking, diabetes, bmi, sbp, tc_hdl_ratio, family_cvd, ckd, atrial_fib, rheumatoid_arthritis, ethnicity):
+    """Vectorized get_contributing_factors_qrisk as bitmasks over QRISK3_FACTOR_BITS."""
+    return factor_mask_batch(QRISK3_FACTOR_RULES, {
+        "age": age, "smoking": smoking, "diabetes": diabetes, "bmi": bmi, "sbp": sbp,
+        "tc_hdl_ratio": tc_hdl_ratio, "family_cvd": family_cvd, "ckd": ckd, "atrial_fib": atrial_fib,
+        "rheumatoid_arthritis": rheumatoid_arthritis, "ethnicity": ethnicity,
+    })
+
+
+def lai_factor_mask_batch(ascvd, ckd, diabetes, duration, smoke, mets, fh_fh, lpa, apob, prem_ascvd, fh_dm, fh_htn, ldl):
+    """Vectorized get_contributing_factors_lai as bitmasks over LAI_FACTOR_BITS."""
+    return factor_mask_batch(LAI_FACTOR_RULES, {
+        "ascvd": ascvd, "ckd": ckd, "diabetes": diabetes, "duration": duration, "smoke": smoke, "mets": mets,
+        "fh_fh": fh_fh, "lpa": lpa, "apob": apob, "ldl": ldl, "prem_ascvd": prem_ascvd, "fh_dm": fh_dm,
+        "fh_htn": fh_htn,
+    })
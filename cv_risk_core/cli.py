@@ -0,0 +1,138 @@
+"""
+Command-line scorer for one patient at a time.
+
+Prints QRISK3, AHA PREVENT, the LAI 2023 category and the unified
+recommendation (generate_fallback_summary) for a patient given as flags or
+as a JSON object on stdin, with the clinical_inputs() field names:
+
+    python -m cv_risk_core.cli --age 58 --sex Male --sbp 146 --tc 224 --hdl 39 --smoking Current --antihtn
+    echo '{"age": 58, "sex": "Male", "sbp": 146, "tc": 224, "hdl": 39}' | python -m cv_risk_core.cli --json
+
+--serve-stdin keeps one process warm and scores newline-delimited JSON
+patients from stdin, writing one JSON result line per input line (an
+{"error": ...} line for a patient that cannot be scored, e.g. a value
+outside the app's input limits). An optional "id" field is echoed back.
+Sex, ethnicity, smoking and diabetes default to the app's defaults (Male,
+Indian, Never, No) when not given.
+
+Only the standard library and the import-light calculation core are loaded
+(no Streamlit, NumPy or pandas), so a cold start is dominated by the Python
+interpreter itself.
+"""
+
+import argparse
+import json
+import sys
+
+from .assessment import CATEGORY_FIELDS, FLAG_FIELDS, NUMERIC_FIELDS, assess, clinical_inputs
+from .recommendations import generate_fallback_summary
+from .validation import CATEGORY_CHOICES, validate_patient
+
+ID_FIELD = "id"
+
+
+def score_patient(patient):
+    """
+    Scores and summary for a dict of clinical_inputs() fields (plus an optional "id").
+
+    Category fields that are not given take the app's defaults. Raises
+    ValueError for values outside the app's input limits.
+    """
+    patient = dict(patient)
+    patient_id = patient.pop(ID_FIELD, None)
+    for name, choices in CATEGORY_CHOICES.items():
+        if patient.get(name) is None:
+            patient[name] = choices[0]
+    errors = validate_patient(patient)
+    if errors:
+        raise ValueError("invalid patient: " + "; ".join(errors))
+    result = assess(clinical_inputs(**patient))
+    scored = {} if patient_id is None else {ID_FIELD: patient_id}
+    scored.update({
+        "qrisk3": result.qrisk,
+        "qrisk3_category": result.qrisk_cat,
+        "aha_prevent": result.aha,
+        "aha_prevent_category": result.aha_cat,
+        "lai_category": result.lai,
+        "summary": generate_fallback_summary(result.aha_cat, result.qrisk_cat, result.lai),
+    })
+    return scored
+
+
+def format_text(scored):
+    def percent(score, category):
+        return f"{score}% ({category})" if score is not None else "not calculable"
+
+    return "\n".join([
+        f"QRISK3:       {percent(scored['qrisk3'], scored['qrisk3_category'])}",
+        f"AHA PREVENT:  {percent(scored['aha_prevent'], scored['aha_prevent_category'])}",
+        f"LAI 2023:     {scored['lai_category']}",
+        "",
+        scored["summary"],
+    ])
+
+
+def serve_stdin(stdin, stdout):
+    """Score newline-delimited JSON patients until EOF; returns the number of lines answered."""
+    answered = 0
+    for line in stdin:
+        if not line.strip():
+            continue
+        patient = None
+        try:
+            patient = json.loads(line)
+            if not isinstance(patient, dict):
+                raise ValueError("expected a JSON object with the patient's fields")
+            scored = score_patient(patient)
+        except (TypeError, ValueError, ArithmeticError) as exc:
+            scored = {"error": str(exc)}
+            if isinstance(patient, dict) and ID_FIELD in patient:
+                scored = {ID_FIELD: patient[ID_FIELD], **scored}
+        stdout.write(json.dumps(scored) + "\n")
+        stdout.flush()
+        answered += 1
+    return answered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cv_risk_core.cli",
+        description="Score one patient with QRISK3, AHA PREVENT and LAI 2023.",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--json", action="store_true", help="read the patient as a JSON object from stdin (flags override it)")
+    mode.add_argument("--serve-stdin", action="store_true", help="score newline-delimited JSON patients from stdin until EOF")
+    parser.add_argument("--format", choices=("text", "json"), default="text", help="output format (default: %(default)s)")
+    fields = parser.add_argument_group("patient fields")
+    for name in NUMERIC_FIELDS:
+        fields.add_argument(f"--{name.replace('_', '-')}", dest=name, type=float, metavar="N")
+    for name in CATEGORY_FIELDS:
+        fields.add_argument(f"--{name.replace('_', '-')}", dest=name, choices=CATEGORY_CHOICES[name])
+    for name in FLAG_FIELDS:
+        fields.add_argument(f"--{name.replace('_', '-')}", dest=name, action="store_true", default=None)
+    args = parser.parse_args(argv)
+
+    if args.serve_stdin:
+        serve_stdin(sys.stdin, sys.stdout)
+        return 0
+
+    patient = {}
+    if args.json:
+        try:
+            patient = json.load(sys.stdin)
+        except ValueError as exc:
+            parser.error(f"invalid JSON on stdin: {exc}")
+        if not isinstance(patient, dict):
+            parser.error("expected a JSON object with the patient's fields on stdin")
+    patient.update({name: value for name in NUMERIC_FIELDS + CATEGORY_FIELDS + FLAG_FIELDS
+                    if (value := getattr(args, name)) is not None})
+    try:
+        scored = score_patient(patient)
+    except (TypeError, ValueError, ArithmeticError) as exc:
+        parser.error(str(exc))
+    print(json.dumps(scored, indent=2) if args.format == "json" else format_text(scored))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
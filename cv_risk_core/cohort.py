@@ -0,0 +1,362 @@
+"""
+Streaming cohort scoring for CSV and Parquet patient files.
+
+Reads the input in fixed-size chunks, scores each chunk with the vectorized
+QRISK3, AHA PREVENT and LAI 2023 engines, and appends the results to the
+output file before reading the next chunk, so memory use does not grow with
+the input size.
+
+Columnar outputs (Parquet, or an Arrow IPC file with .arrow/.feather, which
+readers can memory-map) use compact types: float32 risks, dictionary-encoded
+categories and uint16 contributing-factor bitmasks over the *_FACTOR_BITS in
+cv_risk_core.batch. CSV output carries the risks and category labels only.
+
+Lab columns are in mg/dL unless the file has a matching unit-tag column
+(tc_unit, ldl_unit, hdl_unit, apob_unit, lpa_unit; e.g. "mmol/L" or
+"nmol/L" per row), in which case they are converted column-wise by
+cv_risk_core.units before scoring.
+
+Every chunk is first checked by cv_risk_core.validation against the app's
+input limits. Rows that fail are not scored (empty risks and categories)
+and score_file() can write them, with their input row number and the
+reasons, to a quarantine file.
+
+    python -m cv_risk_core.cohort patients.csv scores.csv --keep patient_id
+    python -m cv_risk_core.cohort patients.csv scores.arrow --keep patient_id
+    python -m cv_risk_core.cohort patients.csv scores.csv --quarantine rejected.csv
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .batch import (
+    LAI_CATEGORY_LABELS,
+    RISK_CATEGORIES,
+    aha_factor_mask_batch,
+    bmi_calc_batch,
+    calculate_aha_prevent_batch,
+    calculate_qrisk3_batch,
+    lai_factor_mask_batch,
+    lai_level_batch,
+    percent_band_batch,
+    qrisk3_factor_mask_batch,
+    ratio_batch,
+)
+from .units import column_to_mg_dl
+from .validation import error_messages, validate_chunk
+
+NUMERIC_COLUMNS = ("age", "height", "weight", "sbp", "tc", "ldl", "hdl", "apob", "lpa", "dm_duration")
+CATEGORY_COLUMNS = ("sex", "ethnicity", "smoking", "diabetes")
+# Optional per-row unit tags ("mmol/L", "nmol/L", ...) for the lab columns; untagged rows are mg/dL.
+UNIT_COLUMNS = tuple(f"{name}_unit" for name in ("tc", "ldl", "hdl", "apob", "lpa"))
+FLAG_COLUMNS = (
+    "antihtn", "mi", "stroke", "pad", "revasc", "ckd", "mets", "atrial_fib",
+    "rheumatoid_arthritis", "migraine", "prem_ascvd", "fh_dm", "fh_htn", "fh_fh",
+)
+OUTPUT_COLUMNS = ("qrisk3", "qrisk3_category", "aha_prevent", "aha_prevent_category", "lai_category")
+FACTOR_COLUMNS = ("qrisk3_factors", "aha_prevent_factors", "lai_factors")
+
+TRUTHY = ("1", "true", "yes", "y", "t")
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _numeric_column(chunk, name):
+    if name not in chunk:
+        return np.full(len(chunk), np.nan)
+    return pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=float)
+
+
+def _category_column(chunk, name):
+    if name not in chunk:
+        return np.full(len(chunk), "")
+    col = chunk[name]
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return col
+    return col.astype("category")
+
+
+def _flag_column(chunk, name):
+    if name not in chunk:
+        return np.zeros(len(chunk), dtype=bool)
+    col = chunk[name]
+    if col.dtype == bool:
+        return col.to_numpy()
+    if pd.api.types.is_numeric_dtype(col):
+        return (col.fillna(0) != 0).to_numpy()
+    return col.astype(str).str.strip().str.lower().isin(TRUTHY).to_numpy()
+
+
+def chunk_columns(chunk):
+    """Typed input columns for one DataFrame of patients, keyed by column name; lab values in mg/dL."""
+    columns = {name: _numeric_column(chunk, name) for name in NUMERIC_COLUMNS}
+    for tag in UNIT_COLUMNS:
+        if tag in chunk:
+            name = tag[:-len("_unit")]
+            # Rows with a unit the analyte cannot be given in become NaN; validate_chunk() reports them.
+            columns[name] = column_to_mg_dl(name, columns[name], chunk[tag], errors="coerce")
+    columns.update({name: _category_column(chunk, name) for name in CATEGORY_COLUMNS})
+    columns.update({name: _flag_column(chunk, name) for name in FLAG_COLUMNS})
+    return columns
+
+
+def score_columns(c, factors=False):
+    """
+    Score typed input columns; returns the qrisk3/aha_prevent risks and LAI levels.
+
+    With factors=True the contributing-factor bitmasks (FACTOR_COLUMNS) are
+    returned as well.
+    """
+    tc_hdl_ratio = ratio_batch(c["tc"], c["hdl"])
+    qrisk = calculate_qrisk3_batch(
+        c["age"], c["sex"], c["ethnicity"], c["smoking"], c["diabetes"],
+        c["height"], c["weight"], c["sbp"], tc_hdl_ratio, c["antihtn"],
+        c["prem_ascvd"], c["ckd"], c["atrial_fib"], c["rheumatoid_arthritis"], c["migraine"],
+    )
+    aha = calculate_aha_prevent_batch(
+        c["age"], c["sex"], c["ethnicity"], c["tc"], c["hdl"], c["sbp"],
+        c["antihtn"], c["diabetes"], c["smoking"],
+    )
+    ascvd = c["mi"] | c["stroke"] | c["pad"] | c["revasc"]
+    lai_level = lai_level_batch(
+        ascvd, c["ckd"], c["diabetes"], c["dm_duration"], c["smoking"], c["mets"],
+        c["fh_fh"], c["lpa"], c["apob"], c["prem_ascvd"], c["fh_dm"], c["fh_htn"],
+    )
+    scores = {"qrisk3": qrisk, "aha_prevent": aha, "lai_level": lai_level}
+    if factors:
+        scores["qrisk3_factors"] = qrisk3_factor_mask_batch(
+            c["age"], c["sex"], c["smoking"], c["diabetes"], bmi_calc_batch(c["height"], c["weight"]),
+            c["sbp"], tc_hdl_ratio, c["prem_ascvd"], c["ckd"], c["atrial_fib"], c["rheumatoid_arthritis"],
+            c["ethnicity"],
+        )
+        scores["aha_prevent_factors"] = aha_factor_mask_batch(
+            c["age"], c["sex"], c["tc"], c["hdl"], c["sbp"], c["antihtn"], c["diabetes"], c["smoking"],
+        )
+        scores["lai_factors"] = lai_factor_mask_batch(
+            ascvd, c["ckd"], c["diabetes"], c["dm_duration"], c["smoking"], c["mets"], c["fh_fh"],
+            c["lpa"], c["apob"], c["prem_ascvd"], c["fh_dm"], c["fh_htn"], c["ldl"],
+        )
+    return scores
+
+
+def blank_invalid(scores, invalid):
+    """score_columns results with the rows that failed validation unscored."""
+    if not invalid.any():
+        return scores
+    blanked = {}
+    for name, values in scores.items():
+        values = values.copy()
+        # NaN risks, LAI level -1 (no category), no contributing factors.
+        values[invalid] = np.nan if values.dtype.kind == "f" else -1 if name == "lai_level" else 0
+        blanked[name] = values
+    return blanked
+
+
+def output_frame(chunk, scores, keep=()):
+    """Assemble the output DataFrame for a chunk from score_columns results."""
+    out = pd.DataFrame({name: chunk[name].to_numpy() for name in keep})
+    # Categories are built from their integer codes, never from per-row strings.
+    out["qrisk3"] = scores["qrisk3"]
+    out["qrisk3_category"] = pd.Categorical.from_codes(percent_band_batch(scores["qrisk3"]), RISK_CATEGORIES)
+    out["aha_prevent"] = scores["aha_prevent"]
+    out["aha_prevent_category"] = pd.Categorical.from_codes(percent_band_batch(scores["aha_prevent"]),
+                                                            RISK_CATEGORIES)
+    out["lai_category"] = pd.Categorical.from_codes(scores["lai_level"], LAI_CATEGORY_LABELS)
+    for name in FACTOR_COLUMNS:
+        if name in scores:
+            out[name] = scores[name]
+    return out
+
+
+def score_chunk(chunk, keep=(), factors=False, validation=None):
+    """
+    Score one DataFrame of patients; returns the output columns as a DataFrame.
+
+    Rows that fail validation (validate_chunk(chunk) unless given) are left unscored.
+    """
+    if validation is None:
+        validation = validate_chunk(chunk)
+    return output_frame(chunk, blank_invalid(score_columns(chunk_columns(chunk), factors), validation.invalid), keep)
+
+
+def quarantine_frame(chunk, validation, first_row=0):
+    """The invalid rows of a chunk with their input row number (0-based, from first_row) and errors."""
+    rows = validation.invalid
+    out = chunk[rows].reset_index(drop=True)
+    out.insert(0, "input_row", np.flatnonzero(rows) + first_row)
+    out["errors"] = error_messages(validation)[rows]
+    return out
+
+
+def _is_parquet(path):
+    return str(path).lower().endswith((".parquet", ".pq"))
+
+
+def _is_arrow(path):
+    return str(path).lower().endswith((".arrow", ".feather", ".ipc"))
+
+
+def is_columnar(path):
+    """True for output paths written with the compact Arrow types (and factor bitmasks)."""
+    return _is_parquet(path) or _is_arrow(path)
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most chunk_size rows from a CSV or Parquet file."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        dtype = {name: "category" for name in CATEGORY_COLUMNS + UNIT_COLUMNS}
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=dtype)
+
+
+def arrow_output_types():
+    """Arrow types of the score columns in columnar output."""
+    import pyarrow as pa
+
+    category = pa.dictionary(pa.int8(), pa.string())
+    return {
+        "qrisk3": pa.float32(),
+        "qrisk3_category": category,
+        "aha_prevent": pa.float32(),
+        "aha_prevent_category": category,
+        "lai_category": category,
+        **{name: pa.uint16() for name in FACTOR_COLUMNS},
+    }
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV, Parquet or Arrow IPC file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = _is_parquet(path)
+        self.columnar = is_columnar(path)
+        self._writer = None
+        self._schema = None
+        self._started = False
+
+    def _open(self, schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Fix the score column types up front: a first chunk with no
+        # calculable rows would otherwise infer them as null.
+        for name, kind in arrow_output_types().items():
+            index = schema.get_field_index(name)
+            if index >= 0:
+                schema = schema.set(index, pa.field(name, kind))
+        schema = schema.remove_metadata()
+        self._schema = schema
+        if self.parquet:
+            return pq.ParquetWriter(self.path, schema)
+        return pa.ipc.new_file(self.path, schema)
+
+    def write(self, frame):
+        if self.columnar:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = self._open(table.schema)
+            self._writer.write_table(table.cast(self._schema))
+        else:
+            frame.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def default_quarantine_path(output_path):
+    """scores.parquet -> scores.rejected.csv"""
+    return os.path.splitext(str(output_path))[0] + ".rejected.csv"
+
+
+def score_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, keep=(), progress=None, workers=1,
+               quarantine_path=None):
+    """
+    Score every patient in input_path and write the results to output_path.
+
+    With workers > 1 each chunk is split across a process pool (see
+    cv_risk_core.parallel). Contributing-factor bitmasks are written to
+    columnar outputs. Rows that fail validation stay in the output unscored
+    and, given quarantine_path, are also written there (see
+    quarantine_frame; the file is only created when a row fails). progress,
+    if given, is called after each chunk with (rows_done, seconds). Returns
+    (rows, seconds, invalid_rows).
+    """
+    rows = invalid_rows = 0
+    start = time.perf_counter()
+    scorer = None
+    if workers > 1:
+        from .parallel import ParallelScorer
+
+        scorer = ParallelScorer(workers)
+    rejects = ChunkWriter(quarantine_path) if quarantine_path else None
+    try:
+        with ChunkWriter(output_path) as writer:
+            factors = writer.columnar
+            for chunk in read_chunks(input_path, chunk_size):
+                validation = validate_chunk(chunk)
+                score = scorer.score if scorer else score_chunk
+                writer.write(score(chunk, keep, factors, validation))
+                if rejects is not None and validation.invalid.any():
+                    rejects.write(quarantine_frame(chunk, validation, rows))
+                invalid_rows += int(validation.invalid.sum())
+                rows += len(chunk)
+                if progress is not None:
+                    progress(rows, time.perf_counter() - start)
+    finally:
+        if rejects is not None:
+            rejects.close()
+        if scorer is not None:
+            scorer.close()
+    return rows, time.perf_counter() - start, invalid_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cv_risk_core.cohort",
+        description="Score a CSV/Parquet patient file with QRISK3, AHA PREVENT and LAI 2023.",
+    )
+    parser.add_argument("input", help="patient file (.csv, .parquet)")
+    parser.add_argument("output", help="scores file (.csv, .parquet, .arrow)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--keep", action="append", default=[], metavar="COLUMN", help="input column to copy to the output (repeatable)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes per chunk (default: %(default)s)")
+    parser.add_argument("--quarantine", metavar="PATH",
+                        help="file for the rows that fail validation (default: OUTPUT stem + .rejected.csv)")
+    parser.add_argument("--quiet", action="store_true", help="only print the final summary")
+    args = parser.parse_args(argv)
+    quarantine_path = args.quarantine or default_quarantine_path(args.output)
+
+    def progress(rows, seconds):
+        if not args.quiet:
+            print(f"{rows:,} rows  {rows / seconds:,.0f} rows/s", file=sys.stderr)
+
+    rows, seconds, invalid_rows = score_file(args.input, args.output, args.chunk_size, args.keep, progress,
+                                            args.workers, quarantine_path)
+    rate = rows / seconds if seconds else 0.0
+    print(f"Scored {rows:,} patients in {seconds:.2f} s ({rate:,.0f} rows/s) -> {args.output}", file=sys.stderr)
+    if invalid_rows:
+        print(f"{invalid_rows:,} of {rows:,} rows failed validation and were not scored -> {quarantine_path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Contributing-factor lists shown under each risk card.
+
+Each score's factors are a declarative rule table. A rule holds when all of
+its conditions hold; rules sharing a group form an if/elif chain in table
+order (only the first match in a group counts). Evaluating a table gives an
+integer bitmask, bit i for rule i, and labels are only formatted from a mask
+when a patient is actually displayed. cv_risk_core.batch evaluates the same
+tables over whole columns.
+
+Conditions are (field, op, value) with op one of:
+    ">=", "<"   numeric comparison; a missing or zero value never matches
+                (the `x and x >= t` of the original if-chains)
+    "=="        category equals value
+    "in"        category is one of value
+    "flag"      truthy (value unused)
+"""
+
+from collections import namedtuple
+
+FactorRule = namedtuple("FactorRule", ["name", "label", "conditions", "group"])
+
+
+def _rule(name, label, *conditions, group=None):
+    return FactorRule(name, label, conditions, group)
+
+
+AHA_FACTOR_RULES = (
+    _rule("age_65", "Advanced age (≥65 years)", ("age", ">=", 65), group="age"),
+    _rule("age_55", "Age >55 years", ("age", ">=", 55), group="age"),
+    _rule("smoking", "Current smoking", ("smoking", "==", "Current")),
+    _rule("diabetes", "Diabetes mellitus", ("diabetes", "==", "Yes")),
+    _rule("high_tc", "High total cholesterol ({tc:.0f} mg/dL)", ("tc", ">=", 240)),
+    _rule("low_hdl", "Low HDL cholesterol ({hdl:.0f} mg/dL)", ("hdl", "<", 40)),
+    _rule("sbp_160", "Severe hypertension (SBP {sbp:.0f} mmHg)", ("sbp", ">=", 160), group="sbp"),
+    _rule("sbp_140", "Stage 2 hypertension (SBP {sbp:.0f} mmHg)", ("sbp", ">=", 140), group="sbp"),
+    _rule("sbp_130", "Stage 1 hypertension (SBP {sbp:.0f} mmHg)", ("sbp", ">=", 130), group="sbp"),
+)
+
+QRISK3_FACTOR_RULES = (
+    _rule("age_70", "Advanced age (≥70 years)", ("age", ">=", 70), group="age"),
+    _rule("age_60", "Age ≥60 years", ("age", ">=", 60), group="age"),
+    _rule("current_smoking", "Current smoking", ("smoking", "==", "Current")),
+    _rule("former_smoking", "Former smoking", ("smoking", "==", "Former")),
+    _rule("diabetes", "Diabetes mellitus", ("diabetes", "==", "Yes")),
+    _rule("bmi_35", "Severe obesity (BMI {bmi:.1f})", ("bmi", ">=", 35), group="bmi"),
+    _rule("bmi_30", "Obesity (BMI {bmi:.1f})", ("bmi", ">=", 30), group="bmi"),
+    _rule("sbp_160", "Severe hypertension (SBP {sbp:.0f} mmHg)", ("sbp", ">=", 160), group="sbp"),
+    _rule("sbp_140", "Hypertension (SBP {sbp:.0f} mmHg)", ("sbp", ">=", 140), group="sbp"),
+    _rule("tc_hdl_6", "High TC/HDL ratio ({tc_hdl_ratio:.1f})", ("tc_hdl_ratio", ">=", 6), group="tc_hdl"),
+    _rule("tc_hdl_5", "Elevated TC/HDL ratio ({tc_hdl_ratio:.1f})", ("tc_hdl_ratio", ">=", 5), group="tc_hdl"),
+    _rule("family_cvd", "Premature family history of CVD", ("family_cvd", "flag", None)),
+    _rule("ckd", "Chronic kidney disease", ("ckd", "flag", None)),
+    _rule("atrial_fib", "Atrial fibrillation", ("atrial_fib", "flag", None)),
+    _rule("rheumatoid_arthritis", "Rheumatoid arthritis", ("rheumatoid_arthritis", "flag", None)),
+    _rule("south_asian", "South Asian ethnicity", ("ethnicity", "in", ("Indian", "South Asian"))),
+)
+
+LAI_FACTOR_RULES = (
+    _rule("ascvd", "Established ASCVD (MI/Stroke/PAD/Revascularization)", ("ascvd", "flag", None)),
+    _rule("ckd", "Chronic kidney disease (stage 3-5)", ("ckd", "flag", None)),
+    _rule("long_diabetes", "Long-standing diabetes ({duration} years)",
+          ("diabetes", "==", "Yes"), ("duration", ">=", 10), group="diabetes"),
+    _rule("diabetes", "Diabetes mellitus", ("diabetes", "==", "Yes"), group="diabetes"),
+    _rule("smoking", "Current smoking", ("smoke", "==", "Current")),
+    _rule("mets", "Metabolic syndrome", ("mets", "flag", None)),
+    _rule("fh_fh", "Familial hypercholesterolemia", ("fh_fh", "flag", None)),
+    _rule("lpa", "Elevated Lp(a) ({lpa:.0f} mg/dL)", ("lpa", ">=", 50)),
+    _rule("apob", "Elevated ApoB ({apob:.0f} mg/dL)", ("apob", ">=", 130)),
+    _rule("ldl_190", "Severe hypercholesterolemia (LDL {ldl:.0f} mg/dL)", ("ldl", ">=", 190), group="ldl"),
+    _rule("ldl_160", "High LDL cholesterol ({ldl:.0f} mg/dL)", ("ldl", ">=", 160), group="ldl"),
+    _rule("prem_ascvd", "Premature ASCVD in first-degree relatives", ("prem_ascvd", "flag", None)),
+    _rule("fh_dm", "Family history of diabetes", ("fh_dm", "flag", None)),
+    _rule("fh_htn", "Family history of hypertension", ("fh_htn", "flag", None)),
+)
+
+# How a field is shown in labels when it needs more than a format spec.
+DISPLAY_CONVERTERS = {"duration": int}
+
+
+class _DisplayValues(dict):
+    def __getitem__(self, field):
+        value = dict.__getitem__(self, field)
+        return DISPLAY_CONVERTERS[field](value) if field in DISPLAY_CONVERTERS else value
+
+
+def _holds(condition, values):
+    field, op, target = condition
+    value = values[field]
+    if op == "flag":
+        return bool(value)
+    if op == "==":
+        return value == target
+    if op == "in":
+        return value in target
+    if not value:
+        return False
+    return value >= target if op == ">=" else value < target
+
+
+def factor_mask(rules, values):
+    """Evaluate a rule table for one patient's values; bit i is set if rules[i] applies."""
+    mask = 0
+    matched_groups = ()
+    for i, rule in enumerate(rules):
+        if rule.group in matched_groups:
+            continue
+        for condition in rule.conditions:
+            if not _holds(condition, values):
+                break
+        else:
+            mask |= 1 << i
+            if rule.group is not None:
+                matched_groups += (rule.group,)
+    return mask
+
+
+def factor_labels(mask, rules, values):
+    """Display strings for the set bits of a mask, in table order."""
+    mask = int(mask)
+    labels = []
+    for i, rule in enumerate(rules):
+        if mask >> i & 1:
+            labels.append(rule.label.format_map(_DisplayValues(values)) if "{" in rule.label else rule.label)
+    return labels
+
+
+def _factors(rules, values):
+    return factor_labels(factor_mask(rules, values), rules, values)
+
+
+def get_contributing_factors_aha(age, sex, tc, hdl, sbp, bp_treated, diabetes, smoking):
+    return _factors(AHA_FACTOR_RULES, {"age": age, "tc": tc, "hdl": hdl, "sbp": sbp,
+                                       "diabetes": diabetes, "smoking": smoking})
+
+
+def get_contributing_factors_qrisk(age, sex, smoking, diabetes, bmi, sbp, tc_hdl_ratio, family_cvd, ckd, atrial_fib, rheumatoid_arthritis, ethnicity):
+    return _factors(QRISK3_FACTOR_RULES, {
+        "age": age, "smoking": smoking, "diabetes": diabetes, "bmi": bmi, "sbp": sbp,
+        "tc_hdl_ratio": tc_hdl_ratio, "family_cvd": family_cvd, "ckd": ckd, "atrial_fib": atrial_fib,
+        "rheumatoid_arthritis": rheumatoid_arthritis, "ethnicity": ethnicity,
+    })
+
+
+def get_contributing_factors_lai(ascvd, ckd, diabetes, duration, smoke, mets, fh_fh, lpa, apob, prem_ascvd, fh_dm, fh_htn, ldl):
+    return _factors(LAI_FACTOR_RULES, {
+        "ascvd": ascvd, "ckd": ckd, "diabetes": diabetes, "duration": duration, "smoke": smoke, "mets": mets,
+        "fh_fh": fh_fh, "lpa": lpa, "apob": apob, "ldl": ldl, "prem_ascvd": prem_ascvd, "fh_dm": fh_dm,
+        "fh_htn": fh_htn,
+    })
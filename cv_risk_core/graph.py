@@ -0,0 +1,142 @@
+"""
+Incremental assessment: a dependency graph from inputs to displayed values.
+
+Every value the results panel and the input sections show is a node with
+the inputs (or other nodes) it is computed from:
+
+    inputs -> derived values (bmi, tc_hdl_ratio, non_hdl, apo_ratio, ascvd)
+           -> assessment, from the shared assess() cache
+           -> scores (qrisk, aha, lai), their categories and factor lists
+           -> displays (recommendations, summary)
+
+AssessmentGraph keeps the last input values and node values for one patient
+(the app keeps one per session). update() marks the nodes downstream of the
+inputs that changed, recomputes them in table order and only propagates from
+a node whose value actually changed: editing ApoA1 recomputes apo_ratio and
+nothing else, and an SBP edit that leaves the risk category unchanged stops
+before the recommendations. The assessment node goes through assess(), so
+the scores and factor lists of a patient seen by any session are a cache
+hit; the nodes below it only read its fields. `recomputed` and
+`compute_counts` are what the app's debug view shows.
+"""
+
+from collections import namedtuple
+from operator import attrgetter
+
+from .assessment import Assessment, ClinicalInputs, assess
+from .metrics import bmi_calc, non_hdl, ratio
+from .recommendations import (
+    generate_fallback_summary,
+    get_aha_recommendations,
+    get_lai_recommendations,
+    get_qrisk_recommendations,
+)
+
+# Inputs shown by the app that no score uses.
+DISPLAY_INPUTS = ("apoa1",)
+INPUT_FIELDS = ClinicalInputs._fields + DISPLAY_INPUTS
+
+Node = namedtuple("Node", ["name", "inputs", "compute", "kind"])
+
+
+def _node(name, inputs, compute, kind):
+    return Node(name, tuple(inputs.split()), compute, kind)
+
+
+def _assessment(*inputs):
+    return assess(ClinicalInputs(*inputs))
+
+
+def _recommendations(get):
+    return lambda category, risk: get(category, risk) if category else None
+
+
+NODES = (
+    _node("bmi", "height weight", bmi_calc, "derived"),
+    _node("tc_hdl_ratio", "tc hdl", ratio, "derived"),
+    _node("non_hdl", "tc hdl", non_hdl, "derived"),
+    _node("apo_ratio", "apob apoa1", ratio, "derived"),
+    _node("ascvd", "mi stroke pad revasc", lambda *events: any(events), "derived"),
+    _node("assessment", " ".join(ClinicalInputs._fields), _assessment, "score"),
+    *(_node(name, "assessment", attrgetter(name), "display" if name.endswith("_factors") else "score")
+      for name in Assessment._fields),
+    _node("aha_recommendations", "aha_cat aha", _recommendations(get_aha_recommendations), "display"),
+    _node("qrisk_recommendations", "qrisk_cat qrisk", _recommendations(get_qrisk_recommendations), "display"),
+    _node("lai_recommendations", "lai", get_lai_recommendations, "display"),
+    _node("summary", "aha_cat qrisk_cat lai", generate_fallback_summary, "display"),
+)
+
+NODE_NAMES = tuple(node.name for node in NODES)
+
+
+def _check_order():
+    known = set(INPUT_FIELDS)
+    for node in NODES:
+        missing = [name for name in node.inputs if name not in known]
+        if missing:
+            raise ValueError(f"node {node.name!r} depends on {missing}, which are not defined before it")
+        known.add(node.name)
+
+
+_check_order()
+
+
+def dependents(name):
+    """Names of the nodes computed (directly or transitively) from input or node `name`."""
+    reached = {name}
+    for node in NODES:
+        if reached.intersection(node.inputs):
+            reached.add(node.name)
+    reached.discard(name)
+    return [node.name for node in NODES if node.name in reached]
+
+
+class AssessmentGraph:
+    """Node values for one patient, recomputed incrementally as the inputs change."""
+
+    def __init__(self):
+        self.values = {}
+        self._key = None
+        self.updates = 0
+        self.recomputed = ()          # nodes computed by the last update that changed an input
+        self.changed_inputs = ()
+        self.compute_counts = dict.fromkeys(NODE_NAMES, 0)
+
+    def update(self, inputs, apoa1=None):
+        """
+        Bring the graph up to date with a ClinicalInputs key (and the display-only inputs).
+
+        Returns the names of the nodes whose value changed; empty when no input changed.
+        """
+        key = (inputs, None if apoa1 is None else float(apoa1))
+        if key == self._key:
+            return ()
+        self._key = key
+        new = dict(zip(ClinicalInputs._fields, inputs), apoa1=key[1])
+        values = self.values
+        dirty = {name for name in INPUT_FIELDS if name not in values or values[name] != new[name]}
+        if not dirty:
+            return ()
+        values.update(new)
+        self.changed_inputs = tuple(name for name in INPUT_FIELDS if name in dirty)
+        recomputed, changed = [], []
+        for node in NODES:
+            if node.name in values and dirty.isdisjoint(node.inputs):
+                continue
+            value = node.compute(*[values[name] for name in node.inputs])
+            recomputed.append(node.name)
+            self.compute_counts[node.name] += 1
+            if node.name not in values or values[node.name] != value:
+                values[node.name] = value
+                dirty.add(node.name)
+                changed.append(node.name)
+        self.updates += 1
+        self.recomputed = tuple(recomputed)
+        return tuple(changed)
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def assessment(self):
+        """The current assess() result."""
+        return self.values["assessment"]
@@ -0,0 +1,207 @@
+"""
+Bulk lab-report extraction: a directory of PDFs to a scored cohort file.
+
+Every PDF under the input directory is hashed in the parent process, and
+files whose SHA-256 already appears in the extraction log are skipped.
+The rest are parsed with labs.parse_lab_pdf across a process pool. As
+results come back they are gathered into chunks, scored with
+cohort.score_chunk and appended to the output file, so the first scores are
+written while later files are still being parsed.
+
+Each processed file gets one JSON line in the log: path, hash, status
+("ok" or "failed"), failure reason, pages read and parse time, and for "ok"
+files the output file holding its row. A file's line is only written once
+its row is in the output. The log is also the record of what has been
+processed, so a daily job can point at the same directory and log every day
+and only pay for new reports. Files that failed for a transient reason (the
+file could not be read) are marked "retry" and tried again on the next run.
+
+An existing output file is never replaced: a run whose output path is taken
+writes to the next free "<stem>.<n><suffix>" (scores.csv, scores.1.csv,
+scores.2.csv, ...) instead, and a run with no new rows writes no file.
+
+    python -m cv_risk_core.lab_reports reports/ scores.csv --log extraction.jsonl --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+
+from .cohort import CATEGORY_COLUMNS, DEFAULT_CHUNK_SIZE, ChunkWriter, score_chunk
+from .labs import LAB_FIELDS, mg_dl_values, parse_lab_pdf
+
+ROW_COLUMNS = ("file", "sha256", "age", "sex") + LAB_FIELDS
+DEFAULT_LOG = "lab_extraction.jsonl"
+
+
+def pdf_paths(directory):
+    """All .pdf files under directory, in a stable order."""
+    return sorted(p for p in Path(directory).rglob("*") if p.is_file() and p.suffix.lower() == ".pdf")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def processed_hashes(log_path):
+    """Hashes already recorded in an extraction log, except failures marked for retry (missing log: none)."""
+    try:
+        with open(log_path, encoding="utf-8") as log:
+            records = [json.loads(line) for line in log if line.strip()]
+    except FileNotFoundError:
+        return set()
+    return {record["sha256"] for record in records if not record.get("retry")}
+
+
+def run_output_path(output_path):
+    """output_path if it is free, else the first free "<stem>.<n><suffix>"."""
+    path = Path(output_path)
+    n = 0
+    while path.exists():
+        n += 1
+        path = Path(output_path).with_name(f"{Path(output_path).stem}.{n}{Path(output_path).suffix}")
+    return path
+
+
+def extract_file(path, digest):
+    """Worker entry point: parse one PDF; returns (log record, cohort row or None). Never raises."""
+    start = time.perf_counter()
+    record = {"file": str(path), "sha256": digest}
+    try:
+        report = parse_lab_pdf(Path(path).read_bytes())
+    except Exception as exc:  # one bad file must not stop the run; it is logged instead
+        record.update(status="failed", reason=str(exc) or exc.__class__.__name__,
+                      seconds=round(time.perf_counter() - start, 4))
+        if isinstance(exc, OSError):
+            record["retry"] = True
+        return record, None
+    values, _ = mg_dl_values(report)
+    if not values:
+        reason = "no lipid values in mg/dL (or a convertible unit) found"
+        record.update(status="failed", reason=reason, pages_read=report.pages_read,
+                      seconds=round(time.perf_counter() - start, 4))
+        return record, None
+    record.update(status="ok", fields=sorted(values), pages_read=report.pages_read, pages=report.pages,
+                  seconds=round(time.perf_counter() - start, 4))
+    row = {"file": str(path), "sha256": digest, **report.patient, **values}
+    return record, row
+
+
+def _rows_frame(rows):
+    frame = pd.DataFrame(rows, columns=list(ROW_COLUMNS))
+    for name in CATEGORY_COLUMNS:
+        if name in frame:
+            frame[name] = frame[name].astype("category")
+    return frame
+
+
+def extract_directory(input_dir, output_path, log_path=DEFAULT_LOG, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                      progress=None):
+    """
+    Parse and score every not-yet-processed PDF under input_dir.
+
+    progress, if given, is called after each file with (files_done, files_total).
+    Returns a summary dict: files, skipped, ok, failed, seconds and output
+    (the file written, see run_output_path; None when there were no rows).
+    """
+    start = time.perf_counter()
+    done = processed_hashes(log_path)
+    pending = []
+    skipped = 0
+    for path in pdf_paths(input_dir):
+        digest = file_hash(path)
+        if digest in done:
+            skipped += 1
+            continue
+        done.add(digest)  # duplicate files within this run are parsed once
+        pending.append((path, digest))
+
+    workers = workers or os.cpu_count() or 1
+    summary = {"files": len(pending), "skipped": skipped, "ok": 0, "failed": 0, "output": None}
+    rows, row_records = [], []
+    writer = None
+
+    def flush(log):
+        # The log lines of "ok" files follow their rows, so a file is never logged without its row.
+        nonlocal writer, rows, row_records
+        if writer is None:
+            summary["output"] = str(run_output_path(output_path))
+            writer = ChunkWriter(summary["output"])
+        writer.write(score_chunk(_rows_frame(rows), keep=ROW_COLUMNS, factors=writer.columnar))
+        for record in row_records:
+            log.write(json.dumps({**record, "output": summary["output"]}) + "\n")
+        log.flush()
+        rows, row_records = [], []
+
+    with open(log_path, "a", encoding="utf-8") as log, ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            queue = iter(pending)
+            in_flight = set()
+            while True:
+                # Keep a bounded number of files in flight so memory does not grow with the directory.
+                for path, digest in queue:
+                    in_flight.add(pool.submit(extract_file, path, digest))
+                    if len(in_flight) >= workers * 4:
+                        break
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record, row = future.result()
+                    summary[record["status"]] += 1
+                    if row is None:
+                        log.write(json.dumps(record) + "\n")
+                    else:
+                        rows.append(row)
+                        row_records.append(record)
+                    if progress is not None:
+                        progress(summary["ok"] + summary["failed"], summary["files"])
+                log.flush()
+                if len(rows) >= chunk_size:
+                    flush(log)
+            if rows:
+                flush(log)
+        finally:
+            if writer is not None:
+                writer.close()
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cv_risk_core.lab_reports",
+        description="Extract lipid values from a directory of lab-report PDFs and score them.",
+    )
+    parser.add_argument("input", help="directory of PDF reports (searched recursively)")
+    parser.add_argument("output", help="scores file (.csv, .parquet, .arrow); if it exists, the next free <stem>.<n><suffix> is written instead")
+    parser.add_argument("--log", default=DEFAULT_LOG, help="per-file extraction log, also used to skip processed files (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per scored chunk (default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true", help="only print the final summary")
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        if not args.quiet and (done % 100 == 0 or done == total):
+            print(f"{done:,}/{total:,} files", file=sys.stderr)
+
+    s = extract_directory(args.input, args.output, args.log, args.workers, args.chunk_size, progress)
+    rate = s["files"] / s["seconds"] if s["seconds"] else 0.0
+    print(f"Parsed {s['files']:,} reports ({s['ok']:,} ok, {s['failed']:,} failed, {s['skipped']:,} already processed) "
+          f"in {s['seconds']:.2f} s ({rate:,.1f} files/s) -> {s['output'] or 'no new rows'}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
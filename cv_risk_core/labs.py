@@ -0,0 +1,193 @@
+"""
+Lipid values from lab-report PDFs.
+
+read_lab_report() pulls total cholesterol, LDL-C, HDL-C, triglycerides, ApoB,
+ApoA1 and Lp(a), plus the patient's age and sex from the report header, out
+of a PDF with pdfplumber. Pages are read one at a time
+and parsing stops as soon as every analyte has been found, so the lipid
+panel on page 1 of a long report costs one page. Reports are cached by the
+SHA-256 of their content: re-uploading the same file (or a rerun that sees
+it again) is a dictionary lookup.
+
+pdfplumber is only imported when a PDF is actually parsed.
+"""
+
+import hashlib
+import io
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from .units import to_mg_dl
+
+CACHE_SIZE = 256
+
+LAB_FIELDS = ("tc", "ldl", "hdl", "tg", "apob", "apoa1", "lpa")
+
+LAB_LABELS = {
+    "tc": "Total Cholesterol",
+    "ldl": "LDL-C",
+    "hdl": "HDL-C",
+    "tg": "Triglycerides",
+    "apob": "ApoB",
+    "apoa1": "ApoA1",
+    "lpa": "Lp(a)",
+}
+
+# Plausible mg/dL ranges; same bounds as the app's input fields.
+LAB_LIMITS = {
+    "tc": (1, 600),  # > 0: the scores take logs of TC and HDL-C
+    "ldl": (0, 400),
+    "hdl": (1, 150),
+    "tg": (0, 1500),
+    "apob": (0, 300),
+    "apoa1": (0, 300),
+    "lpa": (0, 500),
+}
+
+LAB_PATTERNS = {
+    "tc": re.compile(r"\b(?:total\s+cholesterol|cholesterol\s*[,-]?\s*total|serum\s+cholesterol|t\.?\s*chol(?:esterol)?)\b"),
+    "ldl": re.compile(r"(?<![\w-])ldl(?:\s*[-\s]\s*c\b|\s+cholesterol)?(?:\s*\((?:direct|calculated|calc)\))?"),
+    "hdl": re.compile(r"(?<!non-)(?<!non )(?<![\w-])hdl(?:\s*[-\s]\s*c\b|\s+cholesterol)?(?:\s*\((?:direct)\))?"),
+    "tg": re.compile(r"\b(?:triglycerides?|tg)\b"),
+    "apob": re.compile(r"\bapo(?:lipoprotein)?\s*[-\s]?\s*b(?:\s*[-\s]?\s*100)?\b"),
+    "apoa1": re.compile(r"\bapo(?:lipoprotein)?\s*[-\s]?\s*a\s*[-\s]?\s*(?:1|i)\b"),
+    "lpa": re.compile(r"\b(?:lp|lipoprotein)\s*\(\s*a\s*\)|\blipoprotein\s+a\b"),
+}
+
+# First number after the analyte name, with its unit if one follows.
+VALUE_PATTERN = re.compile(r"(?<![\w.])(\d+(?:\.\d+)?)\s*(mg\s*/\s*dl|mg\s*%|mmol\s*/\s*l|nmol\s*/\s*l|g\s*/\s*l)?")
+
+MG_DL_UNITS = (None, "mg/dl", "mg%")
+
+AGE_SEX_PATTERN = re.compile(r"\bage\s*/\s*(?:sex|gender)\s*[:-]?\s*(\d{1,3})\s*(?:y(?:ears?|rs?)?)?\s*/\s*(male|female|m|f)\b")
+AGE_PATTERN = re.compile(r"\bage\s*[:-]\s*(\d{1,3})\b")
+SEX_PATTERN = re.compile(r"\b(?:sex|gender)\s*[:-]\s*(male|female|m|f)\b")
+SEX_LABELS = {"m": "Male", "male": "Male", "f": "Female", "female": "Female"}
+
+# values: {field: mg/dL}, for analytes given in mg/dL or without a unit.
+# other_units: {field: (value, unit)}, for analytes reported in another unit.
+# patient: {"age": years, "sex": "Male"/"Female"}, whichever the header gives.
+LabReport = namedtuple("LabReport", ["values", "other_units", "patient", "pages_read", "pages", "seconds"])
+
+
+def extract_lab_values(text, found=None, other_units=None):
+    """
+    Scan report text line by line and add analytes not already in `found`.
+
+    Ratio lines (TC/HDL, ApoB/ApoA1, ...) are skipped. Returns (found, other_units).
+    """
+    found = {} if found is None else found
+    other_units = {} if other_units is None else other_units
+    for line in text.lower().splitlines():
+        if "ratio" in line or "/hdl" in line:
+            continue
+        for field, pattern in LAB_PATTERNS.items():
+            if field in found or field in other_units:
+                continue
+            label = pattern.search(line)
+            if label is None:
+                continue
+            value = VALUE_PATTERN.search(line, label.end())
+            if value is None:
+                continue
+            number = float(value.group(1))
+            unit = re.sub(r"\s+", "", value.group(2)) if value.group(2) else None
+            if unit in MG_DL_UNITS:
+                low, high = LAB_LIMITS[field]
+                if low <= number <= high:
+                    found[field] = number
+            else:
+                other_units[field] = (number, unit)
+    return found, other_units
+
+
+def mg_dl_values(report):
+    """
+    report.values plus the other-unit analytes that convert to mg/dL (see
+    cv_risk_core.units) within LAB_LIMITS; returns (values, skipped), skipped
+    being the other_units entries that could not be used.
+    """
+    values, skipped = dict(report.values), {}
+    for field, (number, unit) in report.other_units.items():
+        try:
+            value = round(to_mg_dl(field, number, unit), 1)
+        except ValueError:
+            value = None
+        low, high = LAB_LIMITS[field]
+        if value is not None and low <= value <= high:
+            values[field] = value
+        else:
+            skipped[field] = (number, unit)
+    return values, skipped
+
+
+def extract_patient(text, patient=None):
+    """Add age and sex from report header text to `patient` (first occurrence wins)."""
+    patient = {} if patient is None else patient
+    text = text.lower()
+    match = AGE_SEX_PATTERN.search(text)
+    if match:
+        patient.setdefault("age", float(match.group(1)))
+        patient.setdefault("sex", SEX_LABELS[match.group(2)])
+    if "age" not in patient and (match := AGE_PATTERN.search(text)):
+        patient["age"] = float(match.group(1))
+    if "sex" not in patient and (match := SEX_PATTERN.search(text)):
+        patient["sex"] = SEX_LABELS[match.group(1)]
+    return patient
+
+
+def parse_lab_pdf(data):
+    """Parse PDF bytes page by page; stops once every analyte is found. Raises ValueError for unreadable PDFs."""
+    import pdfplumber
+
+    start = time.perf_counter()
+    found, other_units, patient = {}, {}, {}
+    pages_read = 0
+    try:
+        pdf = pdfplumber.open(io.BytesIO(data))
+        pages = len(pdf.pages)
+    except Exception as exc:  # pdfminer raises a variety of syntax/EOF errors
+        raise ValueError(f"not a readable PDF ({exc.__class__.__name__})") from exc
+    with pdf:
+        try:
+            for page in pdf.pages:
+                text = page.extract_text() or ""
+                extract_lab_values(text, found, other_units)
+                extract_patient(text, patient)
+                page.close()
+                pages_read += 1
+                if len(found) + len(other_units) == len(LAB_FIELDS):
+                    break
+        except Exception as exc:  # e.g. a corrupt content stream on one page
+            raise ValueError(f"could not read PDF: {exc or exc.__class__.__name__}") from exc
+    return LabReport(found, other_units, patient, pages_read, pages, time.perf_counter() - start)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def read_lab_report(data):
+    """parse_lab_pdf() with a bounded LRU cache keyed on the content hash."""
+    key = content_hash(data)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    report = parse_lab_pdf(data)
+    with _cache_lock:
+        _cache[key] = report
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return report
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,33 @@
+"""
+Derived measurements and risk category thresholds.
+"""
+
+
+def bmi_calc(h, w):
+    if h is not None and w is not None and h > 0:
+        return round(w / ((h / 100) ** 2), 1)
+    return None
+
+
+def non_hdl(tc, hdl):
+    if tc is not None and hdl is not None:
+        return round(tc - hdl, 1)
+    return None
+
+
+def ratio(a, b):
+    if a is not None and b is not None and b > 0:
+        return round(a / b, 2)
+    return None
+
+
+def percent_category(p):
+    if p is None:
+        return None
+    if p < 5:
+        return "Low"
+    if p < 7.5:
+        return "Moderate"
+    if p < 20:
+        return "High"
+    return "Very High"
@@ -0,0 +1,145 @@
+"""
+Multi-core cohort scoring over a process pool.
+
+The parent copies each input column once into a multiprocessing.shared_memory
+block and hands workers only the block names plus a row range. Workers map
+the blocks as NumPy arrays, score their partition with cohort.score_columns
+and write the risks straight into shared output blocks, so no column data is
+pickled in either direction.
+
+    with ParallelScorer(workers=8) as scorer:
+        scores = scorer.score(frame, keep=["patient_id"])
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from .cohort import CATEGORY_COLUMNS, FACTOR_COLUMNS, blank_invalid, chunk_columns, output_frame, score_columns
+from .validation import validate_chunk
+
+OUTPUT_DTYPES = {"qrisk3": np.float64, "aha_prevent": np.float64, "lai_level": np.int8}
+FACTOR_DTYPES = {name: np.uint16 for name in FACTOR_COLUMNS}
+
+
+def _create_block(arr):
+    shm = SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[:] = arr
+    return shm
+
+
+def _view(shm, spec):
+    _, dtype, length, _ = spec
+    return np.ndarray((length,), np.dtype(dtype), buffer=shm.buf)
+
+
+class SharedColumns:
+    """
+    A set of 1-D columns copied into shared memory blocks.
+
+    spec maps each column name to (block name, dtype string, length,
+    categories); categorical columns are stored as their integer codes and
+    carry their category labels so workers can rebuild them without copying.
+    """
+
+    def __init__(self, columns=None, empty=None, length=0):
+        self.blocks = {}
+        self.spec = {}
+        for name, values in (columns or {}).items():
+            categories = None
+            if name in CATEGORY_COLUMNS:
+                cat = pd.Categorical(values)
+                values, categories = cat.codes, list(cat.categories)
+            arr = np.ascontiguousarray(values)
+            self._add(name, _create_block(arr), arr.dtype, arr.shape[0], categories)
+        for name, dtype in (empty or {}).items():
+            arr = np.zeros(length, dtype=dtype)
+            self._add(name, _create_block(arr), arr.dtype, length, None)
+
+    def _add(self, name, shm, dtype, length, categories):
+        self.blocks[name] = shm
+        self.spec[name] = (shm.name, dtype.str, length, categories)
+
+    def copy(self, name):
+        """Private copy of one column, safe to keep after the blocks are released."""
+        return _view(self.blocks[name], self.spec[name]).copy()
+
+    def release(self):
+        for shm in self.blocks.values():
+            shm.close()
+            shm.unlink()
+        self.blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _score_views(blocks, inputs, outputs, start, stop):
+    columns = {}
+    for name, spec in inputs.items():
+        part = _view(blocks[name], spec)[start:stop]
+        categories = spec[3]
+        columns[name] = pd.Categorical.from_codes(part, categories) if categories is not None else part
+    scores = score_columns(columns, factors=FACTOR_COLUMNS[0] in outputs)
+    for name, spec in outputs.items():
+        _view(blocks[name], spec)[start:stop] = scores[name]
+
+
+def _score_partition(inputs, outputs, start, stop):
+    """Worker entry point: score rows [start, stop) between shared blocks."""
+    blocks = {name: SharedMemory(name=spec[0]) for name, spec in {**inputs, **outputs}.items()}
+    try:
+        _score_views(blocks, inputs, outputs, start, stop)
+    finally:
+        for shm in blocks.values():
+            shm.close()
+    return stop - start
+
+
+def partition_bounds(n, partitions):
+    """Split range(n) into at most `partitions` contiguous (start, stop) pairs."""
+    partitions = max(1, min(partitions, n))
+    edges = np.linspace(0, n, partitions + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+class ParallelScorer:
+    """Scores DataFrames of patients across a persistent pool of worker processes."""
+
+    def __init__(self, workers=None, partitions=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.partitions = partitions or self.workers
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def score_columns(self, columns, factors=False):
+        """Parallel counterpart of cohort.score_columns."""
+        n = len(next(iter(columns.values())))
+        dtypes = {**OUTPUT_DTYPES, **FACTOR_DTYPES} if factors else OUTPUT_DTYPES
+        with SharedColumns(columns) as inputs, SharedColumns(empty=dtypes, length=n) as outputs:
+            futures = [self._pool.submit(_score_partition, inputs.spec, outputs.spec, start, stop)
+                       for start, stop in partition_bounds(n, self.partitions)]
+            for future in futures:
+                future.result()
+            return {name: outputs.copy(name) for name in dtypes}
+
+    def score(self, chunk, keep=(), factors=False, validation=None):
+        """Parallel counterpart of cohort.score_chunk."""
+        if validation is None:
+            validation = validate_chunk(chunk)
+        scores = self.score_columns(chunk_columns(chunk), factors)
+        return output_frame(chunk, blank_invalid(scores, validation.invalid), keep)
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,171 @@
+"""
+Cohort percentile index for peer comparison.
+
+build_index() scores a patient file (as cv_risk_core.cohort does) and stores,
+for QRISK3 and AHA PREVENT, the sorted risks of every age band x sex x
+ethnicity stratum in one file:
+
+    b"CVRPIDX1" | header length (uint64 LE) | JSON header | float32 risks
+
+The header holds the strata labels and, per score, the start offset of each
+stratum in the risk array; the risks of one score are laid out stratum by
+stratum, each run sorted. PercentileIndex memory-maps the file, so opening it
+costs a header read and a query is two binary searches on one run:
+
+    index = PercentileIndex("cv_risk_percentiles.idx")
+    index.percentile("qrisk3", age=54, sex="Male", ethnicity="South Asian", risk=12.4)
+    # -> Percentile(percentile=..., n=..., age_band="50–59"), or None
+
+    python -m cv_risk_core.percentiles patients.csv cv_risk_percentiles.idx
+
+The app shows peer percentiles on the risk cards when it finds the index at
+CV_RISK_PERCENTILE_INDEX (default: cv_risk_percentiles.idx).
+"""
+
+import argparse
+import bisect
+import json
+import struct
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .cohort import DEFAULT_CHUNK_SIZE, blank_invalid, chunk_columns, read_chunks, score_columns
+from .validation import validate_chunk
+
+INDEX_ENV = "CV_RISK_PERCENTILE_INDEX"
+DEFAULT_INDEX = "cv_risk_percentiles.idx"
+
+MAGIC = b"CVRPIDX1"
+SCORES = ("qrisk3", "aha_prevent")
+AGE_BANDS = ((25, 40), (40, 50), (50, 60), (60, 70), (70, 80), (80, 90))
+SEXES = ("Male", "Female")
+ETHNICITIES = ("Indian", "South Asian", "White", "Black", "Other")
+N_STRATA = len(AGE_BANDS) * len(SEXES) * len(ETHNICITIES)
+
+# Strata with fewer scored patients than this give no percentile.
+MIN_STRATUM_SIZE = 30
+
+# percentile: share of the stratum with a lower risk, counting ties as half (0-100).
+Percentile = namedtuple("Percentile", ["percentile", "n", "age_band"])
+
+
+def age_band_label(band):
+    low, high = AGE_BANDS[band]
+    return f"{low}–{high - 1}"
+
+
+def stratum_ids(age, sex, ethnicity):
+    """Stratum number per patient (-1 when age is outside the bands or a category is unknown)."""
+    age = np.asarray(age, dtype=float)
+    edges = np.array([low for low, _ in AGE_BANDS] + [AGE_BANDS[-1][1]], dtype=float)
+    band = np.searchsorted(edges, age, side="right") - 1
+    band[np.isnan(age) | (band >= len(AGE_BANDS))] = -1
+    sex = pd.Categorical(np.asarray(sex, dtype=object), categories=SEXES).codes.astype(np.int64)
+    ethnicity = pd.Categorical(np.asarray(ethnicity, dtype=object), categories=ETHNICITIES).codes.astype(np.int64)
+    ids = (band * len(SEXES) + sex) * len(ETHNICITIES) + ethnicity
+    ids[(band < 0) | (sex < 0) | (ethnicity < 0)] = -1
+    return ids
+
+
+_BAND_STARTS = tuple(low for low, _ in AGE_BANDS)
+
+
+def _stratum(age, sex, ethnicity):
+    # Scalar stratum_ids(), without building arrays for one patient.
+    if not (AGE_BANDS[0][0] <= age < AGE_BANDS[-1][1]) or sex not in SEXES or ethnicity not in ETHNICITIES:
+        return -1
+    band = bisect.bisect_right(_BAND_STARTS, age) - 1
+    return (band * len(SEXES) + SEXES.index(sex)) * len(ETHNICITIES) + ETHNICITIES.index(ethnicity)
+
+
+def build_index(input_path, index_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Score a patient file and write its percentile index; returns the number of patients indexed."""
+    strata, risks = [], {score: [] for score in SCORES}
+    for chunk in read_chunks(input_path, chunk_size):
+        columns = chunk_columns(chunk)
+        scores = blank_invalid(score_columns(columns), validate_chunk(chunk).invalid)
+        strata.append(stratum_ids(columns["age"], columns["sex"], columns["ethnicity"]))
+        for score in SCORES:
+            risks[score].append(scores[score].astype(np.float32))
+    strata = np.concatenate(strata) if strata else np.empty(0, dtype=np.int64)
+
+    header = {"scores": {}, "age_bands": AGE_BANDS, "sexes": SEXES, "ethnicities": ETHNICITIES}
+    runs, start = [], 0
+    for score in SCORES:
+        values = np.concatenate(risks[score]) if risks[score] else np.empty(0, dtype=np.float32)
+        keep = (strata >= 0) & ~np.isnan(values)
+        values, score_strata = values[keep], strata[keep]
+        counts = np.bincount(score_strata, minlength=N_STRATA)
+        header["scores"][score] = {"start": start, "offsets": np.concatenate([[0], np.cumsum(counts)]).tolist()}
+        runs.append(values[np.lexsort((values, score_strata))])
+        start += int(counts.sum())
+
+    header_bytes = json.dumps(header).encode()
+    header_bytes += b" " * (-(len(MAGIC) + 8 + len(header_bytes)) % 16)
+    with open(index_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        for run in runs:
+            f.write(run.astype("<f4").tobytes())
+    return int(np.count_nonzero(strata >= 0))
+
+
+class PercentileIndex:
+    """A memory-mapped index written by build_index()."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a percentile index")
+            (length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(length))
+        if (tuple(map(tuple, header["age_bands"])), tuple(header["sexes"]), tuple(header["ethnicities"])) != (
+                AGE_BANDS, SEXES, ETHNICITIES):
+            raise ValueError(f"{path} was built with different strata; rebuild it")
+        self.path = path
+        offset = len(MAGIC) + 8 + length
+        total = sum(s["offsets"][-1] for s in header["scores"].values())
+        # np.memmap cannot map an empty region; asarray() drops the subclass so slices are plain views.
+        self._risks = np.asarray(np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(total,))
+                                 if total else np.empty(0, dtype="<f4"))
+        self._runs = {
+            score: [(s["start"] + a, s["start"] + b) for a, b in zip(s["offsets"], s["offsets"][1:])]
+            for score, s in header["scores"].items()
+        }
+
+    def percentile(self, score, age, sex, ethnicity, risk):
+        """Percentile of `risk` among the patient's stratum, or None without one of MIN_STRATUM_SIZE."""
+        if risk is None or age is None:
+            return None
+        stratum = _stratum(age, sex, ethnicity)
+        if stratum < 0:
+            return None
+        start, end = self._runs[score][stratum]
+        n = end - start
+        if n < MIN_STRATUM_SIZE:
+            return None
+        run = self._risks[start:end]
+        value = np.float32(risk)
+        below = int(run.searchsorted(value, "left"))
+        ties = int(run.searchsorted(value, "right")) - below
+        return Percentile(100.0 * (below + 0.5 * ties) / n, n, age_band_label(stratum // (len(SEXES) * len(ETHNICITIES))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cv_risk_core.percentiles",
+        description="Build the peer-comparison percentile index from a CSV/Parquet patient file.",
+    )
+    parser.add_argument("input", help="patient file (.csv, .parquet)")
+    parser.add_argument("output", help="index file (e.g. cv_risk_percentiles.idx)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk (default: %(default)s)")
+    args = parser.parse_args(argv)
+    indexed = build_index(args.input, args.output, args.chunk_size)
+    print(f"Indexed {indexed:,} patients in {N_STRATA} strata -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
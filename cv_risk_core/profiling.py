@@ -0,0 +1,94 @@
+"""
+Opt-in wall-clock timing of the labelled sections of one app rerun.
+
+The app calls profiler.mark(label) at each section boundary and
+profiler.finish() at the end of the script. When profiling is off the app gets
+NULL_PROFILER, whose methods do nothing, so the instrumentation stays in place
+at the cost of one no-op method call per section.
+
+Enable it with CV_RISK_PROFILE=1 in the server's environment; app users
+cannot turn it on. Each profiled rerun is appended as one JSON line to the file named by
+CV_RISK_PROFILE_LOG (default: cv_risk_profile.log). Fragment-only reruns are
+timed with begin(scope) ... finish() and logged under their fragment's scope.
+"""
+
+import json
+import os
+import time
+
+PROFILE_ENV = "CV_RISK_PROFILE"
+LOG_ENV = "CV_RISK_PROFILE_LOG"
+DEFAULT_LOG = "cv_risk_profile.log"
+
+
+class SectionProfiler:
+    """Times consecutive sections: each mark() closes the running section."""
+
+    enabled = True
+
+    def __init__(self, log_path=None, scope="app"):
+        self.log_path = log_path
+        self.begin(scope)
+
+    def begin(self, scope):
+        """Start a new run (e.g. a fragment-only rerun) labelled `scope`."""
+        self.scope = scope
+        self.sections = []
+        self._label = None
+        self._start = time.perf_counter()
+
+    def mark(self, label):
+        """Close the running section and start timing `label`."""
+        now = time.perf_counter()
+        if self._label is not None:
+            self.sections.append((self._label, (now - self._start) * 1e3))
+        self._label, self._start = label, now
+
+    @property
+    def total_ms(self):
+        return sum(ms for _, ms in self.sections)
+
+    def finish(self):
+        """Close the last section, append the rerun to the log and return [(label, ms), ...]."""
+        self.mark(None)
+        if self.log_path:
+            record = {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "scope": self.scope,
+                "total_ms": round(self.total_ms, 3),
+                "sections": [[label, round(ms, 3)] for label, ms in self.sections],
+            }
+            with open(self.log_path, "a", encoding="utf-8") as log:
+                log.write(json.dumps(record) + "\n")
+        return self.sections
+
+
+class _NullProfiler:
+    enabled = False
+    sections = ()
+    total_ms = 0.0
+
+    def begin(self, scope):
+        pass
+
+    def mark(self, label):
+        pass
+
+    def finish(self):
+        return ()
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def profiling_enabled():
+    return os.environ.get(PROFILE_ENV, "").strip().lower() not in ("", "0", "false", "no")
+
+
+def section_profiler(enabled=None, log_path=None):
+    """A SectionProfiler if profiling is on (default: per CV_RISK_PROFILE), else NULL_PROFILER."""
+    if enabled is None:
+        enabled = profiling_enabled()
+    if not enabled:
+        return NULL_PROFILER
+    return SectionProfiler(log_path if log_path is not None else os.environ.get(LOG_ENV, DEFAULT_LOG))
@@ -0,0 +1,89 @@
+"""
+Guideline treatment recommendations and the unified summary.
+"""
+
+
+def get_aha_recommendations(aha_cat, aha_risk):
+    if aha_cat == "Low":
+        return {"statin": "Not recommended", "ldl_target": "<100 mg/dL (optional)", "non_hdl_target": "<130 mg/dL (optional)", "lifestyle": "Heart-healthy lifestyle, regular exercise, healthy diet", "monitoring": "Reassess in 4-6 years"}
+    elif aha_cat == "Moderate":
+        return {"statin": "Consider moderate-intensity statin", "ldl_target": "<100 mg/dL (preferred <70 mg/dL)", "non_hdl_target": "<130 mg/dL (preferred <100 mg/dL)", "lifestyle": "Aggressive lifestyle modification essential", "monitoring": "Reassess lipids in 3 months, then annually"}
+    elif aha_cat == "High":
+        return {"statin": "Moderate to high-intensity statin recommended", "ldl_target": "<70 mg/dL", "non_hdl_target": "<100 mg/dL", "lifestyle": "Intensive lifestyle intervention required", "monitoring": "Lipid panel at 4-12 weeks, optimize therapy"}
+    else:
+        return {"statin": "High-intensity statin ± ezetimibe recommended", "ldl_target": "<50 mg/dL", "non_hdl_target": "<80 mg/dL", "lifestyle": "Comprehensive risk factor management essential", "monitoring": "Frequent monitoring, consider PCSK9i if targets not met"}
+
+
+def get_qrisk_recommendations(qrisk_cat, qrisk_value):
+    if qrisk_cat == "Low":
+        return {"statin": "Not indicated", "ldl_target": "<100 mg/dL", "non_hdl_target": "<130 mg/dL", "lifestyle": "Maintain healthy lifestyle, regular physical activity", "monitoring": "Reassess cardiovascular risk every 5 years"}
+    elif qrisk_cat == "Moderate":
+        return {"statin": "Discuss benefits and risks with patient", "ldl_target": "<100 mg/dL (consider <70 mg/dL)", "non_hdl_target": "<130 mg/dL (consider <100 mg/dL)", "lifestyle": "Optimize lifestyle factors first, then consider pharmacotherapy", "monitoring": "Annual risk assessment and lipid monitoring"}
+    elif qrisk_cat == "High":
+        return {"statin": "Atorvastatin 20mg or equivalent recommended", "ldl_target": "<70 mg/dL", "non_hdl_target": "<100 mg/dL", "lifestyle": "Intensive lifestyle modification alongside statin therapy", "monitoring": "Lipids at 3 months, then 6-12 monthly"}
+    else:
+        return {"statin": "Atorvastatin 80mg or rosuvastatin 20-40mg recommended", "ldl_target": "<50 mg/dL", "non_hdl_target": "<80 mg/dL", "lifestyle": "Multifactorial risk reduction strategy required", "monitoring": "Close monitoring, escalate therapy as needed"}
+
+
+def get_lai_recommendations(lai_cat):
+    if lai_cat == "Low":
+        return {"statin": "Not recommended - lifestyle only", "ldl_target": "<100 mg/dL", "non_hdl_target": "<130 mg/dL", "apob_target": "<90 mg/dL", "lifestyle": "Heart-healthy Indian diet, regular exercise, avoid tobacco", "monitoring": "Reassess every 3-5 years"}
+    elif lai_cat == "Moderate":
+        return {"statin": "Moderate-intensity statin (consider for South Asians)", "ldl_target": "<100 mg/dL (optional <70 mg/dL)", "non_hdl_target": "<130 mg/dL (optional <100 mg/dL)", "apob_target": "<90 mg/dL", "lifestyle": "Aggressive lifestyle measures, weight management", "monitoring": "Annual lipid profile and cardiovascular risk assessment"}
+    elif lai_cat == "High":
+        return {"statin": "High-intensity statin therapy recommended", "ldl_target": "<70 mg/dL", "non_hdl_target": "<100 mg/dL", "apob_target": "<80 mg/dL", "lifestyle": "Comprehensive lifestyle intervention, manage all risk factors", "monitoring": "Lipids at 4 weeks, then every 3 months until stable"}
+    else:
+        return {"statin": "High-intensity statin + ezetimibe, consider PCSK9i", "ldl_target": "<50 mg/dL", "non_hdl_target": "<80 mg/dL", "apob_target": "<65 mg/dL", "lifestyle": "Intensive multi-factorial risk reduction essential", "monitoring": "Frequent monitoring, aggressive target achievement required"}
+
+
+def generate_fallback_summary(aha_cat, qrisk_cat, lai_cat):
+    levels = {"Low": 0, "Moderate": 1, "High": 2, "Very High": 3}
+    scores = []
+    if aha_cat:
+        scores.append((levels.get(aha_cat, 0), aha_cat, "AHA PREVENT"))
+    if qrisk_cat:
+        scores.append((levels.get(qrisk_cat, 0), qrisk_cat, "QRISK3"))
+    if lai_cat:
+        scores.append((levels.get(lai_cat, 0), lai_cat, "LAI"))
+    if not scores:
+        return "Insufficient data for comprehensive risk assessment."
+    max_risk = max(scores, key=lambda x: x[0])
+    summary = f"""**Overall Risk Level:** {max_risk[1]} (driven primarily by {max_risk[2]})\n\n"""
+    if max_risk[1] in ["High", "Very High"]:
+        summary += """**Statin Therapy:** RECOMMENDED
+- High-intensity statin (Atorvastatin 40-80mg or Rosuvastatin 20-40mg)
+- Add ezetimibe 10mg if LDL-C targets not achieved
+- Consider PCSK9 inhibitor for Very High risk if targets remain unmet
+
+**Lipid Targets:**
+- LDL-C: <70 mg/dL (Very High: <50 mg/dL)
+- Non-HDL-C: <100 mg/dL (Very High: <80 mg/dL)
+- ApoB: <80 mg/dL (Very High: <65 mg/dL)
+
+**Lifestyle:** Heart-healthy diet · Physical activity ≥150 min/week · Weight management · Smoking cessation
+
+**Monitoring:** Lipid panel at 4-6 weeks → every 3 months until targets achieved → 6-monthly
+"""
+    elif max_risk[1] == "Moderate":
+        summary += """**Statin Therapy:** CONSIDER (shared decision-making)
+- Moderate-intensity statin (Atorvastatin 10-20mg or Rosuvastatin 5-10mg)
+- Especially recommended for South Asian ethnicity
+
+**Lipid Targets:**
+- LDL-C: <100 mg/dL (consider <70 mg/dL)
+- Non-HDL-C: <130 mg/dL (consider <100 mg/dL)
+
+**Lifestyle:** Aggressive lifestyle modification as first-line · Weight reduction if BMI ≥25
+
+**Monitoring:** Reassess in 3-6 months · Annual lipid profile and risk assessment
+"""
+    else:
+        summary += """**Statin Therapy:** NOT RECOMMENDED — continue lifestyle measures
+
+**Targets:** LDL-C <100 mg/dL · Non-HDL-C <130 mg/dL
+
+**Lifestyle:** Maintain healthy diet and regular physical activity
+
+**Monitoring:** Periodic reassessment every 3-5 years
+"""
+    return summary
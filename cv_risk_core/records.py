@@ -0,0 +1,195 @@
+"""
+Compact patient records.
+
+PatientRecord holds one patient's fields in __slots__ instead of the nested
+dict-of-dicts payload (demographics / vitals / lab_values / ...) used by
+test_cv_calculators.py and the integration examples, and it answers
+record["age"] / record.get("ldl") for the flat keys cv_risk_calculators
+reads. For cohorts, records_to_array() packs patients into a NumPy
+structured array (PATIENT_DTYPE): float64 numbers with NaN for missing,
+int8 category codes and int8 flags with -1 for missing.
+
+Both convert to and from either dict form:
+
+    record = PatientRecord.from_dict(payload)     # nested or flat
+    payload = record.to_dict()                    # nested
+    flat = record.to_dict(nested=False)           # {"age": 55, "ldl": 155, ...}
+    array = records_to_array(payloads)            # dicts or PatientRecords
+    records = array_to_records(array)
+
+NumPy is only imported by the array functions.
+"""
+
+from collections import namedtuple
+
+# kind: "number", "category" (with its labels) or "flag"
+PatientField = namedtuple("PatientField", ["name", "path", "kind", "labels"])
+
+
+def _field(name, path, kind="number", labels=None):
+    return PatientField(name, tuple(path.split(".")), kind, labels)
+
+
+PATIENT_FIELDS = (
+    _field("age", "demographics.age"),
+    _field("sex", "demographics.sex", "category", ("male", "female")),
+    _field("race_ethnicity", "demographics.race_ethnicity", "category",
+           ("white", "black", "asian", "hispanic", "south_asian", "other")),
+    _field("sbp", "vitals.systolic_bp"),
+    _field("dbp", "vitals.diastolic_bp"),
+    _field("height", "vitals.height"),
+    _field("weight", "vitals.weight"),
+    _field("bmi", "vitals.bmi"),
+    _field("waist", "vitals.waist_circumference"),
+    _field("tc", "lab_values.total_cholesterol"),
+    _field("hdl", "lab_values.hdl_cholesterol"),
+    _field("ldl", "lab_values.ldl_cholesterol"),
+    _field("tg", "lab_values.triglycerides"),
+    _field("glucose", "lab_values.fasting_glucose"),
+    _field("hba1c", "lab_values.hba1c"),
+    _field("hscrp", "lab_values.hscrp"),
+    _field("lpa", "lab_values.lp_a"),
+    _field("apob", "lab_values.apob"),
+    _field("cac", "lab_values.coronary_calcium_score"),
+    _field("diabetes", "medical_history.diabetes_status", "category", ("none", "prediabetes", "type_1", "type_2")),
+    _field("diabetes_duration", "medical_history.diabetes_duration"),
+    _field("antihtn", "medical_history.hypertension_treatment", "flag"),
+    _field("ckd", "medical_history.chronic_kidney_disease", "flag"),
+    _field("heart_failure", "medical_history.heart_failure", "flag"),
+    _field("clinical_ascvd", "medical_history.cvd_history.clinical_ascvd", "flag"),
+    _field("prior_mi", "medical_history.cvd_history.prior_mi", "flag"),
+    _field("prior_stroke_tia", "medical_history.cvd_history.prior_stroke_tia", "flag"),
+    _field("prior_cabg_pci", "medical_history.cvd_history.prior_cabg_pci", "flag"),
+    _field("pad", "medical_history.cvd_history.peripheral_artery_disease", "flag"),
+    _field("gestational_diabetes", "medical_history.pregnancy_complications.gestational_diabetes", "flag"),
+    _field("preeclampsia", "medical_history.pregnancy_complications.preeclampsia", "flag"),
+    _field("smoking", "lifestyle_factors.smoking_status", "category", ("never", "former", "current")),
+    _field("statin", "medications.statin", "category", ("No statin", "Moderate intensity", "High intensity")),
+    _field("fh_premature_cvd", "family_history.premature_cvd_family_history", "flag"),
+    _field("fh_diabetes", "family_history.family_history_diabetes", "flag"),
+    _field("fh_fh", "family_history.family_hypercholesterolemia", "flag"),
+)
+
+FIELD_NAMES = tuple(f.name for f in PATIENT_FIELDS)
+_BY_NAME = {f.name: f for f in PATIENT_FIELDS}
+
+# Category values are replaced by the table's own label strings, so records
+# share one copy of "male", "current", ... instead of each holding its own.
+_CANONICAL = {f.name: {label: label for label in f.labels} for f in PATIENT_FIELDS if f.kind == "category"}
+
+
+def _lookup(payload, path):
+    for key in path:
+        if not isinstance(payload, dict):
+            return None
+        payload = payload.get(key)
+    return payload
+
+
+class PatientRecord:
+    """One patient; every field is an attribute, None when not recorded."""
+
+    __slots__ = FIELD_NAMES
+
+    def __init__(self, **values):
+        unknown = set(values) - set(FIELD_NAMES)
+        if unknown:
+            raise TypeError(f"unknown patient fields: {', '.join(sorted(unknown))}")
+        for name in FIELD_NAMES:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def from_dict(cls, payload):
+        """Build from the nested payload; flat top-level keys (age, ldl, statin, ...) win if present."""
+        record = cls.__new__(cls)
+        for f in PATIENT_FIELDS:
+            value = payload.get(f.name)
+            if value is None:
+                value = _lookup(payload, f.path)
+            if f.name in _CANONICAL:
+                value = _CANONICAL[f.name].get(value, value)
+            setattr(record, f.name, value)
+        return record
+
+    def to_dict(self, nested=True):
+        """Nested payload (or flat {field: value} with nested=False); unrecorded fields are left out."""
+        if not nested:
+            return {name: getattr(self, name) for name in FIELD_NAMES if getattr(self, name) is not None}
+        payload = {}
+        for f in PATIENT_FIELDS:
+            value = getattr(self, f.name)
+            if value is None:
+                continue
+            node = payload
+            for key in f.path[:-1]:
+                node = node.setdefault(key, {})
+            node[f.path[-1]] = value
+        return payload
+
+    # Mapping-style access by flat field name, as cv_risk_calculators reads patients.
+    def __getitem__(self, name):
+        if name not in _BY_NAME:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None) if name in _BY_NAME else None
+        return default if value is None else value
+
+    def __eq__(self, other):
+        if not isinstance(other, PatientRecord):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in FIELD_NAMES)
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.to_dict(nested=False).items())
+        return f"PatientRecord({fields})"
+
+
+def patient_dtype():
+    """NumPy structured dtype with one field per PATIENT_FIELDS entry."""
+    import numpy as np
+
+    kinds = {"number": np.float64, "category": np.int8, "flag": np.int8}
+    return np.dtype([(f.name, kinds[f.kind]) for f in PATIENT_FIELDS])
+
+
+def records_to_array(patients):
+    """Structured array from PatientRecords or payload dicts (nested or flat)."""
+    import numpy as np
+
+    patients = [p if isinstance(p, PatientRecord) else PatientRecord.from_dict(p) for p in patients]
+    array = np.empty(len(patients), dtype=patient_dtype())
+    for f in PATIENT_FIELDS:
+        values = [getattr(p, f.name) for p in patients]
+        if f.kind == "number":
+            array[f.name] = [np.nan if v is None else v for v in values]
+        elif f.kind == "flag":
+            array[f.name] = [-1 if v is None else bool(v) for v in values]
+        else:
+            codes = {label: i for i, label in enumerate(f.labels)}
+            try:
+                array[f.name] = [-1 if v is None else codes[v] for v in values]
+            except KeyError as exc:
+                raise ValueError(f"unknown {f.name} value {exc.args[0]!r}; expected one of {f.labels}") from None
+    return array
+
+
+def array_to_records(array):
+    """PatientRecords for each row of a structured array from records_to_array()."""
+    columns = {}
+    for f in PATIENT_FIELDS:
+        column = array[f.name].tolist()
+        if f.kind == "number":
+            columns[f.name] = [None if v != v else v for v in column]
+        elif f.kind == "flag":
+            columns[f.name] = [None if v < 0 else bool(v) for v in column]
+        else:
+            columns[f.name] = [None if v < 0 else f.labels[v] for v in column]
+    records = []
+    for row in zip(*columns.values()):
+        record = PatientRecord.__new__(PatientRecord)
+        for name, value in zip(FIELD_NAMES, row):
+            setattr(record, name, value)
+        records.append(record)
+    return records
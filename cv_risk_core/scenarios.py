@@ -0,0 +1,81 @@
+"""
+What-if treatment scenarios for one patient.
+
+scenario_grid() scores QRISK3 and AHA PREVENT for every combination of an
+SBP change, a TC/HDL ratio change and smoking (as entered, and quit if the
+patient currently smokes) with a single call to each vectorized calculator
+in cv_risk_core.batch. The ratio is changed by scaling total cholesterol with
+HDL-C held fixed, which is how both scores see a lipid-lowering treatment.
+
+Grids are cached per ClinicalInputs key like assess(), so redrawing the
+results panel for the same patient does not recompute them.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from .batch import calculate_aha_prevent_batch, calculate_qrisk3_batch, ratio_batch
+
+CACHE_SIZE = 256
+
+# Default axes: SBP change in mmHg, TC/HDL ratio change in percent.
+SBP_CHANGE_RANGE = (-40.0, 0.0)
+LIPID_CHANGE_RANGE = (-50.0, 0.0)
+
+# sbp_change, lipid_change: axis values. smoking: the smoking status of each
+# layer. qrisk3, aha_prevent: float arrays shaped
+# (len(smoking), len(sbp_change), len(lipid_change)), NaN where not calculable.
+ScenarioGrid = namedtuple("ScenarioGrid", ["sbp_change", "lipid_change", "smoking", "qrisk3", "aha_prevent"])
+
+
+def _column(value, n):
+    """A constant column of n rows, in the form the batch calculators take."""
+    if value is None:
+        return np.full(n, np.nan)
+    if isinstance(value, str):
+        return np.full(n, value)
+    return np.full(n, value, dtype=type(value))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def scenario_grid(inputs, sbp_steps=50, lipid_steps=50):
+    """QRISK3 and AHA PREVENT over the SBP x TC/HDL x smoking grid for a ClinicalInputs key."""
+    p = inputs
+    sbp_change = np.linspace(*SBP_CHANGE_RANGE, sbp_steps)
+    lipid_change = np.linspace(*LIPID_CHANGE_RANGE, lipid_steps)
+    smoking = (p.smoking, "Former") if p.smoking == "Current" else (p.smoking,)
+    shape = (len(smoking), sbp_steps, lipid_steps)
+    n = shape[0] * sbp_steps * lipid_steps
+
+    layer, sbp_index, lipid_index = (i.ravel() for i in np.indices(shape))
+    sbp = np.nan if p.sbp is None else p.sbp
+    tc = np.nan if p.tc is None else p.tc
+    sbp = sbp + sbp_change.take(sbp_index)
+    tc = tc * (1 + lipid_change.take(lipid_index) / 100)
+    smoking_column = np.array(smoking, dtype=object).take(layer)
+
+    def column(value):
+        return _column(value, n)
+
+    hdl = column(p.hdl)
+
+    qrisk3 = calculate_qrisk3_batch(
+        column(p.age), column(p.sex), column(p.ethnicity), smoking_column, column(p.diabetes),
+        column(p.height), column(p.weight), sbp, ratio_batch(tc, hdl), column(p.antihtn),
+        column(p.prem_ascvd), column(p.ckd), column(p.atrial_fib), column(p.rheumatoid_arthritis),
+        column(p.migraine),
+    )
+    aha_prevent = calculate_aha_prevent_batch(
+        column(p.age), column(p.sex), column(p.ethnicity), tc, hdl, sbp, column(p.antihtn),
+        column(p.diabetes), smoking_column,
+    )
+    grids = [sbp_change, lipid_change, qrisk3.reshape(shape), aha_prevent.reshape(shape)]
+    for arr in grids:
+        arr.flags.writeable = False  # shared through the cache
+    return ScenarioGrid(grids[0], grids[1], smoking, grids[2], grids[3])
+
+
+def clear_cache():
+    scenario_grid.cache_clear()
@@ -0,0 +1,123 @@
+"""
+QRISK3, AHA PREVENT and LAI 2023 risk scores.
+"""
+
+import math
+import operator
+
+from .metrics import bmi_calc
+
+
+def calculate_qrisk3(age, sex, ethnicity, smoking, diabetes, height, weight, sbp, tc_hdl_ratio, antihtn, family_cvd, ckd, atrial_fib, rheumatoid_arthritis, migraine):
+    required = [age, sex, tc_hdl_ratio, sbp]
+    if None in required:
+        return None
+    if age < 25 or age > 84:
+        return None
+    bmi = bmi_calc(height, weight)
+    if bmi is None:
+        bmi = 25
+    eth_code = {"Indian": 9, "South Asian": 9, "White": 1, "Black": 3, "Other": 1}.get(ethnicity, 1)
+    smoke_code = {"Never": 0, "Former": 2, "Current": 4}.get(smoking, 0)
+    is_female = sex == "Female"
+    if is_female:
+        survivor = 0.988876
+        age_term = (age / 10) - 4.0
+        smoking_param = smoke_code * 0.13
+        diabetes_param = 0.86 if diabetes == "Yes" else 0
+        bmi_param = 0.56 if bmi >= 30 else (0.23 if bmi >= 25 else (0.12 if bmi >= 20 else 0.0))
+        sbp_param = (sbp - 120) * 0.013
+        tc_hdl_param = (tc_hdl_ratio - 4) * 0.15
+        family_param = 0.45 if family_cvd else 0
+        ckd_param = 0.60 if ckd else 0
+        afib_param = 0.50 if atrial_fib else 0
+        ra_param = 0.35 if rheumatoid_arthritis else 0
+        score = age_term * 0.8 + smoking_param + diabetes_param + bmi_param + sbp_param + tc_hdl_param + family_param + ckd_param + afib_param + ra_param + (0.35 if eth_code == 9 else 0)
+    else:
+        survivor = 0.977268
+        age_term = (age / 10) - 4.0
+        smoking_param = smoke_code * 0.18
+        diabetes_param = 0.59 if diabetes == "Yes" else 0
+        bmi_param = 0.48 if bmi >= 30 else (0.20 if bmi >= 25 else (0.10 if bmi >= 20 else 0.0))
+        sbp_param = (sbp - 120) * 0.012
+        tc_hdl_param = (tc_hdl_ratio - 4) * 0.17
+        family_param = 0.54 if family_cvd else 0
+        ckd_param = 0.65 if ckd else 0
+        afib_param = 0.58 if atrial_fib else 0
+        ra_param = 0.40 if rheumatoid_arthritis else 0
+        score = age_term * 0.9 + smoking_param + diabetes_param + bmi_param + sbp_param + tc_hdl_param + family_param + ckd_param + afib_param + ra_param + (0.40 if eth_code == 9 else 0)
+    risk_10yr = 100 * (1 - math.pow(survivor, math.exp(score)))
+    return round(min(max(risk_10yr, 0), 100), 1)
+
+
+# ---------------- AHA PREVENT coefficient tables
+
+# Shared term basis: every stratum's linear predictor is a dot product of
+# its coefficient vector with these terms (see aha_prevent_terms).
+AHA_PREVENT_TERMS = (
+    "ln_age", "ln_age_sq", "ln_tc", "ln_age_tc", "ln_hdl", "ln_age_hdl",
+    "ln_sbp_treated", "ln_age_sbp_treated", "ln_sbp_untreated", "ln_age_sbp_untreated",
+    "smoker", "ln_age_smoker", "dm",
+)
+
+# Strata, indexed 2 * is_black + is_female (see aha_prevent_stratum).
+AHA_PREVENT_STRATA = ("non-Black male", "non-Black female", "Black male", "Black female")
+
+# One coefficient vector per stratum over AHA_PREVENT_TERMS; 0 where a
+# stratum's equation has no such term.
+AHA_PREVENT_COEFFICIENTS = (
+    # ln_age  ln_age²  ln_tc  age·tc  ln_hdl   age·hdl  ln_tsbp  age·tsbp ln_usbp  age·usbp smoker age·smk   dm
+    (12.344,  0.0,    11.853, -2.664, -7.990,  1.769,   1.797,   0.0,     1.764,   0.0,     7.837, -1.795,  0.658),
+    (-29.799, 4.884,  13.540, -3.114, -13.578, 3.149,   2.019,   0.0,     1.957,   0.0,     7.574, -1.665,  0.661),
+    (2.469,   0.0,    0.302,  0.0,    -0.307,  0.0,     1.916,   0.0,     1.809,   0.0,     0.549, 0.0,     0.645),
+    (17.114,  0.0,    0.940,  0.0,    -18.920, 4.475,   29.291,  -6.432,  27.820,  -6.087,  0.691, 0.0,     0.874),
+)
+AHA_PREVENT_MEAN_SUM = (61.18, -29.18, 19.54, 86.61)
+AHA_PREVENT_BASELINE_SURVIVAL = (0.9144, 0.9665, 0.8954, 0.9533)
+
+
+def aha_prevent_stratum(race, sex):
+    """Row index into the AHA PREVENT coefficient tables."""
+    return 2 * (race == "Black") + (sex == "Female")
+
+
+def aha_prevent_terms(age, tc, hdl, sbp, bp_treated, smoker, dm):
+    """The AHA_PREVENT_TERMS values for one patient (smoker, dm as 0/1)."""
+    ln_age = math.log(age)
+    ln_tc = math.log(tc)
+    ln_hdl = math.log(hdl)
+    ln_sbp_treated = math.log(sbp) if bp_treated else 0
+    ln_sbp_untreated = math.log(sbp) if not bp_treated else 0
+    return (
+        ln_age, ln_age * ln_age, ln_tc, ln_age * ln_tc, ln_hdl, ln_age * ln_hdl,
+        ln_sbp_treated, ln_age * ln_sbp_treated, ln_sbp_untreated, ln_age * ln_sbp_untreated,
+        smoker, ln_age * smoker, dm,
+    )
+
+
+def calculate_aha_prevent(age, sex, race, tc, hdl, sbp, bp_treated, diabetes, smoking):
+    required = [age, sex, tc, hdl, sbp]
+    if None in required:
+        return None
+    if age < 40 or age > 79:
+        return None
+    smoker = 1 if smoking == "Current" else 0
+    dm = 1 if diabetes == "Yes" else 0
+    stratum = aha_prevent_stratum(race, sex)
+    terms = aha_prevent_terms(age, tc, hdl, sbp, bp_treated, smoker, dm)
+    individual_sum = sum(map(operator.mul, AHA_PREVENT_COEFFICIENTS[stratum], terms))
+    mean_sum = AHA_PREVENT_MEAN_SUM[stratum]
+    baseline_survival = AHA_PREVENT_BASELINE_SURVIVAL[stratum]
+    risk_10yr = (1 - math.pow(baseline_survival, math.exp(individual_sum - mean_sum))) * 100
+    return round(min(risk_10yr, 100), 1)
+
+
+def calculate_lai_category(ascvd, ckd, diabetes, duration, smoke, mets, fh_fh, lpa, apob, prem_ascvd, fh_dm, fh_htn):
+    risk_enhancers = (smoke == "Current") or mets or fh_fh or (lpa is not None and lpa > 50) or (apob is not None and apob > 130)
+    if ascvd or ckd or (diabetes == "Yes" and duration is not None and duration >= 10):
+        return "Very High"
+    if diabetes == "Yes" or risk_enhancers:
+        return "High"
+    if prem_ascvd or fh_dm or fh_htn:
+        return "Moderate"
+    return "Low"
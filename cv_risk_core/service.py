@@ -0,0 +1,189 @@
+"""
+HTTP scoring service for EHR integration.
+
+A small ASGI (Starlette) app around the calculators:
+
+    POST /score        one patient as a JSON object; returns QRISK3, AHA
+                       PREVENT and LAI 2023 with their contributing factors
+                       and treatment recommendations (via assess()).
+                       An optional "id" is echoed back. A patient outside
+                       the app's input limits gets a 400.
+    POST /score/batch  {"patients": [...]} or a bare JSON array; returns one
+                       {"id", "qrisk3", ..., "lai_category", "errors"}
+                       object per patient, in order. A patient outside the
+                       app's input limits is not scored and "errors" says
+                       why (see cv_risk_core.validation); null otherwise.
+    GET  /health
+
+Patient fields use the clinical_inputs() names (age, sex, ethnicity, sbp, tc,
+hdl, smoking, diabetes, antihtn, ...), lab values in mg/dL; batch patients
+may add unit tags such as "tc_unit": "mmol/L" (see cohort.UNIT_COLUMNS).
+Batch bodies are handed to a process pool as raw bytes: the worker parses
+the JSON, scores the whole list with cohort.score_chunk and returns the
+serialized response, so the event loop only moves bytes and keeps serving
+other requests while a batch is scored.
+
+    python -m cv_risk_core.service --port 8600 --workers 4
+    uvicorn --factory cv_risk_core.service:create_app --port 8600
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from .assessment import assess, clinical_inputs
+from .cohort import CATEGORY_COLUMNS, FLAG_COLUMNS, NUMERIC_COLUMNS, UNIT_COLUMNS, score_chunk
+from .recommendations import (
+    generate_fallback_summary,
+    get_aha_recommendations,
+    get_lai_recommendations,
+    get_qrisk_recommendations,
+)
+from .validation import error_messages, validate_chunk, validate_patient
+
+WORKERS_ENV = "CV_RISK_SERVICE_WORKERS"
+MAX_BATCH = 100_000
+
+# Optional per-patient identifier, echoed back in the results.
+ID_FIELD = "id"
+BATCH_FIELDS = frozenset((ID_FIELD,) + NUMERIC_COLUMNS + CATEGORY_COLUMNS + FLAG_COLUMNS + UNIT_COLUMNS)
+
+
+class BadRequest(ValueError):
+    """A request body the service cannot score; reported as HTTP 400."""
+
+
+def assessment_response(patient):
+    """Full single-patient result as a JSON-ready dict."""
+    if not isinstance(patient, dict):
+        raise BadRequest("expected a JSON object with the patient's fields")
+    patient = dict(patient)
+    patient_id = patient.pop(ID_FIELD, None)
+    errors = validate_patient(patient)
+    if errors:
+        raise BadRequest("invalid patient: " + "; ".join(errors))
+    try:
+        result = assess(clinical_inputs(**patient))
+    except TypeError as exc:
+        raise BadRequest(str(exc)) from exc
+    except (ValueError, ArithmeticError) as exc:
+        raise BadRequest(f"invalid value: {exc}") from exc
+    return {
+        ID_FIELD: patient_id,
+        "qrisk3": result.qrisk,
+        "qrisk3_category": result.qrisk_cat,
+        "aha_prevent": result.aha,
+        "aha_prevent_category": result.aha_cat,
+        "lai_category": result.lai,
+        "factors": {
+            "aha_prevent": list(result.aha_factors),
+            "qrisk3": list(result.qrisk_factors),
+            "lai": list(result.lai_factors),
+        },
+        "recommendations": {
+            "aha_prevent": get_aha_recommendations(result.aha_cat, result.aha) if result.aha_cat else None,
+            "qrisk3": get_qrisk_recommendations(result.qrisk_cat, result.qrisk) if result.qrisk_cat else None,
+            "lai": get_lai_recommendations(result.lai),
+        },
+        "summary": generate_fallback_summary(result.aha_cat, result.qrisk_cat, result.lai),
+    }
+
+
+def score_batch_json(body):
+    """
+    Worker entry point: score a batch request body; returns the JSON response bytes.
+
+    Raises BadRequest for malformed bodies, unknown fields or oversized batches.
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError as exc:
+        raise BadRequest(f"invalid JSON: {exc}") from exc
+    patients = payload.get("patients") if isinstance(payload, dict) else payload
+    if not isinstance(patients, list) or not all(isinstance(p, dict) for p in patients):
+        raise BadRequest('expected {"patients": [...]} or a JSON array of patient objects')
+    if len(patients) > MAX_BATCH:
+        raise BadRequest(f"at most {MAX_BATCH:,} patients per request")
+    frame = pd.DataFrame.from_records(patients)
+    unknown = set(frame.columns) - BATCH_FIELDS
+    if unknown:
+        raise BadRequest(f"unknown patient fields: {', '.join(sorted(map(str, unknown)))}")
+    keep = [ID_FIELD] if ID_FIELD in frame else []
+    validation = validate_chunk(frame)
+    results = score_chunk(frame, keep=keep, validation=validation)
+    results["errors"] = error_messages(validation)
+    return results.to_json(orient="records").encode()
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError as exc:
+        raise BadRequest(f"invalid JSON: {exc}") from exc
+
+
+async def score(request):
+    return JSONResponse(assessment_response(await _json_body(request)))
+
+
+async def score_batch(request):
+    body = await request.body()
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(request.app.state.pool, score_batch_json, body)
+    return Response(result, media_type="application/json")
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "workers": request.app.state.workers})
+
+
+async def bad_request(request, exc):
+    return JSONResponse({"error": str(exc)}, status_code=400)
+
+
+def create_app(workers=None):
+    """The ASGI app; batch requests are scored across `workers` processes (default: per CPU)."""
+    workers = workers or int(os.environ.get(WORKERS_ENV, 0)) or os.cpu_count() or 1
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.workers = workers
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            app.state.pool = pool
+            yield
+
+    return Starlette(
+        routes=[
+            Route("/score", score, methods=["POST"]),
+            Route("/score/batch", score_batch, methods=["POST"]),
+            Route("/health", health, methods=["GET"]),
+        ],
+        exception_handlers={BadRequest: bad_request},
+        lifespan=lifespan,
+    )
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(
+        prog="python -m cv_risk_core.service",
+        description="Serve the risk calculators over HTTP.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="bind address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8600, help="port (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="batch scoring processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(args.workers), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
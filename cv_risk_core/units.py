@@ -0,0 +1,104 @@
+"""
+Lab units: conversion of lipid values to the mg/dL every calculator expects.
+
+UNIT_FACTORS gives, per analyte, the factor that turns a value in each
+accepted unit into mg/dL. Unit labels are matched case- and space-
+insensitively ("mmol/L", "mmol / l", "MG%" ...).
+
+to_mg_dl() / from_mg_dl() convert one value (the app's unit selectors, lab
+reports). column_to_mg_dl() converts a whole column, with one unit for the
+column or a unit tag per row: the tags are reduced to their distinct labels
+(a categorical), one factor is looked up per label and the column is scaled
+by a factor array indexed with the category codes, so the cost per row is
+NumPy's, not Python's. cv_risk_core.cohort applies it to every analyte
+column that has a matching "<analyte>_unit" column.
+
+NumPy and pandas are only imported by unit_factors() and column_to_mg_dl().
+"""
+
+MG_DL = "mg/dl"
+
+# Cholesterol 1 mmol/L = 38.67 mg/dL; triglycerides 1 mmol/L = 88.57 mg/dL.
+# Lp(a) nmol/L counts particles, not mass: 2.15 nmol/L per mg/dL is the usual
+# approximation and varies with apo(a) isoform size.
+_CHOLESTEROL = {MG_DL: 1.0, "mmol/l": 38.67, "g/l": 100.0}
+UNIT_FACTORS = {
+    "tc": _CHOLESTEROL,
+    "ldl": _CHOLESTEROL,
+    "hdl": _CHOLESTEROL,
+    "tg": {MG_DL: 1.0, "mmol/l": 88.57, "g/l": 100.0},
+    "apob": {MG_DL: 1.0, "g/l": 100.0},
+    "apoa1": {MG_DL: 1.0, "g/l": 100.0},
+    "lpa": {MG_DL: 1.0, "nmol/l": 1 / 2.15},
+}
+
+# Display labels for the app's unit selectors, in menu order.
+UNIT_LABELS = {MG_DL: "mg/dL", "mmol/l": "mmol/L", "g/l": "g/L", "nmol/l": "nmol/L"}
+
+_ALIASES = {"mg%": MG_DL, "mg/100ml": MG_DL}
+
+
+def normalize_unit(unit):
+    """Canonical unit label ("mmol/l"); None or "" mean mg/dL."""
+    if unit is None:
+        return MG_DL
+    unit = "".join(str(unit).split()).lower()
+    return _ALIASES.get(unit, unit) or MG_DL
+
+
+def unit_factor(field, unit):
+    """mg/dL per `unit` for analyte `field`; ValueError for a unit the analyte is not reported in."""
+    unit = normalize_unit(unit)
+    try:
+        return UNIT_FACTORS[field][unit]
+    except KeyError:
+        accepted = ", ".join(UNIT_LABELS.get(u, u) for u in UNIT_FACTORS.get(field, ()))
+        raise ValueError(f"{field} cannot be given in {unit!r} (accepted: {accepted or 'mg/dL'})") from None
+
+
+def to_mg_dl(field, value, unit):
+    return None if value is None else value * unit_factor(field, unit)
+
+
+def from_mg_dl(field, value, unit):
+    return None if value is None else value / unit_factor(field, unit)
+
+
+def _factor_or_nan(field, unit):
+    try:
+        return unit_factor(field, unit)
+    except ValueError:
+        return float("nan")
+
+
+def unit_factors(field, units):
+    """mg/dL factor per row for per-row unit tags: 1.0 for no tag, NaN for a unit `field` cannot be given in."""
+    import numpy as np
+    import pandas as pd
+
+    tags = pd.Categorical(units)  # keeps the categories of an already categorical column
+    factors = np.array([_factor_or_nan(field, label) for label in tags.categories] + [1.0])
+    # Code -1 (no tag) picks the trailing 1.0.
+    return factors[tags.codes]
+
+
+def column_to_mg_dl(field, values, units, errors="raise"):
+    """
+    `values` (float array) converted to mg/dL.
+
+    `units` is one unit for the whole column or an array-like of per-row unit
+    tags; rows without a tag are taken as mg/dL. A tag the analyte cannot be
+    given in raises ValueError naming it, or, with errors="coerce", makes
+    the row NaN.
+    """
+    import numpy as np
+
+    values = np.asarray(values, dtype=float)
+    if units is None or isinstance(units, str):
+        factor = unit_factor(field, units) if errors == "raise" else _factor_or_nan(field, units)
+        return values if factor == 1.0 else values * factor
+    factors = unit_factors(field, units)
+    unknown = np.isnan(factors)
+    if errors == "raise" and unknown.any():
+        unit_factor(field, np.asarray(units, dtype=object)[unknown][0])
+    return values * factors
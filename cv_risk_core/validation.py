@@ -0,0 +1,123 @@
+"""
+Input limits shared by the app and batch scoring, and the batch validator.
+
+INPUT_LIMITS holds the (min, max) of every numeric input, lab values in
+mg/dL; the app's number inputs are built from it, and CATEGORY_CHOICES
+holds the options of its select boxes. validate_chunk() checks a whole
+DataFrame of patients against the same tables, column by column, and
+returns a Validation:
+
+    codes    {column: int8 array}, one reason code per row (0 = valid)
+    invalid  bool array, True for rows with any non-zero code
+
+Missing values are valid (not recorded). Lab columns with a "<analyte>_unit"
+tag column are checked after conversion to mg/dL. cv_risk_core.cohort scores
+only the valid rows and writes the others, with error_messages(), to a
+quarantine file, so a bad row costs neither an exception nor a per-row
+try/except. validate_patient() applies the same checks to one patient dict
+(the CLI and the single-patient service endpoint).
+
+NumPy and pandas are only imported by validate_chunk() and error_messages().
+"""
+
+from collections import namedtuple
+
+from .labs import LAB_LIMITS
+from .units import unit_factors
+
+INPUT_LIMITS = {
+    "age": (1, 110),
+    "height": (100, 220),
+    "weight": (20, 300),
+    "sbp": (60, 260),
+    "dbp": (30, 160),
+    "dm_duration": (0, 70),
+    **LAB_LIMITS,
+}
+
+# The first choice is the app's default.
+CATEGORY_CHOICES = {
+    "sex": ("Male", "Female"),
+    "ethnicity": ("Indian", "South Asian", "White", "Black", "Other"),
+    "smoking": ("Never", "Former", "Current"),
+    "diabetes": ("No", "Yes"),
+}
+
+# Reason codes; REASONS[code] is the label written to the quarantine file.
+VALID, NOT_A_NUMBER, BELOW_MINIMUM, ABOVE_MAXIMUM, UNKNOWN_CATEGORY, UNKNOWN_UNIT = range(6)
+REASONS = ("valid", "not_a_number", "below_minimum", "above_maximum", "unknown_category", "unknown_unit")
+
+Validation = namedtuple("Validation", ["codes", "invalid"])
+
+
+def validate_chunk(chunk):
+    """Reason codes per validated column of a DataFrame of patients, and the invalid-row mask."""
+    import numpy as np
+    import pandas as pd
+
+    codes = {}
+    for name, (low, high) in INPUT_LIMITS.items():
+        if name not in chunk:
+            continue
+        values = pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=float)
+        recorded = chunk[name].notna().to_numpy()
+        code = np.zeros(len(chunk), dtype=np.int8)
+        code[recorded & np.isnan(values)] = NOT_A_NUMBER
+        if f"{name}_unit" in chunk:
+            values = values * unit_factors(name, chunk[f"{name}_unit"])
+            code[recorded & np.isnan(values) & (code == VALID)] = UNKNOWN_UNIT
+        code[values < low] = BELOW_MINIMUM
+        code[values > high] = ABOVE_MAXIMUM
+        codes[name] = code
+    for name, choices in CATEGORY_CHOICES.items():
+        if name not in chunk:
+            continue
+        labels = pd.Categorical(chunk[name])
+        # Looked up once per distinct label; code -1 (missing) picks the trailing True.
+        known = np.array([label in choices or label == "" for label in labels.categories] + [True])
+        codes[name] = np.where(known[labels.codes], VALID, UNKNOWN_CATEGORY).astype(np.int8)
+
+    invalid = np.zeros(len(chunk), dtype=bool)
+    for code in codes.values():
+        invalid |= code != VALID
+    return Validation(codes, invalid)
+
+
+def validate_patient(patient):
+    """validate_chunk() for one patient dict: a list of "column: reason" strings, empty when valid."""
+    errors = []
+    for name, (low, high) in INPUT_LIMITS.items():
+        value = patient.get(name)
+        if value is None:
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            errors.append(f"{name}: {REASONS[NOT_A_NUMBER]}")
+            continue
+        if value != value:
+            errors.append(f"{name}: {REASONS[NOT_A_NUMBER]}")
+        elif value < low:
+            errors.append(f"{name}: {REASONS[BELOW_MINIMUM]}")
+        elif value > high:
+            errors.append(f"{name}: {REASONS[ABOVE_MAXIMUM]}")
+    for name, choices in CATEGORY_CHOICES.items():
+        if patient.get(name) is not None and patient[name] not in choices:
+            errors.append(f"{name}: {REASONS[UNKNOWN_CATEGORY]}")
+    return errors
+
+
+def error_messages(validation):
+    """Object array with "column: reason; ..." for each invalid row and None for valid ones."""
+    import numpy as np
+
+    messages = np.full(len(validation.invalid), None, dtype=object)
+    rows = np.flatnonzero(validation.invalid)
+    parts = [[] for _ in rows]
+    # Python work for the invalid rows only.
+    for name, code in validation.codes.items():
+        row_codes = code[rows]
+        for i in np.flatnonzero(row_codes):
+            parts[i].append(f"{name}: {REASONS[row_codes[i]]}")
+    messages[rows] = ["; ".join(p) for p in parts]
+    return messages
@@ -0,0 +1,567 @@
+"""
+Light and dark theme palettes and the app stylesheet.
+
+The stylesheet is a str.format template over a palette, so each theme's CSS
+is a plain string that can be built once and reused across reruns.
+"""
+
+THEMES = {
+    "dark": {
+        "BG_PAGE": "#0f1117",
+        "BG_SECONDARY": "#1a1d27",
+        "BG_INPUT": "#252836",
+        "TEXT_PRIMARY": "#e8eaf0",
+        "TEXT_SECONDARY": "#9aa0b8",
+        "TEXT_MUTED": "#9aa0b8",
+        "BORDER_COLOR": "#2e3347",
+        "ACCENT": "#4c9ef8",
+        "ACCENT_DARK": "#3a82d6",
+        "HEADING_COLOR": "#e8eaf0",
+        "H2_LEFT_BAR": "#4c9ef8",
+        "H2_BG": "rgba(76, 158, 248, 0.08)",
+        "DIVIDER": "#2e3347",
+        "METRIC_BG": "#1e2130",
+        "METRIC_VAL": "#e8eaf0",
+        "BTN_BG": "#3a82d6",
+        "BTN_HOVER": "#2d6dbf",
+        "INFO_BG": "rgba(76, 158, 248, 0.1)",
+        "INFO_BORDER": "#4c9ef8",
+        "WARN_BG": "rgba(255, 193, 7, 0.1)",
+        "WARN_BORDER": "#ffc107",
+        "TOOLBAR_BG": "#13161f",
+        "TOOLBAR_BORDER": "#2e3347",
+        "RISK_LOW_BG": "linear-gradient(135deg, #1a3326 0%, #1f3d2e 100%)",
+        "RISK_LOW_BORDER": "#28a745",
+        "RISK_MOD_BG": "linear-gradient(135deg, #2e2910 0%, #3a3412 100%)",
+        "RISK_MOD_BORDER": "#ffc107",
+        "RISK_HIGH_BG": "linear-gradient(135deg, #2e1f0a 0%, #3a2710 100%)",
+        "RISK_HIGH_BORDER": "#ff9800",
+        "RISK_VH_BG": "linear-gradient(135deg, #2e1118 0%, #3a1520 100%)",
+        "RISK_VH_BORDER": "#dc3545",
+        "RISK_NA_BG": "linear-gradient(135deg, #1a1d27 0%, #252836 100%)",
+        "RISK_NA_BORDER": "#4a5568",
+        "CF_BG": "rgba(255,255,255,0.04)",
+        "CF_BORDER": "rgba(255,255,255,0.08)",
+        "CF_TITLE": "#9aa0b8",
+        "CF_ITEM": "#9aa0b8",
+        "CF_BULLET": "#4c9ef8",
+        "TOGGLE_ICON": "☀",
+        "SELECTBOX_COLOR": "#e8eaf0",
+        "INPUT_COLOR": "#e8eaf0",
+        "CAPTION_COLOR": "#9aa0b8",
+        "TAB_BG": "#1a1d27",
+        "TAB_ACTIVE_BG": "#252836",
+        "TAB_COLOR": "#9aa0b8",
+        "TAB_ACTIVE_COLOR": "#4c9ef8",
+        "TAB_ACTIVE_BORDER": "#4c9ef8",
+        "UNIT_COLOR": "#6b7280",
+        "TOOLBAR_BTN_BG": "#2a2f45",
+        "TOOLBAR_BTN_BORDER": "#4c9ef8",
+        "TOOLBAR_BTN_COLOR": "#e8eaf0",
+        "SECTION_LABEL_COLOR": "#4c9ef8",
+        # Dark mode toggle button - HIGH CONTRAST
+        "THEME_BTN_BG": "#fbbf24",
+        "THEME_BTN_COLOR": "#1f2937",
+        "THEME_BTN_BORDER": "#fbbf24",
+        "THEME_BTN_HOVER_BG": "#f59e0b",
+    },
+    "light": {
+        "BG_PAGE": "#f0f2f6",
+        "BG_SECONDARY": "#ffffff",
+        "BG_INPUT": "#ffffff",
+        "TEXT_PRIMARY": "#1a202c",
+        "TEXT_SECONDARY": "#4a5568",
+        "TEXT_MUTED": "#718096",
+        "BORDER_COLOR": "#dde1e9",
+        "ACCENT": "#2563eb",
+        "ACCENT_DARK": "#1e40af",
+        "HEADING_COLOR": "#0f172a",
+        "H2_LEFT_BAR": "#2563eb",
+        "H2_BG": "rgba(37, 99, 235, 0.06)",
+        "DIVIDER": "#e2e8f0",
+        "METRIC_BG": "#ffffff",
+        "METRIC_VAL": "#0f172a",
+        "BTN_BG": "#2563eb",
+        "BTN_HOVER": "#1e40af",
+        "INFO_BG": "#eff6ff",
+        "INFO_BORDER": "#2563eb",
+        "WARN_BG": "#fffbeb",
+        "WARN_BORDER": "#f59e0b",
+        "TOOLBAR_BG": "#ffffff",
+        "TOOLBAR_BORDER": "#dde1e9",
+        "RISK_LOW_BG": "linear-gradient(135deg, #dcfce7 0%, #bbf7d0 100%)",
+        "RISK_LOW_BORDER": "#16a34a",
+        "RISK_MOD_BG": "linear-gradient(135deg, #fefce8 0%, #fef08a 100%)",
+        "RISK_MOD_BORDER": "#ca8a04",
+        "RISK_HIGH_BG": "linear-gradient(135deg, #fff7ed 0%, #fed7aa 100%)",
+        "RISK_HIGH_BORDER": "#ea580c",
+        "RISK_VH_BG": "linear-gradient(135deg, #fff1f2 0%, #fecdd3 100%)",
+        "RISK_VH_BORDER": "#dc2626",
+        "RISK_NA_BG": "linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%)",
+        "RISK_NA_BORDER": "#94a3b8",
+        "CF_BG": "rgba(255,255,255,0.9)",
+        "CF_BORDER": "rgba(0,0,0,0.07)",
+        "CF_TITLE": "#374151",
+        "CF_ITEM": "#4b5563",
+        "CF_BULLET": "#2563eb",
+        "TOGGLE_ICON": "🌙",
+        "SELECTBOX_COLOR": "#1a202c",
+        "INPUT_COLOR": "#1a202c",
+        "CAPTION_COLOR": "#64748b",
+        "TAB_BG": "#f1f5f9",
+        "TAB_ACTIVE_BG": "#ffffff",
+        "TAB_COLOR": "#64748b",
+        "TAB_ACTIVE_COLOR": "#1e40af",
+        "TAB_ACTIVE_BORDER": "#2563eb",
+        "UNIT_COLOR": "#94a3b8",
+        "TOOLBAR_BTN_BG": "#f8fafc",
+        "TOOLBAR_BTN_BORDER": "#dde1e9",
+        "TOOLBAR_BTN_COLOR": "#475569",
+        "SECTION_LABEL_COLOR": "#2563eb",
+        # Light mode toggle button - FIXED HIGH CONTRAST
+        "THEME_BTN_BG": "#ffffff",
+        "THEME_BTN_COLOR": "#1e293b",
+        "THEME_BTN_BORDER": "#1e293b",
+        "THEME_BTN_HOVER_BG": "#f1f5f9",
+    },
+}
+
+STYLESHEET = """
+<style>
+    /* ---- CRITICAL: Fix top white bar - force all containers to match theme ---- */
+    html, body, .stApp, .main,
+    [data-testid="stAppViewContainer"],
+    [data-testid="stAppViewBlockContainer"],
+    [data-testid="stHeader"],
+    header, 
+    .stApp > header {{
+        background-color: {BG_PAGE} !important;
+        color: {TEXT_PRIMARY} !important;
+    }}
+
+    /* ---- Hide Streamlit chrome ---- */
+    button[kind="header"], [data-testid="stToolbar"],
+    #MainMenu, .stDeployButton, footer {{
+        display: none !important;
+    }}
+
+    /* ---- Block container: INCREASED top padding to prevent title clipping ---- */
+    .block-container {{
+        background-color: {BG_PAGE} !important;
+        padding-top: 4rem !important;
+        padding-bottom: 3rem !important;
+        max-width: 1200px !important;
+    }}
+
+  /* ---- Universal text color (EXCLUDE buttons) ---- */
+.stApp p,
+.stApp span,
+.stApp div,
+.stApp label,
+.stApp li {{
+    color: {TEXT_PRIMARY} !important;
+}}
+
+    /* ---- Section headers (h2) - INCREASED SIZE ---- */
+    h2 {{
+        color: {SECTION_LABEL_COLOR} !important;
+        font-size: 1rem !important;
+        font-weight: 700 !important;
+        text-transform: uppercase !important;
+        letter-spacing: 0.08em !important;
+        margin-top: 2rem !important;
+        margin-bottom: 0.8rem !important;
+        padding: 0 !important;
+        border: none !important;
+        background: none !important;
+    }}
+
+    /* ---- h3 ---- */
+    h3 {{
+        color: {TEXT_PRIMARY} !important;
+        font-weight: 600 !important;
+        font-size: 1.1rem !important;
+        margin-top: 0 !important;
+    }}
+
+    /* ---- Section card wrapper ---- */
+    .cv-section {{
+        background: {BG_SECONDARY};
+        border: 1px solid {BORDER_COLOR};
+        border-radius: 10px;
+        padding: 1rem 1.2rem 0.8rem 1.2rem;
+        margin-bottom: 0.8rem;
+    }}
+
+    /* ---- Input field rows with unit label ---- */
+    .input-row {{
+        display: flex;
+        align-items: center;
+        gap: 0.5rem;
+        margin-bottom: 0.5rem;
+    }}
+    .input-unit {{
+        font-size: 0.78rem;
+        color: {UNIT_COLOR} !important;
+        white-space: nowrap;
+        padding-top: 1.6rem;
+        min-width: 42px;
+    }}
+
+    /* ---- Number inputs ---- */
+    .stNumberInput input,
+    input[type="number"],
+    input[type="text"] {{
+        background-color: {BG_INPUT} !important;
+        color: {INPUT_COLOR} !important;
+        border: 1.5px solid {BORDER_COLOR} !important;
+        border-radius: 6px !important;
+        caret-color: {INPUT_COLOR} !important;
+        font-size: 0.9rem !important;
+    }}
+    .stNumberInput input:focus {{
+        border-color: {ACCENT} !important;
+        box-shadow: 0 0 0 3px {ACCENT}22 !important;
+        outline: none !important;
+    }}
+    .stNumberInput [data-testid="stNumberInputStepUp"],
+    .stNumberInput [data-testid="stNumberInputStepDown"] {{
+        display: none !important;
+    }}
+    .stNumberInput > div {{
+        gap: 0 !important;
+    }}
+
+    /* ---- Selectbox / Dropdown ---- */
+    .stSelectbox [data-baseweb="select"] > div,
+    .stSelectbox [data-baseweb="select"] > div > div {{
+        background-color: {BG_INPUT} !important;
+        color: {SELECTBOX_COLOR} !important;
+        border: 1.5px solid {BORDER_COLOR} !important;
+        border-radius: 6px !important;
+    }}
+    .stSelectbox [data-baseweb="select"] span,
+    .stSelectbox [data-baseweb="select"] div {{
+        color: {SELECTBOX_COLOR} !important;
+        background-color: transparent !important;
+    }}
+    [data-baseweb="popover"], [data-baseweb="menu"],
+    [role="listbox"], [data-baseweb="list"] {{
+        background-color: {BG_INPUT} !important;
+        border-color: {BORDER_COLOR} !important;
+    }}
+    [role="option"], [data-baseweb="option"] {{
+        background-color: {BG_INPUT} !important;
+        color: {SELECTBOX_COLOR} !important;
+    }}
+    [role="option"]:hover, [data-baseweb="option"]:hover {{
+        background-color: {BORDER_COLOR} !important;
+    }}
+
+    /* ---- Radio buttons ---- */
+    .stRadio label, .stRadio div,
+    .stRadio [data-testid="stMarkdownContainer"] p {{
+        color: {TEXT_PRIMARY} !important;
+    }}
+    .stRadio > div {{
+        gap: 0.5rem !important;
+    }}
+
+    /* ---- Checkboxes ---- */
+    .stCheckbox label, .stCheckbox span, .stCheckbox p {{
+        color: {TEXT_PRIMARY} !important;
+        font-weight: 400 !important;
+        font-size: 0.88rem !important;
+    }}
+    .stCheckbox {{
+        margin-bottom: 0.25rem !important;
+        padding: 0 !important;
+    }}
+
+    /* ---- Widget labels ---- */
+    .stSelectbox label, .stNumberInput label,
+    .stTextInput label, .stRadio label,
+    [data-testid="stWidgetLabel"] {{
+        color: {TEXT_SECONDARY} !important;
+        font-weight: 500 !important;
+        font-size: 0.82rem !important;
+        margin-bottom: 0.15rem !important;
+    }}
+
+    /* ---- Tabs ---- */
+    .stTabs [data-baseweb="tab-list"] {{
+        background-color: {BG_PAGE} !important;
+        gap: 0.25rem !important;
+        border-bottom: 2px solid {BORDER_COLOR} !important;
+    }}
+    .stTabs [data-baseweb="tab"] {{
+        color: {TAB_COLOR} !important;
+        background-color: transparent !important;
+        border-radius: 6px 6px 0 0 !important;
+        padding: 0.55rem 1.2rem !important;
+        font-weight: 500 !important;
+        font-size: 0.85rem !important;
+    }}
+    .stTabs [aria-selected="true"] {{
+        color: {TAB_ACTIVE_COLOR} !important;
+        background-color: {TAB_ACTIVE_BG} !important;
+        border-bottom: 2px solid {TAB_ACTIVE_BORDER} !important;
+    }}
+    .stTabs [data-baseweb="tab-panel"] {{
+        background-color: {BG_SECONDARY} !important;
+        padding: 1.2rem !important;
+        border-radius: 0 0 8px 8px !important;
+        border: 1px solid {BORDER_COLOR} !important;
+        border-top: none !important;
+    }}
+
+    /* ---- Metric widget ---- */
+    [data-testid="stMetric"] {{
+        background-color: {METRIC_BG} !important;
+        padding: 0.9rem 1rem !important;
+        border-radius: 8px !important;
+        border: 1px solid {BORDER_COLOR} !important;
+        box-shadow: 0 1px 3px rgba(0,0,0,0.04) !important;
+    }}
+    [data-testid="stMetricLabel"] {{
+        color: {TEXT_SECONDARY} !important;
+        font-size: 0.78rem !important;
+    }}
+    [data-testid="stMetricValue"] {{
+        color: {METRIC_VAL} !important;
+        font-weight: 700 !important;
+        font-size: 1.5rem !important;
+    }}
+
+    /* ---- Alert boxes ---- */
+    [data-testid="stAlert"] {{ border-radius: 6px !important; }}
+    div[data-testid="stAlert"][kind="info"] {{
+        background-color: {INFO_BG} !important;
+        border-left: 4px solid {INFO_BORDER} !important;
+    }}
+    div[data-testid="stAlert"][kind="warning"] {{
+        background-color: {WARN_BG} !important;
+        border-left: 4px solid {WARN_BORDER} !important;
+    }}
+
+    /* ---- Default Streamlit buttons (fallback) ---- */
+    .stButton > button {{
+        background-color: {BTN_BG} !important;
+        color: #ffffff !important;
+        font-weight: 500 !important;
+        border-radius: 6px !important;
+        border: none !important;
+        padding: 0.45rem 1.2rem !important;
+        font-size: 0.85rem !important;
+        transition: background 0.2s !important;
+        box-shadow: none !important;
+    }}
+    .stButton > button:hover {{
+        background-color: {BTN_HOVER} !important;
+        transform: none !important;
+        box-shadow: none !important;
+    }}
+
+    /* ---- Theme toggle button - HIGH CONTRAST FOR BOTH MODES ---- */
+    .cv-theme-btn .stButton > button {{
+        background-color: {THEME_BTN_BG} !important;
+        color: {THEME_BTN_COLOR} !important;
+        border: 2px solid {THEME_BTN_BORDER} !important;
+        border-radius: 7px !important;
+        font-size: 0.85rem !important;
+        font-weight: 700 !important;
+        padding: 0.55rem 1.4rem !important;
+        width: 100% !important;
+        box-shadow: 0 2px 6px rgba(0,0,0,0.15) !important;
+        transition: all 0.2s !important;
+    }}
+    .cv-theme-btn .stButton > button:hover {{
+        background-color: {THEME_BTN_HOVER_BG} !important;
+        border-color: {THEME_BTN_HOVER_BG} !important;
+        transform: translateY(-1px) !important;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.25) !important;
+    }}
+
+    /* ---- Markdown ---- */
+    .stMarkdown, .stMarkdown p, .stMarkdown span,
+    [data-testid="stMarkdownContainer"],
+    [data-testid="stMarkdownContainer"] p,
+    [data-testid="stMarkdownContainer"] li {{
+        color: {TEXT_PRIMARY} !important;
+    }}
+
+    /* ---- Caption ---- */
+    .stCaption, [data-testid="stCaptionContainer"] {{
+        color: {CAPTION_COLOR} !important;
+        font-size: 0.78rem !important;
+    }}
+
+    /* ---- HR ---- */
+    hr {{
+        border: none !important;
+        border-top: 1px solid {DIVIDER} !important;
+        margin: 1rem 0 !important;
+    }}
+
+    /* ---- Risk cards ---- */
+    .risk-card {{
+        border-radius: 10px;
+        padding: 1.2rem 1.4rem;
+        margin: 0;
+        border: 1px solid {BORDER_COLOR};
+        transition: transform 0.15s, box-shadow 0.15s;
+    }}
+    .risk-card:hover {{
+        transform: translateY(-1px);
+        box-shadow: 0 4px 12px rgba(0,0,0,0.1);
+    }}
+    .risk-card h3, .risk-card h1, .risk-card p {{ color: {TEXT_PRIMARY} !important; }}
+    .risk-low       {{ background: {RISK_LOW_BG};  border-left: 4px solid {RISK_LOW_BORDER}; }}
+    .risk-moderate  {{ background: {RISK_MOD_BG};  border-left: 4px solid {RISK_MOD_BORDER}; }}
+    .risk-high      {{ background: {RISK_HIGH_BG}; border-left: 4px solid {RISK_HIGH_BORDER}; }}
+    .risk-veryhigh  {{ background: {RISK_VH_BG};   border-left: 4px solid {RISK_VH_BORDER}; }}
+    .risk-unavailable {{ background: {RISK_NA_BG}; border-left: 4px solid {RISK_NA_BORDER}; }}
+
+    /* ---- Contributing factors ---- */
+    .contributing-factors {{
+        background-color: {CF_BG};
+        border-radius: 6px;
+        padding: 0.75rem 0.9rem;
+        margin-top: 0.8rem;
+        font-size: 0.82rem;
+        border: 1px solid {CF_BORDER};
+    }}
+    .factor-title {{
+        font-weight: 600;
+        color: {CF_TITLE} !important;
+        margin-bottom: 0.4rem;
+        font-size: 0.75rem;
+        text-transform: uppercase;
+        letter-spacing: 0.5px;
+    }}
+    .factor-item {{
+        color: {CF_ITEM} !important;
+        padding: 0.2rem 0 0.2rem 1rem;
+        position: relative;
+        line-height: 1.45;
+    }}
+    .factor-item:before {{
+        content: "▪";
+        position: absolute;
+        left: 0;
+        color: {CF_BULLET};
+    }}
+
+    /* ---- Premium links ---- */
+    .premium-link-container {{
+        display: flex; gap: 0.75rem; margin: 0.5rem 0 1rem 0; flex-wrap: wrap;
+    }}
+    .premium-link {{
+        flex: 1; min-width: 180px;
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white !important;
+        padding: 0.9rem 1rem;
+        border-radius: 10px;
+        text-decoration: none;
+        display: flex; flex-direction: column;
+        align-items: center; justify-content: center;
+        transition: transform 0.2s, box-shadow 0.2s;
+        box-shadow: 0 3px 10px rgba(102,126,234,0.35);
+        text-align: center;
+    }}
+    .premium-link:hover {{ transform: translateY(-2px); box-shadow: 0 6px 18px rgba(102,126,234,0.5); }}
+    .premium-link-title  {{ font-size: 0.95rem; font-weight: 600; margin-bottom: 0.15rem; color: white !important; }}
+    .premium-link-subtitle {{ font-size: 0.75rem; opacity: 0.9; color: white !important; }}
+    .premium-link.qrisk {{ background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); box-shadow: 0 3px 10px rgba(240,147,251,0.35); }}
+    .premium-link.qrisk:hover {{ box-shadow: 0 6px 18px rgba(240,147,251,0.5); }}
+    .premium-link.lai   {{ background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); box-shadow: 0 3px 10px rgba(79,172,254,0.35); }}
+    .premium-link.lai:hover {{ box-shadow: 0 6px 18px rgba(79,172,254,0.5); }}
+
+    /* ---- Section divider ---- */
+    .section-divider {{
+        border: none; height: 1px;
+        background: {DIVIDER};
+        margin: 1.2rem 0;
+    }}
+
+    /* ---- Thin section separator label ---- */
+    .section-sep {{
+        display: flex; align-items: center; gap: 0.6rem;
+        margin: 1.4rem 0 0.6rem 0;
+    }}
+    .section-sep-label {{
+        font-size: 0.72rem; font-weight: 700; letter-spacing: 0.07em;
+        text-transform: uppercase; color: {SECTION_LABEL_COLOR} !important;
+        white-space: nowrap;
+    }}
+    .section-sep-line {{
+        flex: 1; height: 1px; background: {BORDER_COLOR};
+    }}
+
+    /* ---- Reference link pills - IMPROVED CONTRAST ---- */
+    .cv-ref-pill {{
+        display: inline-flex;
+        align-items: center;
+        gap: 0.3rem;
+        border-radius: 7px;
+        font-size: 0.8rem;
+        font-weight: 600;
+        padding: 0.45rem 1rem;
+        white-space: nowrap;
+        text-decoration: none !important;
+        background: {TOOLBAR_BTN_BG};
+        color: {TOOLBAR_BTN_COLOR} !important;
+        border: 1.5px solid {TOOLBAR_BTN_BORDER};
+        transition: all 0.15s;
+        margin-right: 0.4rem;
+        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+    }}
+    .cv-ref-pill:hover {{
+        border-color: {ACCENT};
+        color: {ACCENT} !important;
+        background: {BG_SECONDARY};
+        box-shadow: 0 2px 6px rgba(0,0,0,0.15);
+    }}
+
+    /* ---- Disabled checkbox ---- */
+    .stCheckbox input:disabled + span {{ color: {TEXT_MUTED} !important; opacity: 0.6 !important; }}
+
+    /* ---- Spinner ---- */
+    .stSpinner > div > div {{ border-top-color: {ACCENT} !important; }}
+
+    /* ---- Scrollbars ---- */
+    ::-webkit-scrollbar {{ width: 6px; height: 6px; }}
+    ::-webkit-scrollbar-track {{ background: {BG_PAGE}; }}
+    ::-webkit-scrollbar-thumb {{ background: {BORDER_COLOR}; border-radius: 3px; }}
+    ::-webkit-scrollbar-thumb:hover {{ background: {ACCENT}; }}
+
+    /* ---- Mobile responsiveness ---- */
+    @media screen and (max-width: 768px) {{
+        input, select, textarea {{ font-size: 16px !important; }}
+        
+        .block-container {{
+            padding-left: 1rem !important;
+            padding-right: 1rem !important;
+        }}
+        
+        .cv-ref-pill {{
+            font-size: 0.75rem;
+            padding: 0.4rem 0.8rem;
+        }}
+        
+        h2 {{
+            font-size: 0.9rem !important;
+        }}
+    }}
+
+    /* ---- Force input colors cross-platform ---- */
+    input, select, textarea, [contenteditable] {{
+        background-color: {BG_INPUT} !important;
+        color: {INPUT_COLOR} !important;
+    }}
+</style>
+"""
+
+
+def build_stylesheet(theme):
+    return STYLESHEET.format(**THEMES[theme])
@@ -0,0 +1,502 @@
+"""
+Batch vs scalar agreement for the vectorized cohort calculators
+"""
+
+import json
+import math
+import random
+
+import numpy as np
+import pytest
+
+from cv_risk_core import (
+    bmi_calc,
+    calculate_aha_prevent,
+    calculate_lai_category,
+    calculate_qrisk3,
+    get_contributing_factors_aha,
+    get_contributing_factors_lai,
+    get_contributing_factors_qrisk,
+    percent_category,
+    ratio,
+)
+from cv_risk_core.batch import (
+    AHA_FACTOR_BITS,
+    LAI_FACTOR_BITS,
+    QRISK3_FACTOR_BITS,
+    aha_factor_mask_batch,
+    calculate_aha_prevent_batch,
+    calculate_lai_category_batch,
+    calculate_qrisk3_batch,
+    lai_factor_mask_batch,
+    percent_category_batch,
+    qrisk3_factor_mask_batch,
+    ratio_batch,
+)
+from cv_risk_core.cohort import chunk_columns, score_chunk, score_file
+from cv_risk_core.factors import LAI_FACTOR_RULES, factor_mask
+from cv_risk_core.parallel import ParallelScorer, partition_bounds
+from cv_risk_core.percentiles import MIN_STRATUM_SIZE, PercentileIndex, build_index, stratum_ids
+from cv_risk_core.units import column_to_mg_dl, to_mg_dl
+from cv_risk_core.validation import ABOVE_MAXIMUM, BELOW_MINIMUM, NOT_A_NUMBER, UNKNOWN_CATEGORY, VALID, validate_chunk
+
+
+def make_patients(n=5000, seed=7):
+    rng = random.Random(seed)
+    patients = []
+    for _ in range(n):
+        patients.append({
+            "age": None if rng.random() < 0.05 else rng.randint(30, 90),
+            "sex": rng.choice(["Male", "Female", None]),
+            "race": rng.choice(["Indian", "South Asian", "White", "Black", "Other"]),
+            "tc": None if rng.random() < 0.05 else float(rng.randint(100, 350)),
+            "hdl": float(rng.randint(20, 100)),
+            "sbp": float(rng.randint(90, 200)),
+            "bp_treated": rng.random() < 0.5,
+            "diabetes": rng.choice(["Yes", "No"]),
+            "smoking": rng.choice(["Never", "Former", "Current"]),
+        })
+    return patients
+
+
+def make_qrisk_patients(n=5000, seed=11):
+    rng = random.Random(seed)
+    patients = []
+    for _ in range(n):
+        patients.append({
+            "age": None if rng.random() < 0.05 else rng.randint(20, 90),
+            "sex": rng.choice(["Male", "Female", None]),
+            "ethnicity": rng.choice(["Indian", "South Asian", "White", "Black", "Other", None]),
+            "smoking": rng.choice(["Never", "Former", "Current"]),
+            "diabetes": rng.choice(["Yes", "No"]),
+            "height": rng.choice([None, 150.0, 163.0, 172.0, 185.0]),
+            "weight": None if rng.random() < 0.05 else float(rng.randint(40, 140)),
+            "sbp": float(rng.randint(90, 200)),
+            "tc_hdl_ratio": None if rng.random() < 0.05 else rng.randint(200, 900) / 100,
+            "antihtn": rng.random() < 0.5,
+            "family_cvd": rng.random() < 0.3,
+            "ckd": rng.random() < 0.1,
+            "atrial_fib": rng.random() < 0.1,
+            "rheumatoid_arthritis": rng.random() < 0.1,
+            "migraine": rng.random() < 0.1,
+        })
+    return patients
+
+
+def columns(patients):
+    return {k: [p[k] for p in patients] for k in patients[0]}
+
+
+def assert_matches(expected, actual):
+    assert len(expected) == len(actual)
+    for i, (e, a) in enumerate(zip(expected, actual)):
+        if e is None:
+            assert math.isnan(a), f"row {i}: expected None, got {a}"
+        else:
+            assert e == a, f"row {i}: expected {e}, got {a}"
+
+
+def test_aha_prevent_batch_matches_scalar():
+    patients = make_patients()
+    expected = [calculate_aha_prevent(**p) for p in patients]
+    assert_matches(expected, calculate_aha_prevent_batch(**columns(patients)))
+
+
+def test_aha_prevent_batch_age_window():
+    risks = calculate_aha_prevent_batch(
+        age=[39, 40, 79, 80], sex=["Male"] * 4, race=["White"] * 4,
+        tc=[200] * 4, hdl=[50] * 4, sbp=[130] * 4, bp_treated=[False] * 4,
+        diabetes=["No"] * 4, smoking=["Never"] * 4,
+    )
+    assert np.isnan(risks[0]) and np.isnan(risks[3])
+    assert not np.isnan(risks[1]) and not np.isnan(risks[2])
+
+
+def test_qrisk3_batch_matches_scalar():
+    patients = make_qrisk_patients()
+    expected = [calculate_qrisk3(**p) for p in patients]
+    assert_matches(expected, calculate_qrisk3_batch(**columns(patients)))
+
+
+def test_qrisk3_batch_accepts_typed_columns():
+    patients = make_qrisk_patients(n=500)
+    cols = columns(patients)
+    categories = ("sex", "ethnicity", "smoking", "diabetes")
+    typed = {k: np.array(["" if v is None else v for v in vals]) if k in categories
+             else np.array(vals, dtype=float) for k, vals in cols.items()}
+    expected = calculate_qrisk3_batch(**cols)
+    np.testing.assert_array_equal(expected, calculate_qrisk3_batch(**typed))
+
+
+def test_qrisk3_batch_accepts_categorical_columns():
+    import pandas as pd
+
+    patients = make_qrisk_patients(n=500)
+    cols = columns(patients)
+    categorical = {k: pd.Series(vals, dtype="category") if k in ("sex", "ethnicity", "smoking", "diabetes") else vals
+                   for k, vals in cols.items()}
+    np.testing.assert_array_equal(calculate_qrisk3_batch(**cols), calculate_qrisk3_batch(**categorical))
+
+
+def test_qrisk3_batch_bmi_edges_unknown_labels_and_blocks(monkeypatch):
+    import pandas as pd
+
+    from cv_risk_core import batch
+
+    patients = make_qrisk_patients(n=600)
+    for i, p in enumerate(patients):
+        # Unrounded BMIs one float either side of a band edge, and heights bmi_calc rejects
+        p["height"] = (170, 152.4, 0, -170)[i % 4]
+        bmi = (19.95, 24.95, 29.95, 25.0)[i // 4 % 4]
+        p["weight"] = math.nextafter(bmi * (p["height"] / 100) ** 2, (-1) ** (i // 16) * 1e9)
+        p["ethnicity"] = ("Chinese", "Arab", "Mixed", "White", "Indian", "Black", "Other", "x")[i % 8]
+        p["sex"] = ("Female", "Male", "Other", "female")[i % 7 % 4]
+    expected = [calculate_qrisk3(**p) for p in patients]
+    monkeypatch.setattr(batch, "QRISK3_BLOCK_ROWS", 64)
+    cols = columns(patients)
+    assert_matches(expected, calculate_qrisk3_batch(**cols))
+    categorical = {k: pd.Series(vals, dtype="category") if k in ("sex", "ethnicity") else vals
+                   for k, vals in cols.items()}
+    assert_matches(expected, calculate_qrisk3_batch(**categorical))
+
+
+def test_ratio_batch_rounds_ties_like_scalar():
+    tc = [178, 200, 213, None, 150]
+    hdl = [80, 40, 40, 50, 0]
+    expected = [ratio(a, b) for a, b in zip(tc, hdl)]
+    assert_matches(expected, ratio_batch(tc, hdl))
+
+
+def test_percent_category_batch_matches_scalar():
+    risks = [None, 0, 4.9, 5, 7.4, 7.5, 19.9, 20, 100]
+    assert list(percent_category_batch(risks)) == [percent_category(p) for p in risks]
+
+
+def test_lai_category_batch_matches_scalar():
+    rng = random.Random(3)
+    patients = [{
+        "ascvd": rng.random() < 0.1, "ckd": rng.random() < 0.1,
+        "diabetes": rng.choice(["Yes", "No", None]), "duration": rng.choice([None, 2.0, 10.0, 15.0]),
+        "smoke": rng.choice(["Never", "Former", "Current"]), "mets": rng.random() < 0.1,
+        "fh_fh": rng.random() < 0.05, "lpa": rng.choice([None, 30.0, 50.0, 51.0]),
+        "apob": rng.choice([None, 100.0, 130.0, 131.0]), "prem_ascvd": rng.random() < 0.2,
+        "fh_dm": rng.random() < 0.2, "fh_htn": rng.random() < 0.2,
+    } for _ in range(2000)]
+    expected = [calculate_lai_category(**p) for p in patients]
+    assert list(calculate_lai_category_batch(**columns(patients))) == expected
+
+
+def popcount(mask):
+    return bin(int(mask)).count("1")
+
+
+def test_factor_masks_match_scalar_lists():
+    patients = make_patients()
+    masks = aha_factor_mask_batch(**{k: v for k, v in columns(patients).items() if k != "race"})
+    for p, mask in zip(patients, masks):
+        factors = get_contributing_factors_aha(p["age"], p["sex"], p["tc"], p["hdl"], p["sbp"], p["bp_treated"],
+                                               p["diabetes"], p["smoking"])
+        assert popcount(mask) == len(factors)
+        assert bool(mask & 1 << AHA_FACTOR_BITS.index("low_hdl")) == any(f.startswith("Low HDL") for f in factors)
+
+    patients = make_qrisk_patients()
+    for p in patients:
+        p["bmi"] = bmi_calc(p["height"], p["weight"])
+    cols = columns(patients)
+    masks = qrisk3_factor_mask_batch(cols["age"], cols["sex"], cols["smoking"], cols["diabetes"], cols["bmi"],
+                                     cols["sbp"], cols["tc_hdl_ratio"], cols["family_cvd"], cols["ckd"],
+                                     cols["atrial_fib"], cols["rheumatoid_arthritis"], cols["ethnicity"])
+    for p, mask in zip(patients, masks):
+        factors = get_contributing_factors_qrisk(p["age"], p["sex"], p["smoking"], p["diabetes"], p["bmi"], p["sbp"],
+                                                 p["tc_hdl_ratio"], p["family_cvd"], p["ckd"], p["atrial_fib"],
+                                                 p["rheumatoid_arthritis"], p["ethnicity"])
+        assert popcount(mask) == len(factors)
+        assert bool(mask & 1 << QRISK3_FACTOR_BITS.index("bmi_30")) == any(f.startswith("Obesity") for f in factors)
+
+    rng = random.Random(5)
+    patients = [{
+        "ascvd": rng.random() < 0.1, "ckd": rng.random() < 0.1, "diabetes": rng.choice(["Yes", "No"]),
+        "duration": rng.choice([None, 3, 10, 15]), "smoke": rng.choice(["Never", "Current"]),
+        "mets": rng.random() < 0.2, "fh_fh": rng.random() < 0.1, "lpa": rng.choice([None, 20, 50, 80]),
+        "apob": rng.choice([None, 90, 130, 150]), "prem_ascvd": rng.random() < 0.2, "fh_dm": rng.random() < 0.2,
+        "fh_htn": rng.random() < 0.2, "ldl": rng.choice([None, 100, 160, 175, 190, 220]),
+    } for _ in range(2000)]
+    masks = lai_factor_mask_batch(**columns(patients))
+    for p, mask in zip(patients, masks):
+        factors = get_contributing_factors_lai(**p)
+        assert popcount(mask) == len(factors)
+        assert bool(mask & 1 << LAI_FACTOR_BITS.index("long_diabetes")) == any(f.startswith("Long-standing")
+                                                                               for f in factors)
+        assert mask == factor_mask(LAI_FACTOR_RULES, p)
+
+
+def test_columnar_output_types(tmp_path):
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from benchmarks.synthetic import synthetic_cohort
+
+    src = tmp_path / "patients.parquet"
+    synthetic_cohort(500).to_parquet(src)
+    score_file(src, tmp_path / "scores.csv", chunk_size=200, keep=["patient_id"])
+    score_file(src, tmp_path / "scores.parquet", chunk_size=200, keep=["patient_id"])
+    score_file(src, tmp_path / "scores.arrow", chunk_size=200, keep=["patient_id"])
+
+    schema = pq.read_schema(tmp_path / "scores.parquet")
+    assert schema.field("qrisk3").type == pa.float32()
+    assert schema.field("lai_category").type == pa.dictionary(pa.int8(), pa.string())
+    assert schema.field("qrisk3_factors").type == pa.uint16()
+    with pa.memory_map(str(tmp_path / "scores.arrow")) as source:
+        table = pa.ipc.open_file(source).read_all()
+    assert table.schema == schema
+
+    text = pd.read_csv(tmp_path / "scores.csv")
+    columnar = pd.read_parquet(tmp_path / "scores.parquet")
+    assert "qrisk3_factors" not in text
+    np.testing.assert_allclose(columnar["qrisk3"], text["qrisk3"], rtol=1e-6)
+    assert list(columnar["aha_prevent_category"].astype(object).fillna("-")) == list(text["aha_prevent_category"].fillna("-"))
+    assert table.column("lai_factors").to_pylist() == columnar["lai_factors"].tolist()
+
+
+def test_score_file_streams_csv(tmp_path):
+    src = tmp_path / "patients.csv"
+    src.write_text(
+        "patient_id,age,sex,ethnicity,height,weight,sbp,tc,hdl,smoking,diabetes,antihtn,ckd\n"
+        "A,55,Male,White,175,85,140,220,38,Current,No,1,0\n"
+        "B,30,Female,Indian,,,120,180,60,Never,No,0,0\n"
+        "C,,Female,Black,160,70,130,200,50,Never,Yes,0,1\n"
+    )
+    dst = tmp_path / "scores.csv"
+    rows, _, invalid_rows = score_file(src, dst, chunk_size=2, keep=["patient_id"])
+    assert rows == 3 and invalid_rows == 0
+
+    import pandas as pd
+
+    out = pd.read_csv(dst)
+    assert list(out["patient_id"]) == ["A", "B", "C"]
+    assert out.loc[0, "aha_prevent"] == calculate_aha_prevent(55, "Male", "White", 220, 38, 140, True, "No", "Current")
+    assert out.loc[1, "qrisk3"] == calculate_qrisk3(30, "Female", "Indian", "Never", "No", None, None, 120, ratio(180, 60),
+                                                    False, False, False, False, False, False)
+    assert np.isnan(out.loc[1, "aha_prevent"])
+    assert list(out["lai_category"]) == ["High", "Low", "Very High"]
+
+
+def test_unit_tags_convert_columns_like_scalar():
+    import pandas as pd
+
+    values = [5.5, 212.0, 2.1, 1.2, np.nan]
+    tags = ["mmol/L", "mg/dL", "g/L", " MMOL / l", None]
+    expected = [to_mg_dl("tc", v, u) for v, u in zip(values, tags)]
+    np.testing.assert_allclose(column_to_mg_dl("tc", values, tags), expected)
+    np.testing.assert_allclose(column_to_mg_dl("tc", values, pd.Series(tags, dtype="category")), expected)
+    np.testing.assert_allclose(column_to_mg_dl("lpa", [215.0], "nmol/L"), [100.0])
+    with pytest.raises(ValueError, match="lpa"):
+        column_to_mg_dl("lpa", [1.0, 2.0], ["mg/dL", "mmol/L"])
+
+    chunk = pd.DataFrame({"tc": [5.5, 212.0], "tc_unit": ["mmol/L", None], "hdl": [1.2, 1.1], "hdl_unit": "mmol/L"})
+    columns = chunk_columns(chunk)
+    np.testing.assert_allclose(columns["tc"], [5.5 * 38.67, 212.0])
+    np.testing.assert_allclose(columns["hdl"], [1.2 * 38.67, 1.1 * 38.67])
+
+
+def test_invalid_rows_are_quarantined_not_scored(tmp_path):
+    import pandas as pd
+
+    src = tmp_path / "patients.csv"
+    src.write_text(
+        "patient_id,age,sex,ethnicity,sbp,tc,tc_unit,hdl,lpa,lpa_unit,smoking\n"
+        "A,55,Male,White,140,220,,38,,,Current\n"
+        "B,300,Male,White,140,220,,38,,,Never\n"
+        "C,55,Female,White,140,220,,0,,,Never\n"
+        "D,55,male,White,140,abc,,38,,,Never\n"
+        "E,60,Female,Black,130,5.5,mmol/L,0.5,20,mmol/L,Never\n"
+        "F,60,Female,Black,130,5.5,mmol/L,50,,,Never\n"
+    )
+    chunk = pd.read_csv(src)
+    validation = validate_chunk(chunk)
+    assert list(validation.codes["age"]) == [VALID, ABOVE_MAXIMUM, VALID, VALID, VALID, VALID]
+    assert list(validation.codes["hdl"]) == [VALID, VALID, BELOW_MINIMUM, VALID, BELOW_MINIMUM, VALID]
+    assert validation.codes["tc"][3] == NOT_A_NUMBER and validation.codes["sex"][3] == UNKNOWN_CATEGORY
+    assert list(validation.invalid) == [False, True, True, True, True, False]
+
+    dst, rejected = tmp_path / "scores.csv", tmp_path / "rejected.csv"
+    rows, _, invalid_rows = score_file(src, dst, chunk_size=4, keep=["patient_id"], quarantine_path=rejected)
+    assert (rows, invalid_rows) == (6, 4)
+    out = pd.read_csv(dst)
+    assert out.loc[0, "aha_prevent"] == calculate_aha_prevent(55, "Male", "White", 220, 38, 140, False, "No", "Current")
+    assert out.loc[5, "aha_prevent"] == calculate_aha_prevent(60, "Female", "Black", 5.5 * 38.67, 50, 130, False, "No",
+                                                              "Never")
+    assert out.loc[1:4, ["qrisk3", "aha_prevent", "lai_category"]].isna().all().all()
+    quarantined = pd.read_csv(rejected)
+    assert list(quarantined["input_row"]) == [1, 2, 3, 4]
+    assert list(quarantined["patient_id"]) == ["B", "C", "D", "E"]
+    assert list(quarantined["errors"]) == [
+        "age: above_maximum", "hdl: below_minimum", "tc: not_a_number; sex: unknown_category",
+        "hdl: below_minimum; lpa: unknown_unit",
+    ]
+
+
+def test_parallel_scorer_matches_serial():
+    import pandas as pd
+
+    patients = make_qrisk_patients(n=3000)
+    frame = pd.DataFrame(patients)
+    frame["tc"] = [None if r is None else r * 45 for r in frame["tc_hdl_ratio"]]
+    frame["hdl"] = 45.0
+    frame["prem_ascvd"] = frame.pop("family_cvd")
+    expected = score_chunk(frame)
+    with ParallelScorer(workers=2, partitions=5) as scorer:
+        pd.testing.assert_frame_equal(scorer.score(frame), expected)
+        pd.testing.assert_frame_equal(scorer.score(frame, factors=True), score_chunk(frame, factors=True))
+
+
+def test_percentile_index_matches_brute_force(tmp_path):
+    from benchmarks.synthetic import synthetic_cohort
+
+    cohort = synthetic_cohort(20_000, seed=23)
+    cohort.to_parquet(tmp_path / "patients.parquet")
+    build_index(tmp_path / "patients.parquet", tmp_path / "peers.idx", chunk_size=3000)
+    index = PercentileIndex(tmp_path / "peers.idx")
+
+    scores = score_chunk(cohort)
+    strata = stratum_ids(cohort["age"], cohort["sex"], cohort["ethnicity"])
+    for i in np.random.default_rng(0).integers(0, len(cohort), 100):
+        for score in ("qrisk3", "aha_prevent"):
+            risks = scores[score].to_numpy(dtype=np.float32)
+            peers = risks[(strata == strata[i]) & ~np.isnan(risks)]
+            age, risk = cohort["age"][i], scores[score][i]
+            result = index.percentile(score, None if np.isnan(age) else age, cohort["sex"][i],
+                                      cohort["ethnicity"][i], None if np.isnan(risk) else risk)
+            if strata[i] < 0 or np.isnan(risk) or len(peers) < MIN_STRATUM_SIZE:
+                assert result is None
+                continue
+            below, ties = (peers < risks[i]).sum(), (peers == risks[i]).sum()
+            assert result.n == len(peers)
+            assert result.percentile == 100 * (below + ties / 2) / len(peers)
+
+
+def test_partition_bounds_cover_range():
+    assert partition_bounds(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert partition_bounds(2, 8) == [(0, 1), (1, 2)]
+
+
+def test_extract_directory_scores_and_skips_processed(tmp_path):
+    import pandas as pd
+
+    from benchmarks.synthetic import synthetic_lab_report, text_pdf
+    from cv_risk_core.lab_reports import extract_directory, processed_hashes
+
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    (reports / "a.pdf").write_bytes(synthetic_lab_report(tc=230, hdl=38, age=61, sex="M"))
+    (reports / "b.pdf").write_bytes(synthetic_lab_report(tc=180, hdl=62, age=47, sex="F"))
+    (reports / "copy_of_a.pdf").write_bytes((reports / "a.pdf").read_bytes())
+    (reports / "broken.pdf").write_bytes(b"%PDF-1.4 not really")
+    # Opens fine, but decoding the page's content stream raises pdfminer's own exception.
+    garbled = text_pdf([["Total Cholesterol {200} mg/dL"]])
+    garbled = garbled.replace(b"<< /Length", b"<< /Filter /ASCII85Decode /Length", 1)
+    (reports / "garbled.pdf").write_bytes(garbled)
+    log = tmp_path / "extraction.jsonl"
+
+    summary = extract_directory(reports, tmp_path / "scores.csv", log, workers=2)
+    assert (summary["files"], summary["ok"], summary["failed"], summary["skipped"]) == (4, 2, 2, 1)
+    assert summary["output"] == str(tmp_path / "scores.csv")
+    out = pd.read_csv(tmp_path / "scores.csv").set_index("file")
+    assert out.loc[str(reports / "a.pdf"), ["tc", "hdl", "age"]].tolist() == [230, 38, 61]
+    assert out.loc[str(reports / "b.pdf"), "sex"] == "Female"
+    records = {r["file"]: r for r in map(json.loads, log.read_text().splitlines())}
+    assert records[str(reports / "broken.pdf")]["status"] == "failed"
+    assert records[str(reports / "garbled.pdf")]["status"] == "failed"
+    assert records[str(reports / "a.pdf")]["pages_read"] == 2
+    assert records[str(reports / "a.pdf")]["output"] == str(tmp_path / "scores.csv")
+
+    # The existing output is kept; the new rows go to the next free name.
+    (reports / "c.pdf").write_bytes(synthetic_lab_report(tc=200, age=70))
+    summary = extract_directory(reports, tmp_path / "scores.csv", log, workers=1)
+    assert (summary["files"], summary["skipped"]) == (1, 5)
+    assert len(pd.read_csv(tmp_path / "scores.csv")) == 2
+    assert pd.read_csv(tmp_path / "scores.1.csv")["file"].tolist() == [str(reports / "c.pdf")]
+
+    # Failures marked for retry (the file could not be read) are not skipped next time.
+    with open(log, "a") as f:
+        f.write(json.dumps({"file": "d.pdf", "sha256": "d" * 64, "status": "failed", "retry": True}) + "\n")
+    assert "d" * 64 not in processed_hashes(log)
+
+
+def test_scenario_grid_matches_scalar_per_cell():
+    from cv_risk_core import clinical_inputs
+    from cv_risk_core.scenarios import scenario_grid
+
+    p = clinical_inputs(age=58, sex="Female", ethnicity="Black", height=160, weight=88, sbp=152, tc=236,
+                        hdl=47, smoking="Current", diabetes="Yes", antihtn=True, ckd=True)
+    grid = scenario_grid(p, sbp_steps=5, lipid_steps=6)
+    assert grid.smoking == ("Current", "Former")
+    assert grid.qrisk3.shape == grid.aha_prevent.shape == (2, 5, 6)
+    for k, smoking in enumerate(grid.smoking):
+        for i, dsbp in enumerate(grid.sbp_change):
+            for j, dlipid in enumerate(grid.lipid_change):
+                sbp, tc = p.sbp + dsbp, p.tc * (1 + dlipid / 100)
+                assert grid.aha_prevent[k, i, j] == calculate_aha_prevent(58, "Female", "Black", tc, 47, sbp, True,
+                                                                          "Yes", smoking)
+                assert grid.qrisk3[k, i, j] == calculate_qrisk3(58, "Female", "Black", smoking, "Yes", 160, 88, sbp,
+                                                                ratio(tc, 47), True, False, True, False, False, False)
+    assert scenario_grid(p, sbp_steps=5, lipid_steps=6) is grid
+
+
+def test_service_single_and_batch_agree():
+    from cv_risk_core.service import BadRequest, assessment_response, score_batch_json
+
+    patients = [
+        {"id": "A", "age": 55, "sex": "Male", "ethnicity": "White", "height": 175, "weight": 85, "sbp": 140,
+         "tc": 220, "hdl": 38, "smoking": "Current", "diabetes": "No", "antihtn": True},
+        {"id": "B", "age": 30, "sex": "Female", "ethnicity": "Indian", "sbp": 120, "tc": 180, "hdl": 60},
+        {"id": "C", "sex": "Female", "diabetes": "Yes", "dm_duration": 12},
+    ]
+    batch = json.loads(score_batch_json(json.dumps({"patients": patients}).encode()))
+    assert [r["id"] for r in batch] == ["A", "B", "C"]
+    for patient, row in zip(patients, batch):
+        single = assessment_response(patient)
+        for field in ("qrisk3", "qrisk3_category", "aha_prevent", "aha_prevent_category", "lai_category"):
+            assert single[field] == row[field]
+    assert assessment_response(patients[0])["recommendations"]["aha_prevent"]["statin"]
+    assert assessment_response(patients[2])["recommendations"]["qrisk3"] is None
+
+    with pytest.raises(BadRequest, match="unknown patient fields: bmi"):
+        score_batch_json(b'[{"age": 50, "bmi": 31}]')
+    with pytest.raises(BadRequest, match="unknown clinical inputs: bmi"):
+        assessment_response({"age": 50, "bmi": 31})
+    with pytest.raises(BadRequest):
+        score_batch_json(b'{"patients": 3}')
+
+    # An SBP that would overflow QRISK3 is a 400 for one patient and an "errors" entry in a batch.
+    huge = {"id": "D", "age": 60, "sex": "Male", "sbp": 1e6, "tc": 230, "hdl": 45}
+    with pytest.raises(BadRequest, match="sbp: above_maximum"):
+        assessment_response(huge)
+    row = json.loads(score_batch_json(json.dumps([huge]).encode()))[0]
+    assert row["errors"] == "sbp: above_maximum" and row["qrisk3"] is None
+
+
+def test_run_all_risk_assessments_numeric_and_batch_match_strings():
+    from cv_risk_calculators import format_value, run_all_risk_assessments, run_all_risk_assessments_batch
+
+    rng = random.Random(19)
+    patients = [
+        {k: (None if rng.random() < 0.15 else v) for k, v in {
+            "age": rng.randint(30, 80), "ldl": rng.uniform(50, 220), "hdl": rng.uniform(25, 80),
+            "sbp": rng.uniform(100, 180), "tc": rng.uniform(120, 300),
+            "statin": rng.choice(["No statin", "Moderate intensity", "High intensity"]),
+        }.items()}
+        for _ in range(300)
+    ]
+    batch = run_all_risk_assessments_batch(patients)
+    for i, patient in enumerate(patients):
+        numeric = run_all_risk_assessments(patient, numeric=True)
+        for name, result in run_all_risk_assessments(patient).items():
+            column = batch[name]
+            if result["status"] == "ok":
+                assert format_value(name, numeric[name]["value"]) == result["value"]
+                assert column[i] == numeric[name]["value"]
+            else:
+                assert numeric[name] == result
+                assert math.isnan(column[i]) if column.dtype.kind == "f" else column[i] == -1
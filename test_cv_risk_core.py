@@ -0,0 +1,178 @@
+"""
+Tests for the import-safe calculation core
+"""
+
+import io
+import json
+import subprocess
+import sys
+
+import pytest
+
+from cv_risk_core import assess, calculate_aha_prevent, calculate_lai_category, calculate_qrisk3, clinical_inputs
+from cv_risk_core.assessment import cache_stats, clear_cache
+from cv_risk_core.cli import score_patient, serve_stdin
+from cv_risk_core.factors import LAI_FACTOR_RULES, factor_labels, factor_mask
+from cv_risk_core.graph import AssessmentGraph, dependents
+from cv_risk_core.labs import extract_lab_values, read_lab_report
+from cv_risk_core.profiling import NULL_PROFILER, section_profiler
+from cv_risk_core.records import PatientRecord, array_to_records, records_to_array
+from cv_risk_core.scores import AHA_PREVENT_COEFFICIENTS, AHA_PREVENT_STRATA, AHA_PREVENT_TERMS
+
+from benchmarks.synthetic import synthetic_lab_report, text_pdf
+from cv_risk_calculators import run_all_risk_assessments
+
+
+def test_core_import_does_not_load_streamlit():
+    code = "import sys, cv_risk_core; assert 'streamlit' not in sys.modules; assert 'numpy' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_cli_scores_flags_and_ndjson_without_heavy_imports():
+    code = ("import sys; from cv_risk_core.cli import main; main(['--age', '58', '--sbp', '146', '--tc', '224', "
+            "'--hdl', '39', '--antihtn']); assert not {'streamlit', 'numpy', 'pandas'} & set(sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    assert out.startswith("QRISK3:") and "Overall Risk Level" in out
+    assert "not calculable" not in out  # sex, ethnicity, smoking and diabetes take the app's defaults
+
+    patient = {"id": "a1", "age": 60, "sex": "Female", "sbp": 150, "tc": 230, "hdl": 45}
+    stdout = io.StringIO()
+    assert serve_stdin(io.StringIO(json.dumps(patient) + "\n\nnot json\n" + '{"id": 3, "agee": 4}\n'), stdout) == 3
+    first, bad_json, unknown = map(json.loads, stdout.getvalue().splitlines())
+    assert first == score_patient(patient) and first["id"] == "a1"
+    assert set(bad_json) == {"error"} and unknown == {"id": 3, "error": "unknown clinical inputs: agee"}
+
+    # Out-of-range values (which would overflow the QRISK3 exponent) are answered per line; the loop goes on.
+    stdout = io.StringIO()
+    huge = {"id": "b", "age": 60, "sex": "Male", "sbp": 1e6, "tc": 230, "hdl": 45}
+    assert serve_stdin(io.StringIO(json.dumps(huge) + "\n" + json.dumps(patient) + "\n"), stdout) == 2
+    rejected, scored = map(json.loads, stdout.getvalue().splitlines())
+    assert rejected == {"id": "b", "error": "invalid patient: sbp: above_maximum"}
+    assert scored == first
+
+
+def test_lai_category_levels():
+    base = dict(ascvd=False, ckd=False, diabetes="No", duration=None, smoke="Never", mets=False,
+                fh_fh=False, lpa=None, apob=None, prem_ascvd=False, fh_dm=False, fh_htn=False)
+    assert calculate_lai_category(**base) == "Low"
+    assert calculate_lai_category(**{**base, "fh_htn": True}) == "Moderate"
+    assert calculate_lai_category(**{**base, "lpa": 60}) == "High"
+    assert calculate_lai_category(**{**base, "diabetes": "Yes"}) == "High"
+    assert calculate_lai_category(**{**base, "diabetes": "Yes", "duration": 12}) == "Very High"
+    assert calculate_lai_category(**{**base, "ascvd": True}) == "Very High"
+
+
+def test_aha_prevent_strata_table():
+    assert len(AHA_PREVENT_COEFFICIENTS) == len(AHA_PREVENT_STRATA)
+    assert all(len(row) == len(AHA_PREVENT_TERMS) for row in AHA_PREVENT_COEFFICIENTS)
+    expected = {("White", "Male"): (19.6, 13.9), ("Indian", "Female"): (11.0, 6.6),
+                ("Black", "Male"): (17.8, 24.9), ("Black", "Female"): (17.0, 18.3)}
+    for (race, sex), (smoker, treated_dm) in expected.items():
+        assert calculate_aha_prevent(62, sex, race, 220, 45, 138, False, "No", "Current") == smoker
+        assert calculate_aha_prevent(55, sex, race, 190, 55, 150, True, "Yes", "Never") == treated_dm
+
+
+def test_factor_rules_chain_groups_and_render_lazily():
+    values = dict(ascvd=False, ckd=False, diabetes="Yes", duration=12.8, smoke="Never", mets=False, fh_fh=False,
+                  lpa=None, apob=None, ldl=195, prem_ascvd=False, fh_dm=False, fh_htn=True)
+    mask = factor_mask(LAI_FACTOR_RULES, values)
+    assert [rule.name for i, rule in enumerate(LAI_FACTOR_RULES) if mask >> i & 1] == [
+        "long_diabetes", "ldl_190", "fh_htn"]
+    assert factor_labels(mask, LAI_FACTOR_RULES, values) == [
+        "Long-standing diabetes (12 years)", "Severe hypercholesterolemia (LDL 195 mg/dL)",
+        "Family history of hypertension"]
+    names = [rule.name for rule in LAI_FACTOR_RULES]
+    assert factor_mask(LAI_FACTOR_RULES, {**values, "duration": None, "ldl": 0}) == (
+        1 << names.index("diabetes") | 1 << names.index("fh_htn"))
+
+
+def test_patient_record_round_trips_nested_flat_and_array():
+    nested = {
+        "demographics": {"age": 55, "sex": "male", "race_ethnicity": "white"},
+        "vitals": {"systolic_bp": 145, "bmi": 28.7},
+        "lab_values": {"total_cholesterol": 220, "hdl_cholesterol": 38, "ldl_cholesterol": 155},
+        "medical_history": {"hypertension_treatment": True, "cvd_history": {"prior_mi": False}},
+        "lifestyle_factors": {"smoking_status": "current"},
+    }
+    record = PatientRecord.from_dict(nested)
+    assert record.to_dict() == nested
+    assert PatientRecord.from_dict(record.to_dict(nested=False)) == record
+    flat = {"age": 55, "ldl": 140, "hdl": 42, "sbp": 146, "tc": 210, "statin": "No statin"}
+    assert run_all_risk_assessments(PatientRecord.from_dict(flat)) == run_all_risk_assessments(flat)
+
+    array = records_to_array([nested, flat])
+    assert array["age"].tolist() == [55, 55] and array["diabetes"].tolist() == [-1, -1]
+    assert array_to_records(array) == [record, PatientRecord.from_dict(flat)]
+
+
+def test_assessment_cache_normalizes_inputs():
+    clear_cache()
+    first = assess(clinical_inputs(age=55, sex="Male", ethnicity="White", height=175, weight=80,
+                                   sbp=140, tc=200, hdl=50, smoking="Never", diabetes="No", ckd=1))
+    again = assess(clinical_inputs(age=55.0, sex="Male", ethnicity="White", height=175.0, weight=80.0,
+                                   sbp=140.0, tc=200.0, hdl=50.0, smoking="Never", diabetes="No", ckd=True))
+    assert again is first
+    assert cache_stats()["hits"] == 1 and cache_stats()["misses"] == 1
+    assert first.qrisk == calculate_qrisk3(55, "Male", "White", "Never", "No", 175, 80, 140, 4.0,
+                                           False, False, True, False, False, False)
+    assert "Chronic kidney disease" in first.qrisk_factors
+
+
+def test_assessment_graph_recomputes_only_dirty_nodes():
+    inputs = clinical_inputs(age=58, sex="Male", ethnicity="Indian", sbp=146, tc=224, hdl=39, ldl=150,
+                             height=172, weight=84, smoking="Current", diabetes="No", antihtn=True)
+    graph = AssessmentGraph()
+    graph.update(inputs, apoa1=120)
+    assert graph.assessment() == assess(inputs)
+    assert graph.update(inputs, apoa1=120) == () and graph.updates == 1
+
+    graph.update(inputs, apoa1=130)
+    assert graph.recomputed == ("apo_ratio",)
+    hits = cache_stats()["hits"]
+    changed = graph.update(inputs._replace(sbp=147.0), apoa1=130)
+    assert "lai" not in changed and "lai_recommendations" not in graph.recomputed
+    assert set(graph.recomputed) <= set(dependents("sbp"))
+    AssessmentGraph().update(inputs._replace(sbp=147.0), apoa1=130)
+    assert cache_stats()["hits"] == hits + 1
+    assert graph.assessment() == assess(inputs._replace(sbp=147.0))
+
+
+def test_section_profiler_logs_each_rerun(tmp_path):
+    log = tmp_path / "profile.log"
+    profiler = section_profiler(enabled=True, log_path=str(log))
+    profiler.mark("Inputs")
+    profiler.mark("Calculations")
+    sections = profiler.finish()
+    assert [label for label, _ in sections] == ["Inputs", "Calculations"]
+    record = json.loads(log.read_text().splitlines()[-1])
+    assert [label for label, _ in record["sections"]] == ["Inputs", "Calculations"]
+    assert section_profiler(enabled=False) is NULL_PROFILER
+
+
+def test_extract_lab_values_skips_ratios_and_lookalikes():
+    text = "\n".join([
+        "VLDL Cholesterol 35 mg/dL < 30",
+        "Non-HDL Cholesterol 171 mg/dL",
+        "TC/HDL Ratio 5.2",
+        "HDL Cholesterol (Direct) 41 mg/dL > 40",
+        "LDL-C 3.6 mmol/L",
+        "Cholesterol, Total 212 mg/dl",
+        "Lipoprotein (a) 62 mg/dL < 30",
+    ])
+    values, other_units = extract_lab_values(text)
+    assert values == {"hdl": 41.0, "tc": 212.0, "lpa": 62.0}
+    assert other_units == {"ldl": (3.6, "mmol/l")}
+
+
+def test_lab_report_pdf_is_parsed_once_per_content():
+    data = synthetic_lab_report(tc=230, ldl=150, hdl=38)
+    report = read_lab_report(data)
+    assert report.values == {"tc": 230, "ldl": 150, "hdl": 38, "tg": 176, "apob": 104, "apoa1": 128, "lpa": 62}
+    assert report.pages_read == 2 and report.pages == 3
+    assert read_lab_report(bytes(data)) is report
+
+    # A page whose content stream cannot be decoded is a ValueError like any other unreadable PDF.
+    garbled = text_pdf([["Total Cholesterol {200} mg/dL"]])
+    garbled = garbled.replace(b"<< /Length", b"<< /Filter /ASCII85Decode /Length", 1)
+    with pytest.raises(ValueError, match="could not read PDF"):
+        read_lab_report(garbled)